@@ -1,57 +1,236 @@
+import base64
+import binascii
+import contextlib
+import json
+import logging
 import os
+import tempfile
+import time
+from typing import cast
 
-from flask import Flask
-from gcp_microservice_utils import GcpAuthToken, setup_apigateway, setup_cloud_logging, setup_cloud_trace
+from flask import Flask, Response, g, request
 
 from blueprints import BlueprintHealth, BlueprintIncident
+from blueprints.util import APIGatewayRequest
 from containers import Container
+from metrics import EXECUTOR_STATS, HTTP_POOL_CONNECTIONS, HTTP_POOL_REQUESTS, INCIDENT_CACHE_LISTENERS, REQUEST_DURATION
+from profiling import PROFILE_HEADER, finish_request_profile, save_report, start_request_profile
+from repositories.cache import CachedIncidentRepository
+from repositories.rest import CachingTokenProvider
+from timing import current_timings, finish_request_timings, start_request_timings
+from warmup import warm_up
 
 
 class FlaskMicroservice(Flask):
     container: Container
 
 
-def create_app() -> FlaskMicroservice:
-    if os.getenv('ENABLE_CLOUD_LOGGING') == '1':
-        setup_cloud_logging()  # pragma: no cover
+def create_container() -> Container:
+    container = Container()
 
-    app = FlaskMicroservice(__name__)
-    app.container = Container()
+    container.config.firestore.database.from_env('FIRESTORE_DATABASE', '(default)')
+
+    # Where incidents are read from, INCIDENT_BACKEND=memory keeps them in memory, loaded from INCIDENT_DATA_FILE if set
+    container.config.incidents.backend.from_env('INCIDENT_BACKEND', 'firestore')
+    container.config.incidents.data_file.from_env('INCIDENT_DATA_FILE', None)
+
+    # Threads shared by all requests for concurrent lookups, and how many of them a single request may use
+    container.config.executor.max_workers.from_env('EXECUTOR_MAX_WORKERS', as_=int, default=32)
+    container.config.executor.max_queue.from_env('EXECUTOR_MAX_QUEUE', as_=int, default=64)
+    container.config.executor.max_concurrency.from_env('EXECUTOR_MAX_CONCURRENCY', as_=int, default=8)
+
+    # Threads serving requests (gunicorn --threads), the connection pools are sized for them plus the executor workers
+    container.config.http.request_threads.from_env('REQUEST_THREADS', as_=int, default=8)
+
+    # Consecutive failures of an upstream service before its requests fail fast, and seconds until one is retried
+    container.config.resilience.failure_threshold.from_env('CIRCUIT_FAILURE_THRESHOLD', as_=int, default=5)
+    container.config.resilience.reset_timeout.from_env('CIRCUIT_RESET_TIMEOUT', as_=float, default=10.0)
+    # Requests slower than this percentile of the recent ones are sent a second time, disabled unless set
+    if 'HEDGE_PERCENTILE' in os.environ:
+        container.config.resilience.hedge_percentile.from_env('HEDGE_PERCENTILE', as_=float)
+    # Threads of each upstream service sending the hedged requests, calls beyond them are sent without a hedge
+    container.config.resilience.hedge_workers.from_env('HEDGE_WORKERS', as_=int, default=16)
 
-    app.container.config.firestore.database.from_env('FIRESTORE_DATABASE', '(default)')
+    # Cache of user/employee profiles, disabled unless PROFILE_CACHE_BACKEND=memory
+    container.config.cache.profiles.backend.from_env('PROFILE_CACHE_BACKEND', 'none')
+    container.config.cache.profiles.max_size.from_env('PROFILE_CACHE_MAX_SIZE', as_=int, default=1024)
+    container.config.cache.profiles.ttl.from_env('PROFILE_CACHE_TTL', as_=float, default=60.0)
+
+    # Cache of incident details kept up to date by Firestore listeners, disabled unless INCIDENT_CACHE_BACKEND=memory.
+    # Each listener holds a gRPC stream and a thread, so only a few dozen are kept by default.
+    container.config.cache.incidents.backend.from_env('INCIDENT_CACHE_BACKEND', 'none')
+    container.config.cache.incidents.max_listeners.from_env('INCIDENT_CACHE_MAX_LISTENERS', as_=int, default=32)
+    container.config.cache.incidents.max_history.from_env('INCIDENT_CACHE_MAX_HISTORY', as_=int, default=200)
 
     if 'K_SERVICE' in os.environ:  # pragma: no cover
         import google.auth
 
         _, project_id = google.auth.default()  # type: ignore[no-untyped-call]
-        app.container.config.project_id.from_value(project_id)
+        container.config.project_id.from_value(project_id)
 
     if 'USER_SVC_URL' in os.environ:  # pragma: no cover
-        app.container.config.svc.user.url.from_env('USER_SVC_URL')
+        container.config.svc.user.url.from_env('USER_SVC_URL')
 
         if 'USER_SVC_TOKEN' in os.environ:
-            app.container.config.svc.user.token_provider.from_value(
+            container.config.svc.user.token_provider.from_value(
                 type('TokenProvider', (object,), {'get_token': lambda: os.environ['USER_SVC_TOKEN']})
             )
         elif 'USE_CLOUD_TOKEN_PROVIDER' in os.environ:
-            app.container.config.svc.user.token_provider.from_value(GcpAuthToken(os.environ['USER_SVC_URL']))
+            from gcp_microservice_utils import GcpAuthToken
+
+            container.config.svc.user.token_provider.from_value(CachingTokenProvider(GcpAuthToken(os.environ['USER_SVC_URL'])))
 
     if 'CLIENT_SVC_URL' in os.environ:  # pragma: no cover
-        app.container.config.svc.client.url.from_env('CLIENT_SVC_URL')
+        container.config.svc.client.url.from_env('CLIENT_SVC_URL')
 
         if 'CLIENT_SVC_TOKEN' in os.environ:
-            app.container.config.svc.client.token_provider.from_value(
+            container.config.svc.client.token_provider.from_value(
                 type('TokenProvider', (object,), {'get_token': lambda: os.environ['CLIENT_SVC_TOKEN']})
             )
         elif 'USE_CLOUD_TOKEN_PROVIDER' in os.environ:
-            app.container.config.svc.client.token_provider.from_value(GcpAuthToken(os.environ['CLIENT_SVC_URL']))
+            from gcp_microservice_utils import GcpAuthToken
+
+            container.config.svc.client.token_provider.from_value(
+                CachingTokenProvider(GcpAuthToken(os.environ['CLIENT_SVC_URL']))
+            )
+
+    return container
+
+
+def setup_apigateway(app: Flask) -> None:
+    # Same as setup_apigateway of gcp_microservice_utils, which cannot be imported without loading the Cloud Logging
+    # client library: the gateway forwards the verified token claims in this header
+    @app.before_request
+    def decode_userinfo() -> None:
+        req = cast(APIGatewayRequest, request)
+        userinfo = request.headers.get('X-Apigateway-Api-Userinfo')
+        req.user_token = None  # type: ignore[assignment]
+
+        if userinfo:
+            with contextlib.suppress(binascii.Error, ValueError):
+                req.user_token = json.loads(base64.urlsafe_b64decode(userinfo + '=' * (4 - len(userinfo) % 4)))
+
+
+def setup_server_timing(app: Flask, *, log: bool) -> None:
+    # Adds the time the request spent on each dependency as a Server-Timing header, and optionally logs it
+    logger = logging.getLogger('timing')
+
+    @app.before_request
+    def start_timings() -> None:
+        g.timings_token = start_request_timings()
+
+    @app.after_request
+    def add_server_timing(resp: Response) -> Response:
+        timings = current_timings()
+        if timings is None:
+            return resp
+
+        # Streamed responses are still being produced, their header only covers the work done so far
+        resp.headers['Server-Timing'] = timings.server_timing()
+
+        if log:
+            logger.info(
+                'Request timings',
+                extra={'json_fields': {'method': request.method, 'path': request.path, 'timings': timings.as_dict()}},
+            )
+
+        return resp
+
+    @app.teardown_request
+    def finish_timings(_exc: BaseException | None) -> None:
+        token = g.pop('timings_token', None)
+        if token is not None:
+            finish_request_timings(token)
 
-    if os.getenv('ENABLE_CLOUD_TRACE') == '1':
-        setup_cloud_trace(app)  # pragma: no cover
+
+def setup_profiling(app: Flask, *, directory: str) -> None:
+    # Runs the requests sent with the profiling header under cProfile, one at a time, saves the profile to the
+    # directory and logs the functions where most CPU time was spent. The profiler covers the whole process, see
+    # PROFILES_ALL_THREADS.
+    logger = logging.getLogger('profiling')
+
+    @app.before_request
+    def start_profile() -> None:
+        if request.headers.get(PROFILE_HEADER) == '1':
+            g.profile = start_request_profile()
+            if g.profile is None:
+                logger.warning('Request not profiled, another request is being profiled')
+
+    @app.teardown_request
+    def finish_profile(_exc: BaseException | None) -> None:
+        # Runs once streamed responses have been sent, so producing their body is part of the profile
+        profile = g.pop('profile', None)
+        if profile is None:
+            return
+
+        finish_request_profile(profile)
+        logger.info('Request profile', extra={'json_fields': save_report(profile, directory, request.method, request.path)})
+
+
+def setup_request_metrics(app: Flask) -> None:
+    # Records the duration of each request by route and status code, served by the metrics endpoint
+    @app.before_request
+    def start_request_timer() -> None:
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def observe_request(resp: Response) -> Response:
+        start = g.get('request_start')
+        if start is not None:
+            endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            REQUEST_DURATION.observe(time.perf_counter() - start, endpoint, request.method, str(resp.status_code))
+        return resp
+
+
+def setup_resource_metrics(container: Container) -> None:
+    # Usage of the shared resources, read when the metrics are rendered
+    executor = container.executor()
+    EXECUTOR_STATS.set_function(lambda: executor.stats()['threads'], 'threads')
+    EXECUTOR_STATS.set_function(lambda: executor.stats()['active'], 'active')
+    EXECUTOR_STATS.set_function(lambda: executor.stats()['queued'], 'queued')
+    EXECUTOR_STATS.set_function(lambda: executor.stats()['caller_runs'], 'caller_runs')
+
+    session = container.http_session()
+    HTTP_POOL_REQUESTS.set_function(lambda: session.stats()['requests'])
+    HTTP_POOL_CONNECTIONS.set_function(lambda: session.stats()['connections'])
+
+    if container.config.cache.incidents.backend() == 'memory':
+        incident_repo = cast(CachedIncidentRepository, container.incident_repo())
+        INCIDENT_CACHE_LISTENERS.set_function(lambda: incident_repo.stats()['listeners'])
+
+
+def create_app() -> FlaskMicroservice:
+    # The Google Cloud libraries take a good part of the startup time, they are only imported when enabled
+    if os.getenv('ENABLE_CLOUD_LOGGING') == '1':  # pragma: no cover
+        from gcp_microservice_utils import setup_cloud_logging
+
+        setup_cloud_logging()
+
+    app = FlaskMicroservice(__name__)
+    app.container = create_container()
+
+    if os.getenv('ENABLE_CLOUD_TRACE') == '1':  # pragma: no cover
+        from gcp_microservice_utils import setup_cloud_trace
+
+        setup_cloud_trace(app)
+
+    # The first hooks to start and the last to finish, so the profile covers the whole request
+    if os.getenv('ENABLE_PROFILING') == '1':
+        setup_profiling(app, directory=os.getenv('PROFILING_DIR', tempfile.gettempdir()))
+
+    setup_request_metrics(app)
+    setup_resource_metrics(app.container)
+
+    if os.getenv('ENABLE_SERVER_TIMING', '1') == '1':
+        setup_server_timing(app, log=os.getenv('LOG_REQUEST_TIMINGS') == '1')
 
     setup_apigateway(app)
 
     app.register_blueprint(BlueprintHealth)
     app.register_blueprint(BlueprintIncident)
 
+    # Opens the connections to Firestore and the upstream services before the first request needs them
+    if os.getenv('ENABLE_WARMUP') == '1':
+        warm_up(app.container, connections=int(os.getenv('WARMUP_CONNECTIONS', '2')))
+
     return app
@@ -0,0 +1,63 @@
+# Asyncio serving mode of the incident endpoints, on a single event loop instead of a thread per request:
+# gunicorn --worker-class aiohttp.GunicornWebWorker 'app_async:create_async_app()'
+import os
+import tempfile
+from collections.abc import Awaitable
+from typing import cast
+
+from aiohttp import web
+from aiohttp.typedefs import Middleware
+
+from app import create_container
+from containers import Container
+from handlers import (
+    RoutesHealth,
+    RoutesIncident,
+    apigateway_middleware,
+    metrics_middleware,
+    profiling_middleware,
+    server_timing_middleware,
+)
+from warmup import warm_up_async
+
+container_key = web.AppKey('container', Container)
+
+
+async def init_resources(app: web.Application) -> None:
+    await cast(Awaitable[None], app[container_key].init_resources())
+
+
+async def warm_up_resources(app: web.Application) -> None:
+    # Same as the warm-up of the Flask app, once the resources of the container are open
+    await warm_up_async(app[container_key], connections=int(os.getenv('WARMUP_CONNECTIONS', '2')))
+
+
+async def shutdown_resources(app: web.Application) -> None:
+    await cast(Awaitable[None], app[container_key].shutdown_resources())
+
+
+def create_async_app() -> web.Application:
+    if os.getenv('ENABLE_CLOUD_LOGGING') == '1':  # pragma: no cover
+        from gcp_microservice_utils import setup_cloud_logging
+
+        setup_cloud_logging()
+
+    middlewares: list[Middleware] = [metrics_middleware, apigateway_middleware]
+    if os.getenv('ENABLE_SERVER_TIMING', '1') == '1':
+        middlewares.insert(1, server_timing_middleware(log=os.getenv('LOG_REQUEST_TIMINGS') == '1'))
+    # The outermost middleware, so the profile covers the whole request
+    if os.getenv('ENABLE_PROFILING') == '1':
+        middlewares.insert(0, profiling_middleware(directory=os.getenv('PROFILING_DIR', tempfile.gettempdir())))
+
+    app = web.Application(middlewares=middlewares)
+    app[container_key] = create_container()
+
+    app.add_routes(RoutesHealth)
+    app.add_routes(RoutesIncident)
+
+    app.on_startup.append(init_resources)
+    if os.getenv('ENABLE_WARMUP') == '1':
+        app.on_startup.append(warm_up_resources)
+    app.on_cleanup.append(shutdown_resources)
+
+    return app
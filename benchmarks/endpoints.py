@@ -0,0 +1,384 @@
+# ruff: noqa: T201
+# Drives each incident endpoint through the Flask test client against in-process fake repositories, reporting the
+# throughput and latency percentiles as the number of incidents, the history length and the page size grow.
+# Usage: python -m benchmarks.endpoints [--latency MS] [--requests N] [--concurrency N] [--output FILE]
+import argparse
+import base64
+import json
+import platform
+import statistics
+import threading
+import time
+from collections.abc import Generator, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from typing import Any, cast
+
+from faker import Faker
+from flask.testing import FlaskClient
+
+from app import FlaskMicroservice, create_app
+from models import Client, Employee, HistoryEntry, HistorySummary, Incident, InvitationStatus, PartialIncident, Role, User
+from repositories import EmployeeRepository, IncidentCursor, IncidentFilter, IncidentRepository, IncidentSort, UserRepository
+from repositories.client import ClientRepository
+from tests.blueprints.util import gen_token
+from tests.util import create_random_history_entry, create_random_incident
+
+
+@dataclass
+class Dataset:
+    client: Client
+    user: User
+    employee: Employee
+    incidents: list[Incident]
+    # Longest history of each incident, shorter ones are prefixes of it
+    histories: dict[str, list[HistoryEntry]]
+
+
+@dataclass
+class Scenario:
+    endpoint: str
+    incidents: int
+    history: int
+    page_size: int | None = None
+
+
+@dataclass
+class Result:
+    endpoint: str
+    incidents: int
+    history: int
+    page_size: int | None
+    requests: int
+    concurrency: int
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def create_dataset(faker: Faker, n: int, history: int) -> Dataset:
+    client_id = cast(str, faker.uuid4())
+    user = User(id=cast(str, faker.uuid4()), client_id=client_id, name=faker.name(), email=faker.email())
+    employee = Employee(
+        id=cast(str, faker.uuid4()),
+        client_id=client_id,
+        name=faker.name(),
+        email=faker.email(),
+        role=Role.AGENT,
+        invitation_status=InvitationStatus.ACCEPTED,
+        invitation_date=faker.past_datetime(),
+    )
+
+    incidents = [
+        create_random_incident(faker, client_id=client_id, reported_by=user.id, created_by=user.id, assigned_to=employee.id)
+        for _ in range(n)
+    ]
+
+    return Dataset(
+        client=Client(id=client_id, name=faker.company(), email_incidents=faker.email()),
+        user=user,
+        employee=employee,
+        incidents=incidents,
+        histories={
+            x.id: [create_random_history_entry(faker, seq=i, client_id=client_id, incident_id=x.id) for i in range(history)]
+            for x in incidents
+        },
+    )
+
+
+# Fakes of the repositories, every call waits for the configured latency as a round trip to Firestore or an
+# upstream service would. Listings wait once, as if the whole page arrived in a single response.
+class FakeIncidentRepository(IncidentRepository):
+    def __init__(self, incidents: list[Incident], histories: dict[str, list[HistoryEntry]], latency: float) -> None:
+        self.incidents = sorted(incidents, key=lambda x: x.last_modified, reverse=True)
+        self.by_id = {x.id: x for x in incidents}
+        self.histories = histories
+        self.latency = latency
+
+    def wait(self) -> None:
+        time.sleep(self.latency)
+
+    def page(
+        self,
+        incidents: Iterable[Incident],
+        offset: int | None,
+        limit: int | None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> list[Incident]:
+        self.wait()
+
+        if filters is not None:
+            incidents = [
+                x
+                for x in incidents
+                if (filters.risk is None or x.risk == filters.risk)
+                and (filters.channel is None or x.channel == filters.channel)
+            ]
+        if sort == IncidentSort.NAME:
+            incidents = sorted(incidents, key=lambda x: (x.name, x.id))
+
+        start = offset or 0
+        return list(incidents)[start : None if limit is None else start + limit]
+
+    def partial(self, incident: Incident) -> PartialIncident:
+        return PartialIncident(
+            id=incident.id,
+            client_id=incident.client_id,
+            last_modified=incident.last_modified,
+            name=incident.name,
+            channel=incident.channel,
+            reported_by=incident.reported_by,
+            created_by=incident.created_by,
+            assigned_to=incident.assigned_to,
+            risk=incident.risk,
+        )
+
+    def get(self, client_id: str, incident_id: str) -> Incident | None:  # noqa: ARG002
+        self.wait()
+        return self.by_id.get(incident_id)
+
+    def select_all_by_reporter(  # noqa: PLR0913
+        self,
+        client_id: str,  # noqa: ARG002
+        reporter_id: str,
+        fields: Sequence[str],  # noqa: ARG002
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,  # noqa: ARG002
+    ) -> Generator[PartialIncident, None, None]:
+        page = self.page((x for x in self.incidents if x.reported_by == reporter_id), offset, limit)
+        yield from (self.partial(x) for x in page)
+
+    def select_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,  # noqa: ARG002
+        assignee_id: str,
+        fields: Sequence[str],  # noqa: ARG002
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,  # noqa: ARG002
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> Generator[PartialIncident, None, None]:
+        page = self.page((x for x in self.incidents if x.assigned_to == assignee_id), offset, limit, filters, sort)
+        yield from (self.partial(x) for x in page)
+
+    def count_by_assignee(self, client_id: str, assignee_id: str, filters: IncidentFilter | None = None) -> int:  # noqa: ARG002
+        return len(self.page((x for x in self.incidents if x.assigned_to == assignee_id), None, None, filters))
+
+    def get_history(self, client_id: str, incident_id: str) -> Generator[HistoryEntry, None, None]:  # noqa: ARG002
+        self.wait()
+        yield from self.histories.get(incident_id, [])
+
+    def get_histories(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, list[HistoryEntry]]:  # noqa: ARG002
+        self.wait()
+        return {x: self.histories.get(x, []) for x in incident_ids}
+
+    def summary(self, client_id: str, incident_id: str) -> HistorySummary | None:
+        history = self.histories.get(incident_id)
+        if not history:
+            return None
+
+        return HistorySummary(
+            incident_id=incident_id, client_id=client_id, filing_date=history[0].date, status=history[-1].action
+        )
+
+    def get_summary(self, client_id: str, incident_id: str) -> HistorySummary | None:
+        self.wait()
+        return self.summary(client_id, incident_id)
+
+    def get_summaries(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, HistorySummary]:
+        self.wait()
+        summaries = {x: self.summary(client_id, x) for x in incident_ids}
+        return {k: v for k, v in summaries.items() if v is not None}
+
+    def get_last_seqs(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, int]:  # noqa: ARG002
+        self.wait()
+        return {x: self.histories[x][-1].seq for x in incident_ids if self.histories.get(x)}
+
+    def get_all_by_client(
+        self,
+        client_id: str,  # noqa: ARG002
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,  # noqa: ARG002
+    ) -> Generator[Incident, None, None]:
+        yield from self.page(self.incidents, None, limit)
+
+
+class FakeUserRepository(UserRepository):
+    def __init__(self, user: User, latency: float) -> None:
+        self.user = user
+        self.latency = latency
+
+    def get(self, user_id: str, client_id: str) -> User | None:  # noqa: ARG002
+        time.sleep(self.latency)
+        return self.user if user_id == self.user.id else None
+
+    def get_many(self, user_ids: Iterable[str], client_id: str) -> dict[str, User]:  # noqa: ARG002
+        time.sleep(self.latency)
+        return {self.user.id: self.user} if self.user.id in user_ids else {}
+
+
+class FakeEmployeeRepository(EmployeeRepository):
+    def __init__(self, employee: Employee, latency: float) -> None:
+        self.employee = employee
+        self.latency = latency
+
+    def get(self, employee_id: str, client_id: str) -> Employee | None:  # noqa: ARG002
+        time.sleep(self.latency)
+        return self.employee if employee_id == self.employee.id else None
+
+    def get_many(self, employee_ids: Iterable[str], client_id: str) -> dict[str, Employee]:  # noqa: ARG002
+        time.sleep(self.latency)
+        return {self.employee.id: self.employee} if self.employee.id in employee_ids else {}
+
+
+class FakeClientRepository(ClientRepository):
+    def __init__(self, client: Client, latency: float) -> None:
+        self.client = client
+        self.latency = latency
+
+    def get(self, client_id: str) -> Client | None:
+        time.sleep(self.latency)
+        return self.client if client_id == self.client.id else None
+
+
+def token_headers(token: dict[str, Any]) -> dict[str, str]:
+    return {'X-Apigateway-Api-Userinfo': base64.urlsafe_b64encode(json.dumps(token).encode()).decode()}
+
+
+def request_for(scenario: Scenario, dataset: Dataset) -> tuple[str, dict[str, str]]:
+    # Path and headers of a request of the scenario
+    client_id = dataset.client.id
+    user_token = gen_token(user_id=dataset.user.id, client_id=client_id, role=Role.USER, assigned=True)
+    employee_token = gen_token(user_id=dataset.employee.id, client_id=client_id, role=Role.AGENT, assigned=True)
+
+    if scenario.endpoint == 'user_incidents':
+        return '/api/v1/users/me/incidents', token_headers(user_token)
+    if scenario.endpoint == 'employee_incidents':
+        return f'/api/v1/employees/me/incidents?page_size={scenario.page_size}', token_headers(employee_token)
+    if scenario.endpoint == 'incident_detail':
+        return f'/api/v1/incidents/{dataset.incidents[0].id}', token_headers(employee_token)
+    return f'/api/v1/clients/{client_id}/incidents', {}
+
+
+def run_scenario(  # noqa: PLR0913
+    app: FlaskMicroservice, scenario: Scenario, dataset: Dataset, latency: float, requests: int, concurrency: int
+) -> Result:
+    incidents = dataset.incidents[: scenario.incidents]
+    histories = {x.id: dataset.histories[x.id][: scenario.history] for x in incidents}
+    path, headers = request_for(scenario, dataset)
+
+    # Flask test clients keep state between requests, so each thread has its own
+    local = threading.local()
+
+    def call(_: int) -> float:
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+
+        client = cast(FlaskClient, local.client)
+        start = time.perf_counter()
+        resp = client.get(path, headers=headers)
+        resp.get_data()
+        elapsed = time.perf_counter() - start
+
+        if resp.status_code != 200:  # noqa: PLR2004
+            raise AssertionError(f'{scenario.endpoint}: unexpected status {resp.status_code}')
+        return elapsed
+
+    with (
+        app.container.incident_repo.override(FakeIncidentRepository(incidents, histories, latency)),
+        app.container.user_repo.override(FakeUserRepository(dataset.user, latency)),
+        app.container.employee_repo.override(FakeEmployeeRepository(dataset.employee, latency)),
+        app.container.client_repo.override(FakeClientRepository(dataset.client, latency)),
+        ThreadPoolExecutor(concurrency) as pool,
+    ):
+        # Warm up the executor, the connection-less test client and the compiled encoders
+        list(pool.map(call, range(min(requests, 10))))
+
+        start = time.perf_counter()
+        latencies = list(pool.map(call, range(requests)))
+        elapsed = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+
+    return Result(
+        endpoint=scenario.endpoint,
+        incidents=scenario.incidents,
+        history=scenario.history,
+        page_size=scenario.page_size,
+        requests=requests,
+        concurrency=concurrency,
+        throughput=requests / elapsed,
+        p50_ms=percentiles[49] * 1000,
+        p95_ms=percentiles[94] * 1000,
+        p99_ms=percentiles[98] * 1000,
+    )
+
+
+def create_scenarios(incident_counts: list[int], history_lengths: list[int], page_sizes: list[int]) -> list[Scenario]:
+    scenarios: list[Scenario] = []
+
+    for n in incident_counts:
+        for h in history_lengths:
+            scenarios.append(Scenario('user_incidents', n, h))
+            scenarios.append(Scenario('client_incidents', n, h))
+        # Only the last entry of each history is read for the summaries, so its length barely matters
+        scenarios.extend(Scenario('employee_incidents', n, max(history_lengths), page_size) for page_size in page_sizes)
+
+    # The detail reads a single incident
+    scenarios.extend(Scenario('incident_detail', 1, h) for h in history_lengths)
+
+    return scenarios
+
+
+def int_list(value: str) -> list[int]:
+    return [int(x) for x in value.split(',')]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the incident endpoints against in-process fakes.')
+    parser.add_argument('--incidents', type=int_list, default=[10, 100, 1000], help='incident counts, comma separated')
+    parser.add_argument('--history', type=int_list, default=[1, 10, 50], help='history lengths, comma separated')
+    parser.add_argument('--page-sizes', type=int_list, default=[5, 10, 20], help='employee list page sizes')
+    parser.add_argument('--latency', type=float, default=1.0, help='latency of each repository call, in ms')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='requests in flight at once')
+    parser.add_argument('--output', default='endpoints.json', help='file the results are written to, as JSON')
+    args = parser.parse_args()
+
+    app = create_app()
+    dataset = create_dataset(Faker(), max(args.incidents), max(args.history))
+    latency = cast(float, args.latency) / 1000
+
+    print(f'{"endpoint":<20} {"incidents":>9} {"history":>7} {"page":>4} {"req/s":>9} {"p50":>8} {"p95":>8} {"p99":>8}')
+
+    results: list[Result] = []
+    for scenario in create_scenarios(args.incidents, args.history, args.page_sizes):
+        result = run_scenario(app, scenario, dataset, latency, args.requests, args.concurrency)
+        results.append(result)
+        print(
+            f'{result.endpoint:<20} {result.incidents:>9} {result.history:>7} {result.page_size or "-":>4} '
+            f'{result.throughput:>9,.1f} {result.p50_ms:>6.2f}ms {result.p95_ms:>6.2f}ms {result.p99_ms:>6.2f}ms'
+        )
+
+    with open(args.output, 'w') as f:  # noqa: PTH123
+        json.dump(
+            {
+                'date': datetime.now(UTC).isoformat(),
+                'python': platform.python_version(),
+                'latency_ms': args.latency,
+                'results': [asdict(x) for x in results],
+            },
+            f,
+            indent=2,
+        )
+
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
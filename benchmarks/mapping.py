@@ -0,0 +1,48 @@
+# ruff: noqa: T201
+# Compares the precompiled Firestore mappers with the dacite conversion they replace.
+# Usage: python -m benchmarks.mapping [documents]
+import sys
+import timeit
+from collections.abc import Callable
+from dataclasses import asdict
+from enum import Enum
+from functools import partial
+from typing import Any
+
+import dacite
+from faker import Faker
+
+from models import HistoryEntry, Incident
+from repositories.firestore.mapping import compile_mapper
+from tests.util import create_random_history_entry, create_random_incident
+
+
+def to_document(obj: Incident | HistoryEntry) -> dict[str, Any]:
+    # Firestore returns enums as their plain values
+    return {k: v.value if isinstance(v, Enum) else v for k, v in asdict(obj).items()}
+
+
+def measure(name: str, fn: Callable[[dict[str, Any]], object], documents: list[dict[str, Any]]) -> float:
+    runs = timeit.repeat(lambda: [fn(x) for x in documents], number=1, repeat=5)
+    rate = len(documents) / min(runs)
+    print(f'{name:<24} {rate:>12,.0f} docs/s')
+    return rate
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    faker = Faker()
+    config = dacite.Config(cast=[Enum])
+
+    incidents = [to_document(create_random_incident(faker)) for _ in range(n)]
+    entries = [to_document(create_random_history_entry(faker, seq=i)) for i in range(n)]
+
+    for data_class, documents in [(Incident, incidents), (HistoryEntry, entries)]:
+        print(f'{data_class.__name__} ({n} documents)')
+        baseline = measure('  dacite', partial(dacite.from_dict, data_class, config=config), documents)
+        compiled = measure('  compiled', compile_mapper(data_class), documents)
+        print(f'  speedup: {compiled / baseline:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+# ruff: noqa: T201
+# Compares the compiled response encoders with building dicts and encoding them with json.dumps.
+# Usage: python -m benchmarks.serialization [incidents]
+import json
+import sys
+import timeit
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, cast
+
+from faker import Faker
+
+from blueprints.serializers import (
+    encode_client_incident,
+    encode_employee_incident,
+    encode_employee_incidents_page,
+    encode_incident_detail,
+    encode_list,
+    encode_user_incident,
+)
+from models import Employee, HistoryEntry, HistorySummary, Incident, InvitationStatus, Role, User
+from tests.util import create_random_history_entry, create_random_history_summary, create_random_incident
+
+
+@dataclass
+class Dataset:
+    user: User
+    employee: Employee
+    incidents: list[Incident]
+    histories: dict[str, list[HistoryEntry]]
+    summaries: dict[str, HistorySummary]
+
+
+def create_dataset(faker: Faker, n: int) -> Dataset:
+    incidents = [create_random_incident(faker) for _ in range(n)]
+
+    return Dataset(
+        user=User(id=cast(str, faker.uuid4()), client_id='', name=faker.name(), email=faker.email()),
+        employee=Employee(
+            id=cast(str, faker.uuid4()),
+            client_id='',
+            name=faker.name(),
+            email=faker.email(),
+            role=Role.AGENT,
+            invitation_status=InvitationStatus.ACCEPTED,
+            invitation_date=faker.past_datetime(),
+        ),
+        incidents=incidents,
+        histories={x.id: [create_random_history_entry(faker, seq=i, incident_id=x.id) for i in range(5)] for x in incidents},
+        summaries={x.id: create_random_history_summary(faker, incident_id=x.id) for x in incidents},
+    )
+
+
+def history_to_dict(entry: HistoryEntry) -> dict[str, Any]:
+    return {
+        'seq': entry.seq,
+        'date': entry.date.isoformat().replace('+00:00', 'Z'),
+        'action': entry.action,
+        'description': entry.description,
+    }
+
+
+def person_to_dict(person: User | Employee, role: str | None = None) -> dict[str, Any]:
+    data = {'id': person.id, 'name': person.name, 'email': person.email}
+    if role is not None:
+        data['role'] = role
+    return data
+
+
+def user_list_dicts(d: Dataset) -> bytes:
+    return json.dumps(
+        [
+            {'id': x.id, 'name': x.name, 'channel': x.channel, 'history': [history_to_dict(e) for e in d.histories[x.id]]}
+            for x in d.incidents
+        ]
+    ).encode()
+
+
+def user_list_compiled(d: Dataset) -> bytes:
+    return encode_list(encode_user_incident(x, d.histories[x.id]) for x in d.incidents).encode()
+
+
+def employee_list_dicts(d: Dataset) -> bytes:
+    page = [
+        {
+            'id': x.id,
+            'name': x.name,
+            'reportedBy': person_to_dict(d.user),
+            'filingDate': d.summaries[x.id].filing_date.isoformat().replace('+00:00', 'Z'),
+            'status': d.summaries[x.id].status,
+            'risk': x.risk,
+        }
+        for x in d.incidents
+    ]
+    return json.dumps(
+        {'incidents': page, 'totalPages': 1, 'currentPage': 1, 'totalIncidents': len(page), 'nextCursor': None}
+    ).encode()
+
+
+def employee_list_compiled(d: Dataset) -> bytes:
+    page = [encode_employee_incident(x, d.user, d.summaries[x.id]) for x in d.incidents]
+    return encode_employee_incidents_page(page, 1, 1, len(page), None).encode()
+
+
+def detail_dicts(d: Dataset) -> bytes:
+    return b'\n'.join(
+        json.dumps(
+            {
+                'id': x.id,
+                'name': x.name,
+                'channel': x.channel,
+                'reportedBy': person_to_dict(d.user, 'user'),
+                'createdBy': person_to_dict(d.user, 'user'),
+                'assignedTo': person_to_dict(d.employee, d.employee.role),
+                'history': [history_to_dict(e) for e in d.histories[x.id]],
+                'risk': x.risk,
+            }
+        ).encode()
+        for x in d.incidents
+    )
+
+
+def detail_compiled(d: Dataset) -> bytes:
+    return b'\n'.join(
+        encode_incident_detail(x, d.histories[x.id], d.user, d.user, 'user', d.employee).encode() for x in d.incidents
+    )
+
+
+def client_list_dicts(d: Dataset) -> bytes:
+    return json.dumps(
+        [
+            {
+                'id': x.id,
+                'name': x.name,
+                'channel': x.channel,
+                'reported_by': x.reported_by,
+                'created_by': x.created_by,
+                'assigned_to': x.assigned_to,
+                'history': [history_to_dict(e) for e in d.histories[x.id]],
+                'risk': x.risk,
+            }
+            for x in d.incidents
+        ]
+    ).encode()
+
+
+def client_list_compiled(d: Dataset) -> bytes:
+    return encode_list(encode_client_incident(x, d.histories[x.id]) for x in d.incidents).encode()
+
+
+SHAPES: list[tuple[str, Callable[[Dataset], bytes], Callable[[Dataset], bytes]]] = [
+    ('user list', user_list_dicts, user_list_compiled),
+    ('employee list', employee_list_dicts, employee_list_compiled),
+    ('detail', detail_dicts, detail_compiled),
+    ('client list', client_list_dicts, client_list_compiled),
+]
+
+
+def measure(name: str, fn: Callable[[Dataset], bytes], dataset: Dataset) -> float:
+    rate = len(dataset.incidents) / min(timeit.repeat(lambda: fn(dataset), number=1, repeat=5))
+    print(f'  {name:<12} {rate:>12,.0f} incidents/s')
+    return rate
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    dataset = create_dataset(Faker(), n)
+
+    for name, baseline_fn, compiled_fn in SHAPES:
+        if baseline_fn(dataset) != compiled_fn(dataset):
+            raise AssertionError(f'{name}: compiled encoder output differs from json.dumps')
+
+        print(f'{name} ({n} incidents)')
+        baseline = measure('dicts', baseline_fn, dataset)
+        compiled = measure('compiled', compiled_fn, dataset)
+        print(f'  speedup: {compiled / baseline:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+# ruff: noqa: T201
+# Measures the cold start of the service: each run starts a new interpreter that imports the app, creates it and sends
+# requests through the Flask test client until the first one succeeds, with and without the warm-up. The services it
+# talks to are the ones configured in the environment (FIRESTORE_EMULATOR_HOST, USER_SVC_URL, ...).
+# Usage: python -m benchmarks.startup [--runs N] [--path PATH] [--header NAME:VALUE] [--output FILE]
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from typing import Any, cast
+
+
+@dataclass
+class Run:
+    import_ms: float
+    create_app_ms: float
+    first_request_ms: float
+    second_request_ms: float
+    # From starting the interpreter to the first successful response, as seen by the parent process
+    first_success_ms: float
+    attempts: int
+
+
+@dataclass
+class Result:
+    warmup: bool
+    runs: int
+    import_ms: float
+    create_app_ms: float
+    first_request_ms: float
+    second_request_ms: float
+    first_success_p50_ms: float
+    first_success_max_ms: float
+
+
+def child(path: str, headers: dict[str, str], timeout: float) -> None:
+    # Runs in the new interpreter, the timings are printed as a JSON line once the first request succeeds
+    start = time.perf_counter()
+    app_module = importlib.import_module('app')
+    imported = time.perf_counter()
+
+    client = app_module.create_app().test_client()
+    created = time.perf_counter()
+
+    attempts = 0
+    while True:
+        attempts += 1
+        resp = client.get(path, headers=headers)
+        if resp.status_code < 400 or time.perf_counter() - created > timeout:  # noqa: PLR2004
+            break
+    first_request = time.perf_counter()
+
+    client.get(path, headers=headers)
+    second_request = time.perf_counter()
+
+    print(
+        json.dumps(
+            {
+                'import_ms': (imported - start) * 1000,
+                'create_app_ms': (created - imported) * 1000,
+                'first_request_ms': (first_request - created) * 1000,
+                'second_request_ms': (second_request - first_request) * 1000,
+                'attempts': attempts,
+                'status': resp.status_code,
+            }
+        ),
+        flush=True,
+    )
+
+
+def run_once(args: argparse.Namespace, *, warmup: bool) -> Run:
+    env = {**os.environ, 'ENABLE_WARMUP': '1' if warmup else '0'}
+    command = [sys.executable, '-m', 'benchmarks.startup', '--child', '--path', args.path, '--timeout', str(args.timeout)]
+    for header in args.header:
+        command += ['--header', header]
+
+    start = time.perf_counter()
+    with subprocess.Popen(command, env=env, stdout=subprocess.PIPE, text=True) as proc:  # noqa: S603
+        line = cast(Any, proc.stdout).readline()
+        first_success = time.perf_counter()
+        proc.wait()
+
+    report = json.loads(line)
+    if report['status'] >= 400:  # noqa: PLR2004
+        raise RuntimeError(f'{args.path} still returned {report["status"]} after {args.timeout}s')
+
+    return Run(
+        import_ms=report['import_ms'],
+        create_app_ms=report['create_app_ms'],
+        first_request_ms=report['first_request_ms'],
+        second_request_ms=report['second_request_ms'],
+        first_success_ms=(first_success - start) * 1000,
+        attempts=report['attempts'],
+    )
+
+
+def summarize(runs: list[Run], *, warmup: bool) -> Result:
+    return Result(
+        warmup=warmup,
+        runs=len(runs),
+        import_ms=statistics.median(x.import_ms for x in runs),
+        create_app_ms=statistics.median(x.create_app_ms for x in runs),
+        first_request_ms=statistics.median(x.first_request_ms for x in runs),
+        second_request_ms=statistics.median(x.second_request_ms for x in runs),
+        first_success_p50_ms=statistics.median(x.first_success_ms for x in runs),
+        first_success_max_ms=max(x.first_success_ms for x in runs),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the time to the first successful request of a new instance.')
+    parser.add_argument('--runs', type=int, default=5, help='interpreters started for each configuration')
+    parser.add_argument('--path', default='/api/v1/health/incidentquery', help='path of the requests')
+    parser.add_argument('--header', action='append', default=[], help='header of the requests, as NAME:VALUE')
+    parser.add_argument('--timeout', type=float, default=30.0, help='seconds to retry the first request for')
+    parser.add_argument('--output', default='startup.json', help='file the results are written to, as JSON')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        headers = dict(cast(tuple[str, str], tuple(x.strip() for x in h.split(':', 1))) for h in args.header)
+        child(args.path, headers, args.timeout)
+        return
+
+    print(f'{"warm-up":<8} {"import":>9} {"create":>9} {"1st req":>9} {"2nd req":>9} {"to 1st ok":>10} {"max":>9}')
+
+    results: list[Result] = []
+    for warmup in (False, True):
+        result = summarize([run_once(args, warmup=warmup) for _ in range(args.runs)], warmup=warmup)
+        results.append(result)
+        print(
+            f'{"on" if warmup else "off":<8} {result.import_ms:>7.1f}ms {result.create_app_ms:>7.1f}ms '
+            f'{result.first_request_ms:>7.1f}ms {result.second_request_ms:>7.1f}ms '
+            f'{result.first_success_p50_ms:>8.1f}ms {result.first_success_max_ms:>7.1f}ms'
+        )
+
+    with open(args.output, 'w') as f:  # noqa: PTH123
+        json.dump(
+            {
+                'date': datetime.now(UTC).isoformat(),
+                'python': platform.python_version(),
+                'path': args.path,
+                'results': [asdict(x) for x in results],
+            },
+            f,
+            indent=2,
+        )
+
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
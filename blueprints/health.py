@@ -1,10 +1,15 @@
 from flask import Blueprint, Response
 from flask.views import MethodView
 
+from metrics import REGISTRY
+
 from .util import class_route, json_response
 
 blp = Blueprint('Health Check', __name__)
 
+# Prometheus text exposition format
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
 
 @class_route(blp, '/api/v1/health/incidentquery')
 class HealthCheck(MethodView):
@@ -12,3 +17,11 @@ class HealthCheck(MethodView):
 
     def get(self) -> Response:
         return json_response({'status': 'Ok'}, 200)
+
+
+@class_route(blp, '/api/v1/metrics/incidentquery')
+class Metrics(MethodView):
+    init_every_request = False
+
+    def get(self) -> Response:
+        return Response(REGISTRY.render(), status=200, content_type=METRICS_CONTENT_TYPE)
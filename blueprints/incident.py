@@ -1,99 +1,113 @@
-from collections.abc import Callable
-from concurrent.futures import Future, ThreadPoolExecutor
-from typing import Any, cast
+from collections.abc import Generator, Iterable
+from concurrent.futures import Future
+from itertools import islice
+from typing import Any
 
 from dependency_injector.wiring import Provide
 from flask import Blueprint, Response, request
 from flask.views import MethodView
 
+from concurrency import FanOutExecutor
 from containers import Container
-from models import Action, HistoryEntry, Incident, User
-from repositories import EmployeeRepository, IncidentRepository, UserRepository
+from models import Employee, HistoryEntry, HistorySummary, Incident, PartialIncident, User
+from repositories import EmployeeRepository, IncidentRepository, IncidentSort, UserRepository
 from repositories.client import ClientRepository
-
-from .util import class_route, error_response, is_valid_uuid4, json_response, requires_token
+from timing import timer
+
+from .serializers import (
+    EMPLOYEE_INCIDENT_FIELDS,
+    USER_INCIDENT_FIELDS,
+    encode_client_incident,
+    encode_employee_incident,
+    encode_employee_incidents_page,
+    encode_incident_detail,
+    encode_list,
+    encode_user_incident,
+)
+from .util import (
+    class_route,
+    decode_cursor,
+    encode_cursor,
+    encoded_response,
+    error_response,
+    growing_batches,
+    incident_list_args,
+    incidents_etag,
+    is_not_modified,
+    is_valid_uuid4,
+    json_stream_response,
+    last_seq,
+    not_modified_response,
+    requires_token,
+)
 
 blp = Blueprint('Incidents', __name__)
 
 
-def history_to_dict(entry: HistoryEntry) -> dict[str, Any]:
-    return {
-        'seq': entry.seq,
-        'date': entry.date.isoformat().replace('+00:00', 'Z'),
-        'action': entry.action,
-        'description': entry.description,
-    }
-
-
 @class_route(blp, '/api/v1/users/me/incidents')
 class UserIncidents(MethodView):
     init_every_request = False
 
-    def incident_to_dict(self, incident: Incident) -> dict[str, Any]:
-        return {
-            'id': incident.id,
-            'name': incident.name,
-            'channel': incident.channel,
-        }
-
     @requires_token
     def get(
         self,
         token: dict[str, Any],
         incident_repo: IncidentRepository = Provide[Container.incident_repo],
     ) -> Response:
-        incidents = incident_repo.get_all_by_reporter(
-            client_id=token['cid'],
-            reporter_id=token['sub'],
+        if request.if_none_match:
+            # Clients polling the list usually have the current version already, which can be checked by reading
+            # only the modification dates and the last history entry of each incident
+            versions = list(incident_repo.select_all_by_reporter(client_id=token['cid'], reporter_id=token['sub'], fields=()))
+            last_seqs = incident_repo.get_last_seqs(client_id=token['cid'], incident_ids=[x.id for x in versions])
+
+            etag = incidents_etag((x.id, x.last_modified, last_seqs.get(x.id)) for x in versions)
+            if is_not_modified(etag):
+                return not_modified_response(etag)
+
+        incidents = list(
+            incident_repo.select_all_by_reporter(
+                client_id=token['cid'],
+                reporter_id=token['sub'],
+                fields=USER_INCIDENT_FIELDS,
+            )
         )
 
-        resp: list[dict[str, Any]] = []
-        for incident in incidents:
-            incident_dict = self.incident_to_dict(incident)
-            history = incident_repo.get_history(client_id=incident.client_id, incident_id=incident.id)
-            incident_dict['history'] = [history_to_dict(x) for x in history]
-            resp.append(incident_dict)
+        histories = incident_repo.get_histories(client_id=token['cid'], incident_ids=[x.id for x in incidents])
+
+        # The whole response is timed at once, timing each incident would cost about as much as encoding it
+        with timer('serialize'):
+            body = encode_list(encode_user_incident(x, histories[x.id]) for x in incidents)
 
-        return json_response(resp, 200)
+        resp = encoded_response(body, 200)
+        resp.set_etag(incidents_etag((x.id, x.last_modified, last_seq(histories[x.id])) for x in incidents))
+        return resp
 
 
 @class_route(blp, '/api/v1/employees/me/incidents')
 class EmployeeIncidents(MethodView):
     init_every_request = False
 
-    def incident_to_dict(
-        self,
-        incident: Incident,
-        history: list[HistoryEntry],
-        user_repo: UserRepository = Provide[Container.user_repo],
-    ) -> dict[str, Any]:
-        user_reported_by = user_repo.get(incident.reported_by, incident.client_id)
-
+    def encode_incident(self, incident: PartialIncident, summary: HistorySummary | None, user_reported_by: User | None) -> str:
         if user_reported_by is None:
             raise ValueError(f'User {incident.reported_by} not found')
 
-        return {
-            'id': incident.id,
-            'name': incident.name,
-            'reportedBy': {
-                'id': user_reported_by.id,
-                'name': user_reported_by.name,
-                'email': user_reported_by.email,
-            },
-            'filingDate': history[0].date.isoformat().replace('+00:00', 'Z'),
-            'status': history[-1].action if history[-1].action != Action.AI_RESPONSE else history[-2].action,
-            'risk': incident.risk,
-        }
+        if summary is None:
+            raise ValueError(f'Incident {incident.id} has no history')
+
+        return encode_employee_incident(incident, user_reported_by, summary)
 
     @requires_token
     def get(
         self,
         token: dict[str, Any],
         incident_repo: IncidentRepository = Provide[Container.incident_repo],
+        user_repo: UserRepository = Provide[Container.user_repo],
+        executor: FanOutExecutor = Provide[Container.executor],
     ) -> Response:
         # Optional pagination parameters
         page_size = request.args.get('page_size', default=5, type=int)
         page_number = request.args.get('page_number', default=1, type=int)
+        cursor = request.args.get('cursor', default=None, type=str)
 
         # Validate the value of page_size
         allowed_page_sizes = [5, 10, 20]
@@ -104,146 +118,226 @@ class EmployeeIncidents(MethodView):
         if page_number < 1:
             return error_response('Invalid page_number. Page number must be 1 or greater.', 400)
 
-        total_incidents = incident_repo.count_by_assignee(
-            client_id=token['cid'],
-            assignee_id=token['sub'],
-        )
-        total_pages = (total_incidents + page_size - 1) // page_size
-
-        incidents = incident_repo.get_all_by_assignee(
-            client_id=token['cid'],
-            assignee_id=token['sub'],
-            offset=(page_number - 1) * page_size,
-            limit=page_size,
-        )
-
-        with ThreadPoolExecutor() as executor:
-            incidents_futures: list[Future[dict[str, Any]]] = [
-                executor.submit(
-                    cast(
-                        Callable[[Incident], dict[str, Any]],
-                        lambda incident: self.incident_to_dict(
-                            incident, list(incident_repo.get_history(client_id=token['cid'], incident_id=incident.id))
-                        ),
-                    ),
-                    incident,
+        # A cursor takes precedence over page_number, it avoids reading every skipped incident again
+        start_after = None
+        if cursor is not None:
+            start_after = decode_cursor(cursor)
+            if start_after is None:
+                return error_response('Invalid cursor.', 400)
+
+        # Optional filters and sort, applied by the database so that pages only hold the incidents asked for
+        try:
+            filters, sort = incident_list_args(request.args)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        if start_after is not None and sort != IncidentSort.LAST_MODIFIED:
+            return error_response('Cursors can only be used when sorting by last_modified.', 400)
+
+        incidents: list[PartialIncident] = []
+        summary_futures: list[Future[dict[str, HistorySummary]]] = []
+        user_futures: list[Future[dict[str, User]]] = []
+        looked_up: set[str] = set()
+
+        with executor.group() as group:
+            # The total is only needed for the response, so it is counted while the page is read
+            total_future = group.submit(
+                incident_repo.count_by_assignee, client_id=token['cid'], assignee_id=token['sub'], filters=filters
+            )
+
+            page = incident_repo.select_all_by_assignee(
+                client_id=token['cid'],
+                assignee_id=token['sub'],
+                fields=EMPLOYEE_INCIDENT_FIELDS,
+                offset=(page_number - 1) * page_size if start_after is None else None,
+                limit=page_size,
+                start_after=start_after,
+                filters=filters,
+                sort=sort,
+            )
+
+            # The lookups start as soon as the first incident arrives instead of after the whole page, in batches that
+            # grow as the page streams in so that it only takes a few bulk calls to each repository
+            for batch in growing_batches(page):
+                incidents += batch
+                summary_futures.append(
+                    group.submit(incident_repo.get_summaries, client_id=token['cid'], incident_ids=[x.id for x in batch])
                 )
-                for incident in incidents
-            ]
+                reporters = [x for x in dict.fromkeys(y.reported_by for y in batch) if x not in looked_up]
+                if reporters:
+                    looked_up.update(reporters)
+                    user_futures.append(group.submit(user_repo.get_many, reporters, token['cid']))
+
+        total_incidents = total_future.result()
+        total_pages = (total_incidents + page_size - 1) // page_size
 
-        incidents_dict = [x.result() for x in incidents_futures]
+        summaries = {k: v for x in summary_futures for k, v in x.result().items()}
+        users = {k: v for x in user_futures for k, v in x.result().items()}
 
-        data = {
-            'incidents': incidents_dict,
-            'totalPages': total_pages,
-            'currentPage': page_number,
-            'totalIncidents': total_incidents,
-        }
+        with timer('serialize'):
+            body = encode_employee_incidents_page(
+                [
+                    self.encode_incident(incident, summaries.get(incident.id), users.get(incident.reported_by))
+                    for incident in incidents
+                ],
+                total_pages,
+                page_number,
+                total_incidents,
+                encode_cursor(incidents[-1]) if len(incidents) == page_size and sort == IncidentSort.LAST_MODIFIED else None,
+            )
 
-        return json_response(data, 200)
+        return encoded_response(body, 200)
 
 
 @class_route(blp, '/api/v1/incidents/<incident_id>')
 class IncidentDetail(MethodView):
     init_every_request = False
 
-    def incident_to_dict(
+    def encode_incident(
         self,
         incident: Incident,
         history: list[HistoryEntry],
-        user_repo: UserRepository = Provide[Container.user_repo],
-        employee_repo: EmployeeRepository = Provide[Container.employee_repo],
-    ) -> dict[str, Any]:
-        user_reported_by = user_repo.get(incident.reported_by, incident.client_id)
+        users: dict[str, User],
+        employees: dict[str, Employee],
+    ) -> str:
+        user_reported_by = users.get(incident.reported_by)
 
         if user_reported_by is None:
             raise ValueError(f'User {incident.reported_by} not found')
 
-        user_created_by = user_repo.get(incident.created_by, incident.client_id) or employee_repo.get(
-            incident.created_by, incident.client_id
-        )
+        user_created_by = users.get(incident.created_by) or employees.get(incident.created_by)
 
         if user_created_by is None:
             raise ValueError(f'User/Employee {incident.created_by} not found')
 
-        employee_assigned_to = employee_repo.get(incident.assigned_to, incident.client_id)
+        employee_assigned_to = employees.get(incident.assigned_to)
 
         if employee_assigned_to is None:
             raise ValueError(f'Employee {incident.assigned_to} not found')
 
-        return {
-            'id': incident.id,
-            'name': incident.name,
-            'channel': incident.channel,
-            'reportedBy': {
-                'id': user_reported_by.id,
-                'name': user_reported_by.name,
-                'email': user_reported_by.email,
-                'role': 'user',
-            },
-            'createdBy': {
-                'id': user_created_by.id,
-                'name': user_created_by.name,
-                'email': user_created_by.email,
-                'role': 'user' if isinstance(user_created_by, User) else user_created_by.role,
-            },
-            'assignedTo': {
-                'id': employee_assigned_to.id,
-                'name': employee_assigned_to.name,
-                'email': employee_assigned_to.email,
-                'role': employee_assigned_to.role,
-            },
-            'history': [history_to_dict(x) for x in history],
-            'risk': incident.risk,
-        }
+        return encode_incident_detail(
+            incident,
+            history,
+            user_reported_by,
+            user_created_by,
+            'user' if isinstance(user_created_by, User) else user_created_by.role,
+            employee_assigned_to,
+        )
 
     @requires_token
-    def get(
+    def get(  # noqa: PLR0913
         self,
         incident_id: str,
         token: dict[str, Any],
         incident_repo: IncidentRepository = Provide[Container.incident_repo],
+        user_repo: UserRepository = Provide[Container.user_repo],
+        employee_repo: EmployeeRepository = Provide[Container.employee_repo],
+        executor: FanOutExecutor = Provide[Container.executor],
     ) -> Response:
         if not is_valid_uuid4(incident_id):
             return error_response('Invalid incident ID.', 400)
 
-        incident = incident_repo.get(client_id=token['cid'], incident_id=incident_id)
-        if incident is None:
-            return error_response('Incident not found.', 404)
+        incident = None
+        if request.if_none_match:
+            # The version is checked before reading the history or calling the user and employee services
+            with executor.group() as group:
+                last_seq_future = group.submit(incident_repo.get_last_seq, client_id=token['cid'], incident_id=incident_id)
+                incident = incident_repo.get(client_id=token['cid'], incident_id=incident_id)
+
+            if incident is None:
+                return error_response('Incident not found.', 404)
+
+            etag = incidents_etag([(incident.id, incident.last_modified, last_seq_future.result())])
+            if is_not_modified(etag):
+                return not_modified_response(etag)
+
+        with executor.group() as group:
+            # The history only depends on the incident id, so it is read along with the incident itself
+            history_future = group.submit(
+                lambda: list(incident_repo.get_history(client_id=token['cid'], incident_id=incident_id))
+            )
+
+            if incident is None:
+                incident = incident_repo.get(client_id=token['cid'], incident_id=incident_id)
+            if incident is None:
+                # The history is not needed anymore, its read is dropped if no thread has started it yet
+                group.cancel()
+                return error_response('Incident not found.', 404)
+
+            # The creator can be a user or an employee, so both are looked up at once instead of one after the other
+            users_future = group.submit(user_repo.get_many, [incident.reported_by, incident.created_by], incident.client_id)
+            employees_future = group.submit(
+                employee_repo.get_many, [incident.assigned_to, incident.created_by], incident.client_id
+            )
+
+        users = users_future.result()
+        employees = employees_future.result()
 
-        history = incident_repo.get_history(client_id=token['cid'], incident_id=incident_id)
+        history = history_future.result()
 
-        return json_response(self.incident_to_dict(incident, list(history)), 200)
+        with timer('serialize'):
+            body = self.encode_incident(incident, history, users, employees)
+
+        resp = encoded_response(body, 200)
+        resp.set_etag(incidents_etag([(incident.id, incident.last_modified, last_seq(history))]))
+        return resp
 
 
 @class_route(blp, '/api/v1/clients/<client_id>/incidents')
 class IncidentsByClient(MethodView):
     init_every_request = False
 
+    # Number of incidents whose histories are loaded together while streaming
+    CHUNK_SIZE = 100
+
+    def encode_incidents(
+        self, client_id: str, incidents: Iterable[Incident], incident_repo: IncidentRepository
+    ) -> Generator[str, None, None]:
+        incidents_iter = iter(incidents)
+        while chunk := list(islice(incidents_iter, self.CHUNK_SIZE)):
+            histories = incident_repo.get_histories(client_id=client_id, incident_ids=[x.id for x in chunk])
+            # Timed once per chunk, while streaming only the encoding is timed and not the reads in between
+            with timer('serialize'):
+                encoded = [encode_client_incident(incident, histories[incident.id]) for incident in chunk]
+            yield from encoded
+
     def get(
         self,
         client_id: str,
         incident_repo: IncidentRepository = Provide[Container.incident_repo],
         client_repo: ClientRepository = Provide[Container.client_repo],
     ) -> Response:
+        # Optional pagination and streaming parameters
+        limit = request.args.get('limit', default=None, type=int)
+        cursor = request.args.get('cursor', default=None, type=str)
+        stream = request.args.get('stream', default=False, type=lambda x: x.lower() in {'1', 'true'})
+        ndjson = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+        if limit is not None and limit < 1:
+            return error_response('Invalid limit. Limit must be 1 or greater.', 400)
+
+        start_after = None
+        if cursor is not None:
+            start_after = decode_cursor(cursor)
+            if start_after is None:
+                return error_response('Invalid cursor.', 400)
+
         client = client_repo.get(client_id)
         if client is None:
             return error_response('Client not found.', 404)
 
-        incidents = incident_repo.get_all_by_client(client_id)
-        resp = []
-        for incident in incidents:
-            history = incident_repo.get_history(client_id=client_id, incident_id=incident.id)
-            incident_dict = {
-                'id': incident.id,
-                'name': incident.name,
-                'channel': incident.channel,
-                'reported_by': incident.reported_by,
-                'created_by': incident.created_by,
-                'assigned_to': incident.assigned_to,
-                'history': [history_to_dict(entry) for entry in history],
-                'risk': incident.risk,
-            }
-            resp.append(incident_dict)
-
-        return json_response(resp, 200)
+        incidents: Iterable[Incident] = incident_repo.get_all_by_client(client_id, limit=limit, start_after=start_after)
+
+        headers = {}
+        if limit is not None:
+            # A page is bounded by the limit, so it can be read upfront to tell the client where the next one starts
+            incidents = list(incidents)
+            if len(incidents) == limit:
+                headers['X-Next-Cursor'] = encode_cursor(incidents[-1])
+
+        encoded_incidents = self.encode_incidents(client_id, incidents, incident_repo)
+
+        if stream or ndjson:
+            return json_stream_response(encoded_incidents, 200, ndjson=ndjson, headers=headers)
+
+        return encoded_response(encode_list(encoded_incidents), 200, headers=headers)
@@ -0,0 +1,181 @@
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from enum import StrEnum
+from json.encoder import encode_basestring_ascii
+from typing import Any, cast
+
+from models import Employee, HistoryEntry, HistorySummary, Incident, PartialIncident, User
+
+
+class Kind(StrEnum):
+    STRING = 'string'
+    NULLABLE_STRING = 'nullable_string'
+    INTEGER = 'integer'
+    DATETIME = 'datetime'
+
+
+@dataclass(frozen=True)
+class ListOf:
+    encoder: Callable[[Any], str]
+
+
+# Maps each JSON key to the expression that produces its value and how to encode it, or to a nested schema
+Schema = dict[str, 'tuple[str, Kind | ListOf] | Schema']
+
+
+def format_datetime(value: datetime) -> str:
+    formatted = value.isoformat()
+    if formatted.endswith('+00:00'):
+        formatted = formatted[:-6] + 'Z'
+    return f'"{formatted}"'
+
+
+def _encode_nullable_string(value: str | None) -> str:
+    return 'null' if value is None else encode_basestring_ascii(value)
+
+
+def _value_source(expression: str, kind: Kind | ListOf, namespace: dict[str, Any]) -> str:
+    if isinstance(kind, ListOf):
+        name = f'encode_list_{len(namespace)}'
+        namespace[name] = kind.encoder
+        return f"'[' + ', '.join(map({name}, {expression})) + ']'"
+
+    return {
+        Kind.STRING: f'encode_string({expression})',
+        Kind.NULLABLE_STRING: f'encode_nullable_string({expression})',
+        Kind.INTEGER: f'str({expression})',
+        Kind.DATETIME: f'format_datetime({expression})',
+    }[kind]
+
+
+def _object_source(schema: Schema, namespace: dict[str, Any]) -> list[str]:
+    parts: list[str] = []
+
+    for i, (key, value) in enumerate(schema.items()):
+        parts.append(repr(('{' if i == 0 else ', ') + encode_basestring_ascii(key) + ': '))
+
+        if isinstance(value, dict):
+            parts.extend(_object_source(value, namespace))
+        else:
+            parts.append(_value_source(*value, namespace))
+
+    parts.append(repr('}'))
+    return parts
+
+
+# Generates, once per output shape, a function that writes the JSON of an object straight from the arguments,
+# without building intermediate dicts. The output is the same as json.dumps with its default settings.
+def compile_encoder(arguments: list[str], schema: Schema) -> Callable[..., str]:
+    namespace: dict[str, Any] = {
+        'encode_string': encode_basestring_ascii,
+        'encode_nullable_string': _encode_nullable_string,
+        'format_datetime': format_datetime,
+    }
+
+    parts = _object_source(schema, namespace)
+    source = f'def encode({", ".join(arguments)}):\n    return "".join(({", ".join(parts)},))\n'
+
+    exec(source, namespace)  # noqa: S102
+    return cast(Callable[..., str], namespace['encode'])
+
+
+def encode_list(items: Iterable[str]) -> str:
+    return '[' + ', '.join(items) + ']'
+
+
+encode_history_entry = compile_encoder(
+    ['entry'],
+    {
+        'seq': ('entry.seq', Kind.INTEGER),
+        'date': ('entry.date', Kind.DATETIME),
+        'action': ('entry.action', Kind.STRING),
+        'description': ('entry.description', Kind.STRING),
+    },
+)
+
+# Incident fields written by encode_user_incident, so listings only need to read those
+USER_INCIDENT_FIELDS = ('name', 'channel')
+
+encode_user_incident: Callable[[Incident | PartialIncident, list[HistoryEntry]], str] = compile_encoder(
+    ['incident', 'history'],
+    {
+        'id': ('incident.id', Kind.STRING),
+        'name': ('incident.name', Kind.STRING),
+        'channel': ('incident.channel', Kind.STRING),
+        'history': ('history', ListOf(encode_history_entry)),
+    },
+)
+
+# Incident fields written by encode_employee_incident, along with the reporter that is looked up
+EMPLOYEE_INCIDENT_FIELDS = ('name', 'reported_by', 'risk')
+
+encode_employee_incident: Callable[[Incident | PartialIncident, User, HistorySummary], str] = compile_encoder(
+    ['incident', 'reported_by', 'summary'],
+    {
+        'id': ('incident.id', Kind.STRING),
+        'name': ('incident.name', Kind.STRING),
+        'reportedBy': {
+            'id': ('reported_by.id', Kind.STRING),
+            'name': ('reported_by.name', Kind.STRING),
+            'email': ('reported_by.email', Kind.STRING),
+        },
+        'filingDate': ('summary.filing_date', Kind.DATETIME),
+        'status': ('summary.status', Kind.STRING),
+        'risk': ('incident.risk', Kind.NULLABLE_STRING),
+    },
+)
+
+encode_employee_incidents_page: Callable[[list[str], int, int, int, str | None], str] = compile_encoder(
+    ['incidents', 'total_pages', 'current_page', 'total_incidents', 'next_cursor'],
+    {
+        'incidents': ('incidents', ListOf(str)),
+        'totalPages': ('total_pages', Kind.INTEGER),
+        'currentPage': ('current_page', Kind.INTEGER),
+        'totalIncidents': ('total_incidents', Kind.INTEGER),
+        'nextCursor': ('next_cursor', Kind.NULLABLE_STRING),
+    },
+)
+
+encode_incident_detail: Callable[[Incident, list[HistoryEntry], User, User | Employee, str, Employee], str] = compile_encoder(
+    ['incident', 'history', 'reported_by', 'created_by', 'created_by_role', 'assigned_to'],
+    {
+        'id': ('incident.id', Kind.STRING),
+        'name': ('incident.name', Kind.STRING),
+        'channel': ('incident.channel', Kind.STRING),
+        'reportedBy': {
+            'id': ('reported_by.id', Kind.STRING),
+            'name': ('reported_by.name', Kind.STRING),
+            'email': ('reported_by.email', Kind.STRING),
+            'role': ("'user'", Kind.STRING),
+        },
+        'createdBy': {
+            'id': ('created_by.id', Kind.STRING),
+            'name': ('created_by.name', Kind.STRING),
+            'email': ('created_by.email', Kind.STRING),
+            'role': ('created_by_role', Kind.STRING),
+        },
+        'assignedTo': {
+            'id': ('assigned_to.id', Kind.STRING),
+            'name': ('assigned_to.name', Kind.STRING),
+            'email': ('assigned_to.email', Kind.STRING),
+            'role': ('assigned_to.role', Kind.STRING),
+        },
+        'history': ('history', ListOf(encode_history_entry)),
+        'risk': ('incident.risk', Kind.NULLABLE_STRING),
+    },
+)
+
+encode_client_incident: Callable[[Incident, list[HistoryEntry]], str] = compile_encoder(
+    ['incident', 'history'],
+    {
+        'id': ('incident.id', Kind.STRING),
+        'name': ('incident.name', Kind.STRING),
+        'channel': ('incident.channel', Kind.STRING),
+        'reported_by': ('incident.reported_by', Kind.STRING),
+        'created_by': ('incident.created_by', Kind.STRING),
+        'assigned_to': ('incident.assigned_to', Kind.STRING),
+        'history': ('history', ListOf(encode_history_entry)),
+        'risk': ('incident.risk', Kind.NULLABLE_STRING),
+    },
+)
@@ -1,12 +1,24 @@
+import base64
+import binascii
+import hashlib
 import json
-from collections.abc import Callable
-from typing import Any, cast
+from collections.abc import Callable, Generator, Iterable, Mapping
+from datetime import datetime
+from enum import StrEnum
+from typing import Any, TypeVar, cast
 from uuid import UUID
 
-from flask import Blueprint, Request, Response, request
+from flask import Blueprint, Request, Response, request, stream_with_context
 from flask.views import MethodView
 from tightwrap import wraps
 
+from models import Channel, HistoryEntry, Incident, PartialIncident, Risk
+from repositories import IncidentCursor, IncidentFilter, IncidentSort
+from timing import timer
+
+E = TypeVar('E', bound=StrEnum)
+T = TypeVar('T')
+
 
 class APIGatewayRequest(Request):
     user_token: dict[str, Any]
@@ -29,8 +41,110 @@ def is_valid_uuid4(uuid: str) -> bool:
     return True
 
 
+def encode_cursor(incident: Incident | PartialIncident) -> str:
+    data = json.dumps([incident.last_modified.isoformat(), incident.id])
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> IncidentCursor | None:
+    try:
+        last_modified, incident_id = json.loads(base64.urlsafe_b64decode(cursor))
+        if not isinstance(last_modified, str) or not isinstance(incident_id, str):
+            return None
+
+        return datetime.fromisoformat(last_modified), incident_id
+    except (binascii.Error, ValueError, TypeError):
+        return None
+
+
+def growing_batches(items: Iterable[T]) -> Generator[list[T], None, None]:
+    # Yields the first item as soon as it arrives, then batches that double in size: 1, 1, 2, 4, 8... Work on each batch
+    # can start while the next items are still read, with a few calls for the whole stream instead of one per item.
+    batch: list[T] = []
+    for count, item in enumerate(items, 1):
+        batch.append(item)
+        if count & (count - 1) == 0:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def enum_arg(args: Mapping[str, str], name: str, enum: type[E]) -> E | None:
+    value = args.get(name)
+    if value is None:
+        return None
+
+    try:
+        return enum(value)
+    except ValueError:
+        raise ValueError(f'Invalid {name}. Allowed values are {[x.value for x in enum]}.') from None
+
+
+def incident_list_args(args: Mapping[str, str]) -> tuple[IncidentFilter, IncidentSort]:
+    # Filters and sort of an incident listing, a ValueError tells the client which argument is not valid
+    filters = IncidentFilter(risk=enum_arg(args, 'risk', Risk), channel=enum_arg(args, 'channel', Channel))
+    sort = enum_arg(args, 'sort', IncidentSort) or IncidentSort.LAST_MODIFIED
+    return filters, sort
+
+
+# Strong validator of the incidents of a response. Adding a history entry updates the modification date of the
+# incident and takes the next sequence number, so any change to an incident or its history changes the ETag.
+def incidents_etag(versions: Iterable[tuple[str, datetime, int | None]]) -> str:
+    digest = hashlib.sha256()
+    for incident_id, last_modified, last_seq in versions:
+        digest.update(f'{incident_id}/{last_modified.isoformat()}/{last_seq};'.encode())
+    return digest.hexdigest()[:32]
+
+
+def last_seq(history: Iterable[HistoryEntry]) -> int | None:
+    return max((x.seq for x in history), default=None)
+
+
+def is_not_modified(etag: str) -> bool:
+    # If-None-Match uses the weak comparison, and * matches any current representation
+    return request.if_none_match.contains_weak(etag)
+
+
+def not_modified_response(etag: str) -> Response:
+    resp = Response(status=304)
+    resp.set_etag(etag)
+    return resp
+
+
 def json_response(data: dict[str, Any] | list[dict[str, Any]], status: int) -> Response:
-    return Response(json.dumps(data), status=status, mimetype='application/json')
+    with timer('serialize'):
+        body = json.dumps(data)
+
+    return Response(body, status=status, mimetype='application/json')
+
+
+def encoded_response(body: str, status: int, headers: dict[str, str] | None = None) -> Response:
+    return Response(body.encode(), status=status, mimetype='application/json', headers=headers)
+
+
+def json_stream_response(
+    items: Iterable[str], status: int, *, ndjson: bool = False, headers: dict[str, str] | None = None
+) -> Response:
+    # Sends already encoded JSON items as they are produced, as a JSON array or as newline delimited JSON
+    def generate() -> Generator[str, None, None]:
+        if ndjson:
+            for item in items:
+                yield item + '\n'
+            return
+
+        yield '['
+        for i, item in enumerate(items):
+            yield (', ' if i > 0 else '') + item
+        yield ']'
+
+    return Response(
+        stream_with_context(generate()),
+        status=status,
+        mimetype='application/x-ndjson' if ndjson else 'application/json',
+        headers=headers,
+    )
 
 
 def error_response(msg: str, code: int) -> Response:
@@ -0,0 +1,3 @@
+from .executor import ExecutorStats, FanOutExecutor, TaskGroup
+
+__all__ = ['ExecutorStats', 'FanOutExecutor', 'TaskGroup']
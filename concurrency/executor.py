@@ -0,0 +1,204 @@
+import contextvars
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from types import TracebackType
+from typing import Any, ParamSpec, Self, TypedDict, TypeVar
+
+P = ParamSpec('P')
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class ExecutorStats(TypedDict):
+    max_workers: int
+    threads: int
+    active: int
+    queued: int
+    caller_runs: int
+
+
+class _Slots:
+    # Pool threads that a request may occupy at the same time, shared by all of its nested task groups
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.used >= self.limit:
+                return False
+            self.used += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.used -= 1
+
+
+def _cancel(future: Future[Any]) -> None:
+    # Waiters only see a cancelled future as done once they are notified
+    future.cancel()
+    future.set_running_or_notify_cancel()
+
+
+_current_group: contextvars.ContextVar['TaskGroup | None'] = contextvars.ContextVar('current_group', default=None)
+
+
+class TaskGroup:
+    def __init__(self, executor: 'FanOutExecutor', max_concurrency: int) -> None:
+        self.executor = executor
+        parent = _current_group.get()
+        self._slots: _Slots = parent._slots if parent is not None else _Slots(max_concurrency)  # noqa: SLF001
+        self._pending: deque[tuple[Future[Any], Callable[[], Any]]] = deque()
+        self._futures: list[Future[Any]] = []
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._token: contextvars.Token[TaskGroup | None] | None = None
+
+    def submit(self, fn: Callable[P, T], /, *args: P.args, **kwargs: P.kwargs) -> Future[T]:
+        future: Future[T] = Future()
+        # Tasks see the context variables of the code that submitted them, like the task group they belong to
+        context = contextvars.copy_context()
+
+        with self._lock:
+            self._futures.append(future)
+            if self._cancelled:
+                _cancel(future)
+                return future
+            self._pending.append((future, lambda: context.run(fn, *args, **kwargs)))
+
+        if self._slots.try_acquire():
+            self.executor.dispatch(self._drain)
+
+        return future
+
+    def _run_next(self) -> bool:
+        with self._lock:
+            if not self._pending:
+                return False
+            future, task = self._pending.popleft()
+
+        if not future.set_running_or_notify_cancel():
+            return True
+
+        try:
+            result = task()
+        except BaseException as exc:  # noqa: BLE001
+            # The remaining tasks are not needed anymore once one of them fails
+            self.cancel()
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+        return True
+
+    def _drain(self) -> None:
+        # A pool thread keeps running the pending tasks of the group before giving its slot back
+        try:
+            while self._run_next():
+                pass
+        finally:
+            self._slots.release()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled = True
+            pending = [future for future, _ in self._pending]
+            self._pending.clear()
+
+        for future in pending:
+            _cancel(future)
+
+    def __enter__(self) -> Self:
+        self._token = _current_group.set(self)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._token is not None:
+            _current_group.reset(self._token)
+
+        if exc_value is not None:
+            self.cancel()
+
+        # The waiting thread runs the tasks not picked up by the pool yet, so nested groups never wait on a busy pool
+        while self._run_next():
+            pass
+
+        wait(self._futures)
+
+        if exc_value is None:
+            for future in self._futures:
+                if not future.cancelled() and (exc := future.exception()) is not None:
+                    raise exc
+
+
+class FanOutExecutor:
+    def __init__(self, max_workers: int = 32, max_queue: int = 64, max_concurrency: int = 8) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_concurrency = max_concurrency
+        self._threads = 0
+        self._active = 0
+        self._queued = 0
+        self._caller_runs = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fanout', initializer=self._init_worker)
+
+    def _init_worker(self) -> None:
+        with self._lock:
+            self._threads += 1
+
+    def _work(self, fn: Callable[[], None]) -> None:
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+
+        try:
+            fn()
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def dispatch(self, fn: Callable[[], None]) -> None:
+        # When the queue is full the caller runs the work itself, which slows down whoever is adding more of it
+        with self._lock:
+            caller_runs = self._queued >= self.max_queue
+            if caller_runs:
+                self._caller_runs += 1
+            else:
+                self._queued += 1
+
+        if caller_runs:
+            fn()
+        else:
+            self._pool.submit(self._work, fn)
+
+    def group(self, max_concurrency: int | None = None) -> TaskGroup:
+        return TaskGroup(self, max_concurrency or self.max_concurrency)
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T], max_concurrency: int | None = None) -> list[R]:
+        with self.group(max_concurrency) as group:
+            futures = [group.submit(fn, x) for x in items]
+
+        return [x.result() for x in futures]
+
+    def stats(self) -> ExecutorStats:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'threads': self._threads,
+                'active': self._active,
+                'queued': self._queued,
+                'caller_runs': self._caller_runs,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
@@ -1,30 +1,175 @@
 from dependency_injector import providers
 from dependency_injector.containers import DeclarativeContainer, WiringConfiguration
 
-from repositories.firestore import FirestoreIncidentRepository
-from repositories.rest import RestClientRepository, RestEmployeeRepository, RestUserRepository
+from concurrency import FanOutExecutor
+from repositories.cache import CachedEmployeeRepository, CachedIncidentRepository, CachedUserRepository
+from repositories.firestore import FirestoreAsyncIncidentRepository, FirestoreIncidentRepository
+from repositories.memory import InMemoryIncidentRepository
+from repositories.rest import (
+    AsyncRestClientRepository,
+    AsyncRestEmployeeRepository,
+    AsyncRestUserRepository,
+    PooledSession,
+    RestClientRepository,
+    RestEmployeeRepository,
+    RestUserRepository,
+    Upstream,
+    client_session_resource,
+)
+
+
+def connection_pool_size(max_workers: int, request_threads: int, hedge_workers: int) -> int:
+    # Threads that may have a request in flight at the same time: the executor workers, the request threads that run
+    # tasks themselves when the executor is busy, and the threads sending the hedged requests to an upstream service
+    return max_workers + request_threads + hedge_workers
 
 
 class Container(DeclarativeContainer):
-    wiring_config = WiringConfiguration(packages=['blueprints'])
+    wiring_config = WiringConfiguration(packages=['blueprints', 'handlers'])
     config = providers.Configuration()
 
-    user_repo = providers.ThreadSafeSingleton(
+    # Shared by every request and repository that fans out work, so the number of threads stays bounded under load
+    executor = providers.ThreadSafeSingleton(
+        FanOutExecutor,
+        max_workers=config.executor.max_workers,
+        max_queue=config.executor.max_queue,
+        max_concurrency=config.executor.max_concurrency,
+    )
+
+    # Connections kept alive per upstream service, so that no thread making a request has to open a connection that
+    # is then closed because the pool is full
+    http_pool_size = providers.Callable(
+        connection_pool_size, config.executor.max_workers, config.http.request_threads, config.resilience.hedge_workers
+    )
+
+    # Shared by all REST repositories, so connections to each upstream service are kept alive and reused
+    http_session = providers.ThreadSafeSingleton(PooledSession, pool_size=http_pool_size)
+
+    # Circuit breaker and hedging of each upstream service, shared by all the repositories calling it
+    user_upstream = providers.ThreadSafeSingleton(
+        Upstream,
+        name='user',
+        failure_threshold=config.resilience.failure_threshold,
+        reset_timeout=config.resilience.reset_timeout,
+        hedge_percentile=config.resilience.hedge_percentile,
+        hedge_workers=config.resilience.hedge_workers,
+    )
+
+    client_upstream = providers.ThreadSafeSingleton(
+        Upstream,
+        name='client',
+        failure_threshold=config.resilience.failure_threshold,
+        reset_timeout=config.resilience.reset_timeout,
+        hedge_percentile=config.resilience.hedge_percentile,
+        hedge_workers=config.resilience.hedge_workers,
+    )
+
+    rest_user_repo = providers.ThreadSafeSingleton(
         RestUserRepository,
         base_url=config.svc.user.url,
         token_provider=config.svc.user.token_provider,
+        session=http_session,
+        executor=executor,
+        upstream=user_upstream,
     )
 
-    employee_repo = providers.ThreadSafeSingleton(
+    user_repo = providers.Selector(
+        config.cache.profiles.backend,
+        none=rest_user_repo,
+        memory=providers.ThreadSafeSingleton(
+            CachedUserRepository,
+            repo=rest_user_repo,
+            max_size=config.cache.profiles.max_size,
+            ttl=config.cache.profiles.ttl,
+        ),
+    )
+
+    rest_employee_repo = providers.ThreadSafeSingleton(
         RestEmployeeRepository,
         base_url=config.svc.client.url,
         token_provider=config.svc.client.token_provider,
+        session=http_session,
+        executor=executor,
+        upstream=client_upstream,
+    )
+
+    employee_repo = providers.Selector(
+        config.cache.profiles.backend,
+        none=rest_employee_repo,
+        memory=providers.ThreadSafeSingleton(
+            CachedEmployeeRepository,
+            repo=rest_employee_repo,
+            max_size=config.cache.profiles.max_size,
+            ttl=config.cache.profiles.ttl,
+        ),
     )
 
     client_repo = providers.ThreadSafeSingleton(
         RestClientRepository,
         base_url=config.svc.client.url,
         token_provider=config.svc.client.token_provider,
+        session=http_session,
+        executor=executor,
+        upstream=client_upstream,
+    )
+
+    firestore_incident_repo = providers.ThreadSafeSingleton(
+        FirestoreIncidentRepository,
+        database=config.firestore.database,
+        executor=executor,
+    )
+
+    # Incidents kept in memory instead of Firestore, for load tests without the emulator
+    memory_incident_repo = providers.ThreadSafeSingleton(InMemoryIncidentRepository, data_file=config.incidents.data_file)
+
+    store_incident_repo = providers.Selector(
+        config.incidents.backend,
+        firestore=firestore_incident_repo,
+        memory=memory_incident_repo,
+    )
+
+    incident_repo = providers.Selector(
+        config.cache.incidents.backend,
+        none=store_incident_repo,
+        memory=providers.ThreadSafeSingleton(
+            CachedIncidentRepository,
+            repo=store_incident_repo,
+            max_listeners=config.cache.incidents.max_listeners,
+            max_history=config.cache.incidents.max_history,
+        ),
+    )
+
+    # Repositories of the asyncio serving mode (app_async.py), the session is opened when the event loop starts
+    async_http_session = providers.Resource(client_session_resource, pool_size=http_pool_size)
+
+    async_user_repo = providers.Singleton(
+        AsyncRestUserRepository,
+        base_url=config.svc.user.url,
+        token_provider=config.svc.user.token_provider,
+        session=async_http_session,
+        max_concurrency=config.executor.max_concurrency,
+        upstream=user_upstream,
+    )
+
+    async_employee_repo = providers.Singleton(
+        AsyncRestEmployeeRepository,
+        base_url=config.svc.client.url,
+        token_provider=config.svc.client.token_provider,
+        session=async_http_session,
+        max_concurrency=config.executor.max_concurrency,
+        upstream=client_upstream,
     )
 
-    incident_repo = providers.ThreadSafeSingleton(FirestoreIncidentRepository, database=config.firestore.database)
+    async_client_repo = providers.Singleton(
+        AsyncRestClientRepository,
+        base_url=config.svc.client.url,
+        token_provider=config.svc.client.token_provider,
+        session=async_http_session,
+        upstream=client_upstream,
+    )
+
+    async_incident_repo = providers.Singleton(
+        FirestoreAsyncIncidentRepository,
+        database=config.firestore.database,
+        max_concurrency=config.executor.max_concurrency,
+    )
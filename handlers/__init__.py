@@ -0,0 +1,14 @@
+# ruff: noqa: N812
+
+from .health import routes as RoutesHealth
+from .incident import routes as RoutesIncident
+from .util import apigateway_middleware, metrics_middleware, profiling_middleware, server_timing_middleware
+
+__all__ = [
+    'RoutesHealth',
+    'RoutesIncident',
+    'apigateway_middleware',
+    'metrics_middleware',
+    'profiling_middleware',
+    'server_timing_middleware',
+]
@@ -0,0 +1,20 @@
+from aiohttp import web
+
+from blueprints.health import METRICS_CONTENT_TYPE
+from metrics import REGISTRY
+
+from .util import json_response
+
+routes = web.RouteTableDef()
+
+
+@routes.view('/api/v1/health/incidentquery')
+class HealthCheck(web.View):
+    async def get(self) -> web.Response:
+        return json_response({'status': 'Ok'}, 200)
+
+
+@routes.view('/api/v1/metrics/incidentquery')
+class Metrics(web.View):
+    async def get(self) -> web.Response:
+        return web.Response(body=REGISTRY.render().encode(), status=200, headers={'Content-Type': METRICS_CONTENT_TYPE})
@@ -0,0 +1,350 @@
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterable
+from typing import Any
+
+from aiohttp import web
+from aiohttp.helpers import ETag
+from dependency_injector.wiring import Provide
+
+from blueprints.serializers import (
+    EMPLOYEE_INCIDENT_FIELDS,
+    USER_INCIDENT_FIELDS,
+    encode_client_incident,
+    encode_employee_incident,
+    encode_employee_incidents_page,
+    encode_incident_detail,
+    encode_list,
+    encode_user_incident,
+)
+from blueprints.util import decode_cursor, encode_cursor, incident_list_args, incidents_etag, is_valid_uuid4, last_seq
+from containers import Container
+from models import Employee, HistoryEntry, HistorySummary, Incident, PartialIncident, User
+from repositories import AsyncEmployeeRepository, AsyncIncidentRepository, AsyncUserRepository, IncidentSort
+from repositories.client import AsyncClientRepository
+from timing import timer
+
+from .util import (
+    accepts_ndjson,
+    async_growing_batches,
+    async_iter,
+    encoded_response,
+    error_response,
+    is_not_modified,
+    json_stream_response,
+    not_modified_response,
+    query_int,
+    requires_token,
+)
+
+routes = web.RouteTableDef()
+
+
+@routes.view('/api/v1/users/me/incidents')
+class UserIncidents(web.View):
+    @requires_token
+    async def get(
+        self,
+        token: dict[str, Any],
+        incident_repo: AsyncIncidentRepository = Provide[Container.async_incident_repo],
+    ) -> web.Response:
+        if self.request.if_none_match:
+            # Clients polling the list usually have the current version already, which can be checked by reading
+            # only the modification dates and the last history entry of each incident
+            versions = [
+                x
+                async for x in incident_repo.select_all_by_reporter(
+                    client_id=token['cid'], reporter_id=token['sub'], fields=()
+                )
+            ]
+            last_seqs = await incident_repo.get_last_seqs(client_id=token['cid'], incident_ids=[x.id for x in versions])
+
+            etag = incidents_etag((x.id, x.last_modified, last_seqs.get(x.id)) for x in versions)
+            if is_not_modified(self.request, etag):
+                return not_modified_response(etag)
+
+        incidents = [
+            x
+            async for x in incident_repo.select_all_by_reporter(
+                client_id=token['cid'], reporter_id=token['sub'], fields=USER_INCIDENT_FIELDS
+            )
+        ]
+
+        histories = await incident_repo.get_histories(client_id=token['cid'], incident_ids=[x.id for x in incidents])
+
+        # The whole response is timed at once, timing each incident would cost about as much as encoding it
+        with timer('serialize'):
+            body = encode_list(encode_user_incident(x, histories[x.id]) for x in incidents)
+
+        resp = encoded_response(body, 200)
+        resp.etag = ETag(value=incidents_etag((x.id, x.last_modified, last_seq(histories[x.id])) for x in incidents))
+        return resp
+
+
+@routes.view('/api/v1/employees/me/incidents')
+class EmployeeIncidents(web.View):
+    def encode_incident(self, incident: PartialIncident, summary: HistorySummary | None, user_reported_by: User | None) -> str:
+        if user_reported_by is None:
+            raise ValueError(f'User {incident.reported_by} not found')
+
+        if summary is None:
+            raise ValueError(f'Incident {incident.id} has no history')
+
+        return encode_employee_incident(incident, user_reported_by, summary)
+
+    @requires_token
+    async def get(
+        self,
+        token: dict[str, Any],
+        incident_repo: AsyncIncidentRepository = Provide[Container.async_incident_repo],
+        user_repo: AsyncUserRepository = Provide[Container.async_user_repo],
+    ) -> web.Response:
+        # Optional pagination parameters
+        page_size = query_int(self.request.query, 'page_size', 5)
+        page_number = query_int(self.request.query, 'page_number', 1)
+        cursor = self.request.query.get('cursor')
+
+        # Validate the value of page_size
+        allowed_page_sizes = [5, 10, 20]
+        if page_size not in allowed_page_sizes:
+            return error_response(f'Invalid page_size. Allowed values are {allowed_page_sizes}.', 400)
+
+        # Validate the value of page_number
+        if page_number < 1:
+            return error_response('Invalid page_number. Page number must be 1 or greater.', 400)
+
+        # A cursor takes precedence over page_number, it avoids reading every skipped incident again
+        start_after = None
+        if cursor is not None:
+            start_after = decode_cursor(cursor)
+            if start_after is None:
+                return error_response('Invalid cursor.', 400)
+
+        # Optional filters and sort, applied by the database so that pages only hold the incidents asked for
+        try:
+            filters, sort = incident_list_args(self.request.query)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        if start_after is not None and sort != IncidentSort.LAST_MODIFIED:
+            return error_response('Cursors can only be used when sorting by last_modified.', 400)
+
+        incidents: list[PartialIncident] = []
+        summary_tasks: list[asyncio.Task[dict[str, HistorySummary]]] = []
+        user_tasks: list[asyncio.Task[dict[str, User]]] = []
+        looked_up: set[str] = set()
+
+        # A failed lookup cancels the others, and the total is counted while the page is read
+        async with asyncio.TaskGroup() as group:
+            total_task = group.create_task(
+                incident_repo.count_by_assignee(client_id=token['cid'], assignee_id=token['sub'], filters=filters)
+            )
+
+            page = incident_repo.select_all_by_assignee(
+                client_id=token['cid'],
+                assignee_id=token['sub'],
+                fields=EMPLOYEE_INCIDENT_FIELDS,
+                offset=(page_number - 1) * page_size if start_after is None else None,
+                limit=page_size,
+                start_after=start_after,
+                filters=filters,
+                sort=sort,
+            )
+
+            # The lookups start as soon as the first incident arrives instead of after the whole page, in batches that
+            # grow as the page streams in so that it only takes a few bulk calls to each repository
+            async for batch in async_growing_batches(page):
+                incidents += batch
+                summary_tasks.append(
+                    group.create_task(incident_repo.get_summaries(client_id=token['cid'], incident_ids=[x.id for x in batch]))
+                )
+                reporters = [x for x in dict.fromkeys(y.reported_by for y in batch) if x not in looked_up]
+                if reporters:
+                    looked_up.update(reporters)
+                    user_tasks.append(group.create_task(user_repo.get_many(reporters, token['cid'])))
+
+        total_incidents = total_task.result()
+        total_pages = (total_incidents + page_size - 1) // page_size
+
+        summaries = {k: v for x in summary_tasks for k, v in x.result().items()}
+        users = {k: v for x in user_tasks for k, v in x.result().items()}
+
+        with timer('serialize'):
+            body = encode_employee_incidents_page(
+                [
+                    self.encode_incident(incident, summaries.get(incident.id), users.get(incident.reported_by))
+                    for incident in incidents
+                ],
+                total_pages,
+                page_number,
+                total_incidents,
+                encode_cursor(incidents[-1]) if len(incidents) == page_size and sort == IncidentSort.LAST_MODIFIED else None,
+            )
+
+        return encoded_response(body, 200)
+
+
+@routes.view('/api/v1/incidents/{incident_id}')
+class IncidentDetail(web.View):
+    def encode_incident(
+        self,
+        incident: Incident,
+        history: list[HistoryEntry],
+        users: dict[str, User],
+        employees: dict[str, Employee],
+    ) -> str:
+        user_reported_by = users.get(incident.reported_by)
+
+        if user_reported_by is None:
+            raise ValueError(f'User {incident.reported_by} not found')
+
+        user_created_by = users.get(incident.created_by) or employees.get(incident.created_by)
+
+        if user_created_by is None:
+            raise ValueError(f'User/Employee {incident.created_by} not found')
+
+        employee_assigned_to = employees.get(incident.assigned_to)
+
+        if employee_assigned_to is None:
+            raise ValueError(f'Employee {incident.assigned_to} not found')
+
+        return encode_incident_detail(
+            incident,
+            history,
+            user_reported_by,
+            user_created_by,
+            'user' if isinstance(user_created_by, User) else user_created_by.role,
+            employee_assigned_to,
+        )
+
+    async def get_history(
+        self, incident_repo: AsyncIncidentRepository, client_id: str, incident_id: str
+    ) -> list[HistoryEntry]:
+        return [x async for x in incident_repo.get_history(client_id=client_id, incident_id=incident_id)]
+
+    @requires_token
+    async def get(
+        self,
+        token: dict[str, Any],
+        incident_repo: AsyncIncidentRepository = Provide[Container.async_incident_repo],
+        user_repo: AsyncUserRepository = Provide[Container.async_user_repo],
+        employee_repo: AsyncEmployeeRepository = Provide[Container.async_employee_repo],
+    ) -> web.Response:
+        incident_id = self.request.match_info['incident_id']
+
+        if not is_valid_uuid4(incident_id):
+            return error_response('Invalid incident ID.', 400)
+
+        incident = None
+        if self.request.if_none_match:
+            # The version is checked before reading the history or calling the user and employee services
+            incident, incident_last_seq = await asyncio.gather(
+                incident_repo.get(client_id=token['cid'], incident_id=incident_id),
+                incident_repo.get_last_seq(client_id=token['cid'], incident_id=incident_id),
+            )
+
+            if incident is None:
+                return error_response('Incident not found.', 404)
+
+            etag = incidents_etag([(incident.id, incident.last_modified, incident_last_seq)])
+            if is_not_modified(self.request, etag):
+                return not_modified_response(etag)
+
+        async with asyncio.TaskGroup() as group:
+            # The history only depends on the incident id, so it is read along with the incident itself
+            history_task = group.create_task(self.get_history(incident_repo, token['cid'], incident_id))
+
+            if incident is None:
+                incident = await incident_repo.get(client_id=token['cid'], incident_id=incident_id)
+            if incident is None:
+                # The history is not needed anymore, its read is cancelled instead of waited for
+                history_task.cancel()
+                return error_response('Incident not found.', 404)
+
+            # The creator can be a user or an employee, so both are looked up at once instead of one after the other
+            users_task = group.create_task(user_repo.get_many([incident.reported_by, incident.created_by], incident.client_id))
+            employees_task = group.create_task(
+                employee_repo.get_many([incident.assigned_to, incident.created_by], incident.client_id)
+            )
+
+        users = users_task.result()
+        employees = employees_task.result()
+
+        history = history_task.result()
+
+        with timer('serialize'):
+            body = self.encode_incident(incident, history, users, employees)
+
+        resp = encoded_response(body, 200)
+        resp.etag = ETag(value=incidents_etag([(incident.id, incident.last_modified, last_seq(history))]))
+        return resp
+
+
+@routes.view('/api/v1/clients/{client_id}/incidents')
+class IncidentsByClient(web.View):
+    # Number of incidents whose histories are loaded together while streaming
+    CHUNK_SIZE = 100
+
+    async def encode_incidents(
+        self, client_id: str, incidents: AsyncIterable[Incident], incident_repo: AsyncIncidentRepository
+    ) -> AsyncGenerator[str, None]:
+        chunk: list[Incident] = []
+
+        async def flush() -> list[str]:
+            histories = await incident_repo.get_histories(client_id=client_id, incident_ids=[x.id for x in chunk])
+            # Timed once per chunk, while streaming only the encoding is timed and not the reads in between
+            with timer('serialize'):
+                return [encode_client_incident(incident, histories[incident.id]) for incident in chunk]
+
+        async for incident in incidents:
+            chunk.append(incident)
+            if len(chunk) == self.CHUNK_SIZE:
+                for encoded in await flush():
+                    yield encoded
+                chunk = []
+
+        if chunk:
+            for encoded in await flush():
+                yield encoded
+
+    async def get(
+        self,
+        incident_repo: AsyncIncidentRepository = Provide[Container.async_incident_repo],
+        client_repo: AsyncClientRepository = Provide[Container.async_client_repo],
+    ) -> web.StreamResponse:
+        client_id = self.request.match_info['client_id']
+
+        # Optional pagination and streaming parameters
+        limit = query_int(self.request.query, 'limit', None)
+        cursor = self.request.query.get('cursor')
+        stream = self.request.query.get('stream', '').lower() in {'1', 'true'}
+        ndjson = accepts_ndjson(self.request)
+
+        if limit is not None and limit < 1:
+            return error_response('Invalid limit. Limit must be 1 or greater.', 400)
+
+        start_after = None
+        if cursor is not None:
+            start_after = decode_cursor(cursor)
+            if start_after is None:
+                return error_response('Invalid cursor.', 400)
+
+        client = await client_repo.get(client_id)
+        if client is None:
+            return error_response('Client not found.', 404)
+
+        incidents = incident_repo.get_all_by_client(client_id, limit=limit, start_after=start_after)
+
+        headers = {}
+        if limit is not None:
+            # A page is bounded by the limit, so it can be read upfront to tell the client where the next one starts
+            page = [x async for x in incidents]
+            if len(page) == limit:
+                headers['X-Next-Cursor'] = encode_cursor(page[-1])
+            incidents = async_iter(page)
+
+        encoded_incidents = self.encode_incidents(client_id, incidents, incident_repo)
+
+        if stream or ndjson:
+            return await json_stream_response(self.request, encoded_incidents, 200, ndjson=ndjson, headers=headers)
+
+        return encoded_response(encode_list([x async for x in encoded_incidents]), 200, headers=headers)
@@ -0,0 +1,215 @@
+import base64
+import binascii
+import contextlib
+import json
+import logging
+import time
+from collections.abc import AsyncGenerator, AsyncIterable, Awaitable, Callable, Iterable, Mapping
+from typing import Any, TypeVar
+
+from aiohttp import web
+from aiohttp.helpers import ETAG_ANY, ETag
+from aiohttp.typedefs import Middleware
+from tightwrap import wraps
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from metrics import REQUEST_DURATION
+from profiling import PROFILE_HEADER, finish_request_profile, save_report, start_request_profile
+from timing import finish_request_timings, start_request_timings, timer
+
+D = TypeVar('D', int, None)
+T = TypeVar('T')
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+user_token_key: web.RequestKey[dict[str, Any] | None] = web.RequestKey('user_token')
+
+
+@web.middleware
+async def apigateway_middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+    # Same as setup_apigateway of the Flask app: the gateway forwards the verified token claims in this header
+    userinfo = request.headers.get('X-Apigateway-Api-Userinfo')
+    request[user_token_key] = None
+
+    if userinfo:
+        with contextlib.suppress(binascii.Error, ValueError):
+            request[user_token_key] = json.loads(base64.urlsafe_b64decode(userinfo + '=' * (4 - len(userinfo) % 4)))
+
+    return await handler(request)
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+    # Same as setup_request_metrics of the Flask app: records the duration of each request by route and status code
+    start = time.perf_counter()
+    status = 500
+    try:
+        resp = await handler(request)
+        status = resp.status
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        resource = request.match_info.route.resource
+        endpoint = resource.canonical if resource is not None else 'unmatched'
+        REQUEST_DURATION.observe(time.perf_counter() - start, endpoint, request.method, str(status))
+
+    return resp
+
+
+def profiling_middleware(*, directory: str) -> Middleware:
+    # Same as setup_profiling of the Flask app: runs the requests sent with the profiling header under cProfile
+    logger = logging.getLogger('profiling')
+
+    @web.middleware
+    async def middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+        if request.headers.get(PROFILE_HEADER) != '1':
+            return await handler(request)
+
+        profile = start_request_profile()
+        if profile is None:
+            logger.warning('Request not profiled, another request is being profiled')
+            return await handler(request)
+
+        try:
+            return await handler(request)
+        finally:
+            finish_request_profile(profile)
+            logger.info(
+                'Request profile', extra={'json_fields': save_report(profile, directory, request.method, request.path)}
+            )
+
+    return middleware
+
+
+def server_timing_middleware(*, log: bool) -> Middleware:
+    # Same as setup_server_timing of the Flask app: adds the time spent on each dependency as a Server-Timing header
+    logger = logging.getLogger('timing')
+
+    @web.middleware
+    async def middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+        token = start_request_timings()
+        try:
+            resp = await handler(request)
+        finally:
+            timings = finish_request_timings(token)
+
+        if timings is not None:
+            # Streamed responses have sent their headers already
+            if not resp.prepared:
+                resp.headers['Server-Timing'] = timings.server_timing()
+
+            if log:
+                logger.info(
+                    'Request timings',
+                    extra={'json_fields': {'method': request.method, 'path': request.path, 'timings': timings.as_dict()}},
+                )
+
+        return resp
+
+    return middleware
+
+
+def query_int(query: Mapping[str, str], key: str, default: D) -> int | D:
+    # Invalid values fall back to the default, like request.args.get(..., type=int) in the Flask views
+    try:
+        return int(query[key])
+    except (KeyError, ValueError):
+        return default
+
+
+async def async_iter(items: Iterable[T]) -> AsyncGenerator[T, None]:
+    for item in items:
+        yield item
+
+
+async def async_growing_batches(items: AsyncIterable[T]) -> AsyncGenerator[list[T], None]:
+    # Same as growing_batches of the Flask views
+    batch: list[T] = []
+    count = 0
+    async for item in items:
+        batch.append(item)
+        count += 1
+        if count & (count - 1) == 0:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def accepts_ndjson(request: web.Request) -> bool:
+    accept = parse_accept_header(request.headers.get('Accept'), MIMEAccept)
+    return accept.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+
+def is_not_modified(request: web.Request, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, and * matches any current representation
+    return any(x.value in {etag, ETAG_ANY} for x in request.if_none_match or ())
+
+
+def not_modified_response(etag: str) -> web.Response:
+    resp = web.Response(status=304)
+    resp.etag = ETag(value=etag)
+    return resp
+
+
+def json_response(data: dict[str, Any] | list[dict[str, Any]], status: int) -> web.Response:
+    with timer('serialize'):
+        body = json.dumps(data)
+
+    return web.Response(text=body, status=status, content_type='application/json')
+
+
+def encoded_response(body: str, status: int, headers: dict[str, str] | None = None) -> web.Response:
+    return web.Response(body=body.encode(), status=status, content_type='application/json', headers=headers)
+
+
+async def json_stream_response(
+    request: web.Request,
+    items: AsyncIterable[str],
+    status: int,
+    *,
+    ndjson: bool = False,
+    headers: dict[str, str] | None = None,
+) -> web.StreamResponse:
+    # Sends already encoded JSON items as they are produced, as a JSON array or as newline delimited JSON
+    resp = web.StreamResponse(status=status, headers=headers)
+    resp.content_type = 'application/x-ndjson' if ndjson else 'application/json'
+    await resp.prepare(request)
+
+    if ndjson:
+        async for item in items:
+            await resp.write((item + '\n').encode())
+    else:
+        separator = '['
+        async for item in items:
+            await resp.write((separator + item).encode())
+            separator = ', '
+        await resp.write(b'[]' if separator == '[' else b']')
+
+    await resp.write_eof()
+    return resp
+
+
+def error_response(msg: str, code: int) -> web.Response:
+    return json_response({'message': msg, 'code': code}, code)
+
+
+def requires_token(f: Callable[..., Awaitable[web.StreamResponse]]) -> Callable[..., Awaitable[web.StreamResponse]]:
+    @wraps(f)
+    async def decorated_function(self: web.View, *args, **kwargs) -> web.StreamResponse:  # type: ignore[no-untyped-def] # noqa: ANN002, ANN003
+        token = self.request.get(user_token_key)
+
+        if token is not None:
+            required_fields = ['sub', 'cid', 'role', 'aud']
+            for field in required_fields:
+                if field not in token:
+                    return error_response(f'{field} is missing in token', 401)
+
+            return await f(self, *args, token=token, **kwargs)
+
+        return error_response('Token is missing', 401)
+
+    return decorated_function
@@ -0,0 +1,36 @@
+from .instrument import (
+    CACHE_LOOKUPS,
+    EXECUTOR_STATS,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_REQUESTS,
+    INCIDENT_CACHE_LISTENERS,
+    REGISTRY,
+    REPOSITORY_CALL_DURATION,
+    REQUEST_DURATION,
+    UPSTREAM_CIRCUIT_STATE,
+    UPSTREAM_HEDGES,
+    UPSTREAM_REJECTED,
+    observed,
+    observed_methods,
+)
+from .registry import Counter, Gauge, Histogram, MetricsRegistry
+
+__all__ = [
+    'CACHE_LOOKUPS',
+    'EXECUTOR_STATS',
+    'HTTP_POOL_CONNECTIONS',
+    'HTTP_POOL_REQUESTS',
+    'INCIDENT_CACHE_LISTENERS',
+    'REGISTRY',
+    'REPOSITORY_CALL_DURATION',
+    'REQUEST_DURATION',
+    'UPSTREAM_CIRCUIT_STATE',
+    'UPSTREAM_HEDGES',
+    'UPSTREAM_REJECTED',
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricsRegistry',
+    'observed',
+    'observed_methods',
+]
@@ -0,0 +1,178 @@
+import functools
+import inspect
+import time
+from collections.abc import AsyncGenerator, Callable, Generator
+from types import AsyncGeneratorType, GeneratorType
+from typing import Any, ParamSpec, TypeVar, cast
+
+from .registry import MetricsRegistry
+
+P = ParamSpec('P')
+R = TypeVar('R')
+C = TypeVar('C', bound=type)
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'incidentquery_request_duration_seconds',
+    'Time to handle a request, by endpoint and status code.',
+    ['endpoint', 'method', 'status'],
+)
+
+REPOSITORY_CALL_DURATION = REGISTRY.histogram(
+    'incidentquery_repository_call_duration_seconds',
+    'Time of each repository call, by outcome: ok, not_found or error.',
+    ['repository', 'method', 'outcome'],
+)
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    'incidentquery_cache_lookups_total',
+    'Lookups of the in-memory caches, by outcome: hit or miss.',
+    ['cache', 'outcome'],
+)
+
+
+EXECUTOR_STATS = REGISTRY.gauge(
+    'incidentquery_executor',
+    'Usage of the executor shared by the requests, by stat: threads, active, queued, caller_runs (since startup).',
+    ['stat'],
+)
+
+INCIDENT_CACHE_LISTENERS = REGISTRY.gauge(
+    'incidentquery_incident_cache_listeners',
+    'Firestore listeners of the incident cache, each one holding a gRPC stream and a thread.',
+    [],
+)
+
+HTTP_POOL_REQUESTS = REGISTRY.gauge(
+    'incidentquery_http_pool_requests',
+    'Requests sent through the connection pool of the upstream services since startup.',
+    [],
+)
+
+HTTP_POOL_CONNECTIONS = REGISTRY.gauge(
+    'incidentquery_http_pool_connections',
+    'Connections opened by the connection pool of the upstream services since startup.',
+    [],
+)
+
+UPSTREAM_HEDGES = REGISTRY.counter(
+    'incidentquery_upstream_hedges_total',
+    'Hedged requests to the upstream services, by event: fired, or won when the answer of the hedge was used.',
+    ['upstream', 'event'],
+)
+
+UPSTREAM_CIRCUIT_STATE = REGISTRY.gauge(
+    'incidentquery_upstream_circuit_state',
+    'State of the circuit breaker of each upstream service: 0 closed, 1 half-open, 2 open.',
+    ['upstream'],
+)
+
+UPSTREAM_REJECTED = REGISTRY.counter(
+    'incidentquery_upstream_rejected_total',
+    'Requests to the upstream services not sent because their circuit breaker was open.',
+    ['upstream'],
+)
+
+
+def _outcome(result: object) -> str:
+    return 'not_found' if result is None else 'ok'
+
+
+def _observed_generator(repository: str, method: str, start: float, gen: Generator[Any, Any, Any]) -> Generator[Any, Any, Any]:
+    # The time spent producing the items is added up, not the time the caller spends between them
+    elapsed = time.perf_counter() - start
+    outcome = 'error'
+    try:
+        while True:
+            step = time.perf_counter()
+            try:
+                item = next(gen)
+            except StopIteration as e:
+                outcome = 'ok'
+                return e.value
+            finally:
+                elapsed += time.perf_counter() - step
+            yield item
+    except GeneratorExit:
+        # Closed by the caller before the end, like a page that is only partially read
+        outcome = 'ok'
+        gen.close()
+        raise
+    finally:
+        REPOSITORY_CALL_DURATION.observe(elapsed, repository, method, outcome)
+
+
+async def _observed_async_generator(
+    repository: str, method: str, start: float, gen: AsyncGenerator[Any, None]
+) -> AsyncGenerator[Any, None]:
+    elapsed = time.perf_counter() - start
+    outcome = 'error'
+    try:
+        while True:
+            step = time.perf_counter()
+            try:
+                item = await anext(gen)
+            except StopAsyncIteration:
+                outcome = 'ok'
+                return
+            finally:
+                elapsed += time.perf_counter() - step
+            yield item
+    except GeneratorExit:
+        outcome = 'ok'
+        await gen.aclose()
+        raise
+    finally:
+        REPOSITORY_CALL_DURATION.observe(elapsed, repository, method, outcome)
+
+
+def observed(repository: str, method: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    # Records the duration and outcome of every call, generators are recorded once they are exhausted or closed
+    def decorator(fn: Callable[P, R]) -> Callable[P, R]:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: P.args, **kwargs: P.kwargs) -> Any:  # noqa: ANN401
+                start = time.perf_counter()
+                outcome = 'error'
+                try:
+                    result = await fn(*args, **kwargs)
+                    outcome = _outcome(result)
+                    return result
+                finally:
+                    REPOSITORY_CALL_DURATION.observe(time.perf_counter() - start, repository, method, outcome)
+
+            return cast(Callable[P, R], async_wrapper)
+
+        @functools.wraps(fn)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                REPOSITORY_CALL_DURATION.observe(time.perf_counter() - start, repository, method, 'error')
+                raise
+
+            if isinstance(result, GeneratorType):
+                return cast(R, _observed_generator(repository, method, start, result))
+            if isinstance(result, AsyncGeneratorType):
+                return cast(R, _observed_async_generator(repository, method, start, result))
+
+            REPOSITORY_CALL_DURATION.observe(time.perf_counter() - start, repository, method, _outcome(result))
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def observed_methods(repository: str) -> Callable[[C], C]:
+    # Records every public method defined by the class, labelled with the repository and the method name
+    def decorator(cls: C) -> C:
+        for attr, value in list(vars(cls).items()):
+            if not attr.startswith('_') and inspect.isfunction(value):
+                setattr(cls, attr, observed(repository, attr)(value))
+        return cls
+
+    return decorator
@@ -0,0 +1,181 @@
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+from typing import Generic, TypeVar
+
+S = TypeVar('S')
+
+Labels = tuple[str, ...]
+
+# Default buckets of the Prometheus clients, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Shards(Generic[S]):
+    # One shard per thread, only written by its own thread, so recording takes no lock. The lock is only taken the
+    # first time a thread records, and when the shards are read to render the metrics.
+    def __init__(self, factory: Callable[[], S]) -> None:
+        self._factory = factory
+        self._local = threading.local()
+        self._shards: list[S] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> S:
+        try:
+            return self._local.shard  # type: ignore[no-any-return]
+        except AttributeError:
+            shard = self._factory()
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def all(self) -> list[S]:
+        with self._lock:
+            return list(self._shards)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if len(names) == 0:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in zip(names, values, strict=True)) + '}'
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._shards: _Shards[dict[Labels, float]] = _Shards(dict)
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        shard = self._shards.get()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> dict[Labels, float]:
+        totals: dict[Labels, float] = {}
+        for shard in self._shards.all():
+            # Copying a dict is atomic, so a shard can be read while its thread keeps recording
+            for labels, value in shard.copy().items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self.values().items()):
+            lines.append(f'{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # For each label set: the observations that fall in each bucket (not cumulative), then in +Inf, then their sum
+        self._shards: _Shards[dict[Labels, list[float]]] = _Shards(dict)
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shards.get()
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0.0] * (len(self.buckets) + 2)
+
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def values(self) -> dict[Labels, list[float]]:
+        totals: dict[Labels, list[float]] = {}
+        for shard in self._shards.all():
+            for labels, counts in shard.copy().items():
+                total = totals.setdefault(labels, [0.0] * (len(self.buckets) + 2))
+                for i, x in enumerate(counts.copy()):
+                    total[i] += x
+        return totals
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, counts in sorted(self.values().items()):
+            cumulative = 0.0
+            for bound, count in zip([*map(repr, self.buckets), '+Inf'], counts, strict=False):
+                cumulative += count
+                bucket_labels = _format_labels([*self.label_names, 'le'], [*labels, bound])
+                lines.append(f'{self.name}_bucket{bucket_labels} {_format_value(cumulative)}')
+
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(counts[-1])}')
+            lines.append(f'{self.name}_count{label_text} {_format_value(cumulative)}')
+        return lines
+
+
+class Gauge:
+    # Set rarely, like the state of a component, so unlike the counters it is a single dict behind a lock. A gauge can
+    # also read its value from a function when the metrics are rendered, like the stats of a pool.
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: dict[Labels, float] = {}
+        self._functions: dict[Labels, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._functions.pop(labels, None)
+            self._values[labels] = value
+
+    def set_function(self, fn: Callable[[], float], *labels: str) -> None:
+        with self._lock:
+            self._values.pop(labels, None)
+            self._functions[labels] = fn
+
+    def values(self) -> dict[Labels, float]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+
+        values.update({labels: fn() for labels, fn in functions.items()})
+        return values
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge']
+        for labels, value in sorted(self.values().items()):
+            lines.append(f'{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str]) -> Counter:
+        counter = Counter(name, documentation, label_names)
+        self.metrics[name] = counter
+        return counter
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str]) -> Gauge:
+        gauge = Gauge(name, documentation, label_names)
+        self.metrics[name] = gauge
+        return gauge
+
+    def histogram(
+        self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        histogram = Histogram(name, documentation, label_names, buckets)
+        self.metrics[name] = histogram
+        return histogram
+
+    def render(self) -> str:
+        # Prometheus text exposition format, version 0.0.4
+        return ''.join(line + '\n' for metric in self.metrics.values() for line in metric.render())
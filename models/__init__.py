@@ -3,10 +3,25 @@ from .channel import Channel
 from .client import Client
 from .employee import Employee
 from .history_entry import HistoryEntry
+from .history_summary import HistorySummary
 from .incident import Incident
 from .invitation_status import InvitationStatus
+from .partial_incident import PartialIncident
 from .risk import Risk
 from .role import Role
 from .user import User
 
-__all__ = ['Action', 'Channel', 'Employee', 'HistoryEntry', 'Incident', 'InvitationStatus', 'Role', 'User', 'Client', 'Risk']
+__all__ = [
+    'Action',
+    'Channel',
+    'Employee',
+    'HistoryEntry',
+    'HistorySummary',
+    'Incident',
+    'InvitationStatus',
+    'PartialIncident',
+    'Role',
+    'User',
+    'Client',
+    'Risk',
+]
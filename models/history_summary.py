@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from .action import Action
+
+
+@dataclass
+class HistorySummary:
+    incident_id: str
+    client_id: str
+    filing_date: datetime
+    status: Action
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from datetime import datetime
 
 from .channel import Channel
 from .risk import Risk
@@ -14,3 +15,4 @@ class Incident:
     created_by: str
     assigned_to: str
     risk: Risk | None
+    last_modified: datetime
@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from .channel import Channel
+from .risk import Risk
+
+
+# Incident read with only some of its fields, the ones that were not read keep their defaults.
+# The id and the last modification date are always read, as they are needed for cursors.
+@dataclass
+class PartialIncident:
+    id: str
+    client_id: str
+    last_modified: datetime
+    name: str = ''
+    channel: Channel | None = None
+    reported_by: str = ''
+    created_by: str = ''
+    assigned_to: str = ''
+    risk: Risk | None = None
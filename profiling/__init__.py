@@ -0,0 +1,17 @@
+from .profiler import (
+    PROFILE_HEADER,
+    PROFILES_ALL_THREADS,
+    RequestProfile,
+    finish_request_profile,
+    save_report,
+    start_request_profile,
+)
+
+__all__ = [
+    'PROFILE_HEADER',
+    'PROFILES_ALL_THREADS',
+    'RequestProfile',
+    'finish_request_profile',
+    'save_report',
+    'start_request_profile',
+]
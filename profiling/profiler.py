@@ -0,0 +1,106 @@
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import Any
+
+# Requests sent with this header set to 1 are profiled, when profiling is enabled
+PROFILE_HEADER = 'X-Profile-Request'
+
+# Whether cProfile covers every thread of the process. From Python 3.12 it is built on sys.monitoring, which is
+# process-wide: a profile includes the executor threads working for the request, and also every request running at the
+# same time. Before 3.12 it only covers the thread that started it, the one serving the request.
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+# Held while a request is being profiled. A single profiler can run in the process, so the requests asking to be
+# profiled while another one is are served without being profiled.
+_profiling = threading.Lock()
+
+
+class RequestProfile:
+    # CPU profile of the process while a request runs
+    def __init__(self) -> None:
+        self.start_time = time.perf_counter()
+        self.profiler = cProfile.Profile()
+        self.started = False
+
+    def start(self) -> bool:
+        try:
+            self.profiler.enable()
+        except ValueError:
+            # Another profiling tool is active
+            return False
+
+        self.started = True
+        return True
+
+    def stop(self) -> None:
+        self.profiler.disable()
+
+    def stats(self) -> pstats.Stats | None:
+        if not self.started:
+            return None
+
+        return pstats.Stats(self.profiler)
+
+    def save(self, path: str) -> None:
+        # Saved in the pstats format, it can be browsed with snakeviz or turned into a flamegraph with flameprof
+        stats = self.stats()
+        if stats is not None:
+            stats.dump_stats(path)
+
+    def summary(self, limit: int = 20) -> list[dict[str, str | float]]:
+        # Functions where the most CPU time was spent, not counting the functions they call
+        stats = self.stats()
+        if stats is None:
+            return []
+
+        functions = sorted(stats.get_stats_profile().func_profiles.items(), key=lambda x: x[1].tottime, reverse=True)
+        return [
+            {
+                'function': f'{x.file_name}:{x.line_number}({name})',
+                'calls': x.ncalls,
+                'tottime_ms': round(x.tottime * 1000, 3),
+                'cumtime_ms': round(x.cumtime * 1000, 3),
+            }
+            for name, x in functions[:limit]
+        ]
+
+
+def start_request_profile() -> RequestProfile | None:
+    # Starts profiling the process for the current request, or returns None if another request is being profiled
+    if not _profiling.acquire(blocking=False):
+        return None
+
+    profile = RequestProfile()
+    if not profile.start():
+        _profiling.release()
+        return None
+
+    return profile
+
+
+def finish_request_profile(profile: RequestProfile) -> None:
+    # Called from the thread that started the profile, which is the only one profiled before Python 3.12
+    profile.stop()
+    _profiling.release()
+
+
+def save_report(profile: RequestProfile, directory: str, method: str, path: str) -> dict[str, Any]:
+    # Saves the profile of a request to the directory and returns a summary to log
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_')
+    file = os.path.join(directory, f'{time.strftime("%Y%m%dT%H%M%S")}-{method}-{slug}-{uuid.uuid4().hex[:8]}.pstats')  # noqa: PTH118
+    profile.save(file)
+
+    return {
+        'method': method,
+        'path': path,
+        'file': file,
+        'all_threads': PROFILES_ALL_THREADS,
+        'wall_ms': round((time.perf_counter() - profile.start_time) * 1000, 3),
+        'top': profile.summary(),
+    }
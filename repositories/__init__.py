@@ -1,5 +1,15 @@
-from .employee import EmployeeRepository
-from .incident import IncidentRepository
-from .user import UserRepository
+from .employee import AsyncEmployeeRepository, EmployeeRepository
+from .incident import AsyncIncidentRepository, IncidentCursor, IncidentFilter, IncidentRepository, IncidentSort
+from .user import AsyncUserRepository, UserRepository
 
-__all__ = ['EmployeeRepository', 'IncidentRepository', 'UserRepository']
+__all__ = [
+    'AsyncEmployeeRepository',
+    'AsyncIncidentRepository',
+    'AsyncUserRepository',
+    'EmployeeRepository',
+    'IncidentCursor',
+    'IncidentFilter',
+    'IncidentRepository',
+    'IncidentSort',
+    'UserRepository',
+]
@@ -0,0 +1,6 @@
+from .employee import CachedEmployeeRepository
+from .incident import CachedIncidentRepository
+from .user import CachedUserRepository
+from .util import TTLCache
+
+__all__ = ['CachedEmployeeRepository', 'CachedIncidentRepository', 'CachedUserRepository', 'TTLCache']
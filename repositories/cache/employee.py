@@ -0,0 +1,46 @@
+from collections.abc import Iterable
+
+from models import Employee
+from repositories import EmployeeRepository
+
+from .util import TTLCache
+
+
+class CachedEmployeeRepository(EmployeeRepository):
+    def __init__(self, repo: EmployeeRepository, max_size: int, ttl: float) -> None:
+        self.repo = repo
+        self.cache: TTLCache[tuple[str, str], Employee] = TTLCache(max_size, ttl, name='employees')
+
+    def get(self, employee_id: str, client_id: str) -> Employee | None:
+        employee = self.cache.get((client_id, employee_id))
+
+        if employee is None:
+            employee = self.repo.get(employee_id, client_id)
+
+            # Unknown employees are not cached, they may be created at any moment
+            if employee is not None:
+                self.cache.put((client_id, employee_id), employee)
+
+        return employee
+
+    def get_many(self, employee_ids: Iterable[str], client_id: str) -> dict[str, Employee]:
+        found: dict[str, Employee] = {}
+        missing: list[str] = []
+
+        for employee_id in dict.fromkeys(employee_ids):
+            cached = self.cache.get((client_id, employee_id))
+            if cached is None:
+                missing.append(employee_id)
+            else:
+                found[employee_id] = cached
+
+        if len(missing) > 0:
+            fetched = self.repo.get_many(missing, client_id)
+            for employee_id, value in fetched.items():
+                self.cache.put((client_id, employee_id), value)
+            found.update(fetched)
+
+        return found
+
+    def invalidate(self, employee_id: str, client_id: str) -> None:
+        self.cache.invalidate((client_id, employee_id))
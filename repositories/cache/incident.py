@@ -0,0 +1,240 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Generator, Sequence
+from dataclasses import dataclass
+
+from metrics import CACHE_LOOKUPS
+from models import HistoryEntry, HistorySummary, Incident, PartialIncident
+from repositories import IncidentCursor, IncidentFilter, IncidentRepository, IncidentSort
+
+
+@dataclass
+class CachedIncident:
+    # Set by the listener, None until its first notification arrives
+    incident: Incident | None = None
+    history: list[HistoryEntry] | None = None
+    # Incremented on every notification, so reads that overlap a change are not cached
+    version: int = 0
+    unsubscribe: Callable[[], None] | None = None
+    closed: bool = False
+
+
+# Keeps the details of recently viewed incidents in memory, each one with a listener on its document that replaces the
+# cached incident and drops its history as soon as it changes. Adding a history entry also updates the modification
+# date of its incident, so the listener on the incident document covers the history as well.
+# Every cached incident holds one listener, so max_listeners bounds both the listeners and the cached incidents,
+# and histories longer than max_history are read through without being cached. A listener is not free: each one keeps
+# its own gRPC stream open to Firestore and a thread of the client library to receive its notifications, so
+# max_listeners is better kept to a few dozen of the most viewed incidents.
+class CachedIncidentRepository(IncidentRepository):
+    def __init__(self, repo: IncidentRepository, max_listeners: int, max_history: int) -> None:
+        self.repo = repo
+        self.max_listeners = max_listeners
+        self.max_history = max_history
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[tuple[str, str], CachedIncident] = OrderedDict()
+        # Listeners are stopped by request threads, never by the thread of a listener
+        self._stopped: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: tuple[str, str]) -> CachedIncident | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        entry = self._entries.pop(key)
+        entry.closed = True
+        if entry.unsubscribe is not None:
+            self._stopped.append(entry.unsubscribe)
+
+    def _stop_listeners(self) -> None:
+        with self._lock:
+            stopped, self._stopped = self._stopped, []
+
+        for unsubscribe in stopped:
+            unsubscribe()
+
+    def _on_change(self, key: tuple[str, str], entry: CachedIncident, incident: Incident | None) -> None:
+        with self._lock:
+            if entry.closed:
+                return
+
+            if entry.incident is not None:
+                self.invalidations += 1
+
+            entry.version += 1
+            entry.history = None
+            entry.incident = incident
+
+            # Deleted incidents are not cached, requests for them are rare
+            if incident is None:
+                self._remove(key)
+
+    def _watch(self, client_id: str, incident_id: str) -> None:
+        key = (client_id, incident_id)
+
+        with self._lock:
+            if key in self._entries:
+                return
+
+            entry = CachedIncident()
+            self._entries[key] = entry
+
+            # Evict least recently used incidents
+            while len(self._entries) > self.max_listeners:
+                self._remove(next(iter(self._entries)))
+
+        unsubscribe = self.repo.watch(client_id, incident_id, lambda incident: self._on_change(key, entry, incident))
+
+        with self._lock:
+            entry.unsubscribe = unsubscribe
+            # The incident may have been evicted while the listener was starting
+            if entry.closed:
+                self._stopped.append(unsubscribe)
+
+    def get(self, client_id: str, incident_id: str) -> Incident | None:
+        with self._lock:
+            entry = self._lookup((client_id, incident_id))
+            if entry is not None and entry.incident is not None:
+                self.hits += 1
+                CACHE_LOOKUPS.inc('incidents', 'hit')
+                return entry.incident
+
+            self.misses += 1
+            CACHE_LOOKUPS.inc('incidents', 'miss')
+
+        incident = self.repo.get(client_id, incident_id)
+
+        # Incidents that don't exist are not cached, so made up ids can't take the place of real ones
+        if incident is not None and entry is None:
+            self._watch(client_id, incident_id)
+
+        self._stop_listeners()
+        return incident
+
+    def get_history(self, client_id: str, incident_id: str) -> Generator[HistoryEntry, None, None]:
+        key = (client_id, incident_id)
+
+        with self._lock:
+            entry = self._lookup(key)
+            history = entry.history if entry is not None else None
+            version = entry.version if entry is not None else None
+
+            if history is not None:
+                self.hits += 1
+                CACHE_LOOKUPS.inc('histories', 'hit')
+            else:
+                self.misses += 1
+                CACHE_LOOKUPS.inc('histories', 'miss')
+
+        if history is None:
+            history = list(self.repo.get_history(client_id, incident_id))
+
+            with self._lock:
+                # Only cached if the incident was already watched before the read started, and didn't change since
+                entry = self._entries.get(key)
+                if entry is not None and entry.version == version and len(history) <= self.max_history:
+                    entry.history = history
+
+        self._stop_listeners()
+        yield from history
+
+    def invalidate(self, client_id: str, incident_id: str) -> None:
+        with self._lock:
+            if (client_id, incident_id) in self._entries:
+                self._remove((client_id, incident_id))
+
+        self._stop_listeners()
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+        self._stop_listeners()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'listeners': len(self._entries),
+            }
+
+    def get_all_by_reporter(
+        self,
+        client_id: str,
+        reporter_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+    ) -> Generator[Incident, None, None]:
+        return self.repo.get_all_by_reporter(client_id, reporter_id, offset, limit, start_after)
+
+    def select_all_by_reporter(  # noqa: PLR0913
+        self,
+        client_id: str,
+        reporter_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+    ) -> Generator[PartialIncident, None, None]:
+        return self.repo.select_all_by_reporter(client_id, reporter_id, fields, offset, limit, start_after)
+
+    def get_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> Generator[Incident, None, None]:
+        return self.repo.get_all_by_assignee(client_id, assignee_id, offset, limit, start_after, filters, sort)
+
+    def select_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> Generator[PartialIncident, None, None]:
+        return self.repo.select_all_by_assignee(client_id, assignee_id, fields, offset, limit, start_after, filters, sort)
+
+    def count_by_assignee(self, client_id: str, assignee_id: str, filters: IncidentFilter | None = None) -> int:
+        return self.repo.count_by_assignee(client_id, assignee_id, filters)
+
+    def get_histories(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, list[HistoryEntry]]:
+        return self.repo.get_histories(client_id, incident_ids)
+
+    def get_summary(self, client_id: str, incident_id: str) -> HistorySummary | None:
+        return self.repo.get_summary(client_id, incident_id)
+
+    def get_summaries(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, HistorySummary]:
+        return self.repo.get_summaries(client_id, incident_ids)
+
+    def get_last_seq(self, client_id: str, incident_id: str) -> int | None:
+        return self.repo.get_last_seq(client_id, incident_id)
+
+    def get_last_seqs(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, int]:
+        return self.repo.get_last_seqs(client_id, incident_ids)
+
+    def get_all_by_client(
+        self, client_id: str, limit: int | None = None, start_after: IncidentCursor | None = None
+    ) -> Generator[Incident, None, None]:
+        return self.repo.get_all_by_client(client_id, limit, start_after)
+
+    def watch(self, client_id: str, incident_id: str, on_change: Callable[[Incident | None], None]) -> Callable[[], None]:
+        return self.repo.watch(client_id, incident_id, on_change)
@@ -0,0 +1,46 @@
+from collections.abc import Iterable
+
+from models import User
+from repositories import UserRepository
+
+from .util import TTLCache
+
+
+class CachedUserRepository(UserRepository):
+    def __init__(self, repo: UserRepository, max_size: int, ttl: float) -> None:
+        self.repo = repo
+        self.cache: TTLCache[tuple[str, str], User] = TTLCache(max_size, ttl, name='users')
+
+    def get(self, user_id: str, client_id: str) -> User | None:
+        user = self.cache.get((client_id, user_id))
+
+        if user is None:
+            user = self.repo.get(user_id, client_id)
+
+            # Unknown users are not cached, they may be created at any moment
+            if user is not None:
+                self.cache.put((client_id, user_id), user)
+
+        return user
+
+    def get_many(self, user_ids: Iterable[str], client_id: str) -> dict[str, User]:
+        found: dict[str, User] = {}
+        missing: list[str] = []
+
+        for user_id in dict.fromkeys(user_ids):
+            cached = self.cache.get((client_id, user_id))
+            if cached is None:
+                missing.append(user_id)
+            else:
+                found[user_id] = cached
+
+        if len(missing) > 0:
+            fetched = self.repo.get_many(missing, client_id)
+            for user_id, value in fetched.items():
+                self.cache.put((client_id, user_id), value)
+            found.update(fetched)
+
+        return found
+
+    def invalidate(self, user_id: str, client_id: str) -> None:
+        self.cache.invalidate((client_id, user_id))
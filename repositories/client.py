@@ -4,3 +4,9 @@ from models import Client
 class ClientRepository:
     def get(self, client_id: str) -> Client | None:
         raise NotImplementedError  # pragma: no cover
+
+
+# Same contract as ClientRepository, for the asyncio serving mode
+class AsyncClientRepository:
+    async def get(self, client_id: str) -> Client | None:
+        raise NotImplementedError  # pragma: no cover
@@ -1,6 +1,20 @@
+from collections.abc import Iterable
+
 from models import Employee
 
 
 class EmployeeRepository:
     def get(self, employee_id: str, client_id: str) -> Employee | None:
         raise NotImplementedError  # pragma: no cover
+
+    def get_many(self, employee_ids: Iterable[str], client_id: str) -> dict[str, Employee]:
+        raise NotImplementedError  # pragma: no cover
+
+
+# Same contract as EmployeeRepository, for the asyncio serving mode
+class AsyncEmployeeRepository:
+    async def get(self, employee_id: str, client_id: str) -> Employee | None:
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_many(self, employee_ids: Iterable[str], client_id: str) -> dict[str, Employee]:
+        raise NotImplementedError  # pragma: no cover
@@ -1,3 +1,4 @@
+from .async_incident import FirestoreAsyncIncidentRepository
 from .incident import FirestoreIncidentRepository
 
-__all__ = ['FirestoreIncidentRepository']
+__all__ = ['FirestoreAsyncIncidentRepository', 'FirestoreIncidentRepository']
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from collections.abc import AsyncGenerator, Awaitable, Sequence
+from typing import Any, TypeVar, cast
+
+from google.cloud.firestore_v1.async_aggregation import AsyncAggregationQuery
+from google.cloud.firestore_v1.async_client import AsyncClient
+from google.cloud.firestore_v1.async_collection import AsyncCollectionReference
+from google.cloud.firestore_v1.async_query import AsyncQuery
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from metrics import observed_methods
+from models import HistoryEntry, HistorySummary, Incident, PartialIncident
+from repositories import AsyncIncidentRepository, IncidentCursor, IncidentFilter, IncidentSort
+from timing import timed_methods
+
+from .incident import (
+    doc_to_history_entry,
+    doc_to_incident,
+    doc_to_partial_incident,
+    docs_to_history_summary,
+    listing_query,
+    page_query,
+    projection,
+)
+
+T = TypeVar('T')
+
+
+@observed_methods('firestore_incident')
+@timed_methods('firestore')
+class FirestoreAsyncIncidentRepository(AsyncIncidentRepository):
+    def __init__(self, database: str, max_concurrency: int = 8) -> None:
+        self.db = AsyncClient(database=database)
+        self.max_concurrency = max_concurrency
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    async def _gather(self, awaitables: Sequence[Awaitable[T]]) -> list[T]:
+        # Bounds the number of queries in flight for a single call, like the task groups of the threaded mode
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(awaitable: Awaitable[T]) -> T:
+            async with semaphore:
+                return await awaitable
+
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(bounded(x)) for x in awaitables]
+
+        return [x.result() for x in tasks]
+
+    def _incidents_ref(self, client_id: str) -> AsyncCollectionReference:
+        return cast(AsyncCollectionReference, self.db.collection('clients').document(client_id).collection('incidents'))
+
+    async def get(self, client_id: str, incident_id: str) -> Incident | None:
+        doc = await self._incidents_ref(client_id).document(incident_id).get()
+
+        if not doc.exists:
+            return None
+
+        return doc_to_incident(doc)
+
+    def _query_by_field(
+        self,
+        client_id: str,
+        field: str,
+        value: str,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> AsyncQuery:
+        query = self._incidents_ref(client_id).where(filter=FieldFilter(field, '==', value))  # type: ignore[no-untyped-call]
+        return listing_query(query, filters, sort)
+
+    async def _stream(self, query: AsyncQuery) -> AsyncGenerator[Incident, None]:
+        async for doc in query.stream():
+            yield doc_to_incident(doc)
+
+    async def _select(self, query: AsyncQuery, fields: Sequence[str]) -> AsyncGenerator[PartialIncident, None]:
+        async for doc in query.select(projection(fields)).stream():
+            yield doc_to_partial_incident(doc)
+
+    def get_all_by_reporter(
+        self,
+        client_id: str,
+        reporter_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+    ) -> AsyncGenerator[Incident, None]:
+        query = self._query_by_field(client_id, 'reported_by', reporter_id)
+        return self._stream(page_query(query, IncidentSort.LAST_MODIFIED, offset, limit, start_after))
+
+    def select_all_by_reporter(  # noqa: PLR0913
+        self,
+        client_id: str,
+        reporter_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+    ) -> AsyncGenerator[PartialIncident, None]:
+        query = self._query_by_field(client_id, 'reported_by', reporter_id)
+        return self._select(page_query(query, IncidentSort.LAST_MODIFIED, offset, limit, start_after), fields)
+
+    def get_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> AsyncGenerator[Incident, None]:
+        query = self._query_by_field(client_id, 'assigned_to', assignee_id, filters, sort)
+        return self._stream(page_query(query, sort, offset, limit, start_after))
+
+    def select_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> AsyncGenerator[PartialIncident, None]:
+        query = self._query_by_field(client_id, 'assigned_to', assignee_id, filters, sort)
+        return self._select(page_query(query, sort, offset, limit, start_after), fields)
+
+    async def count_by_assignee(self, client_id: str, assignee_id: str, filters: IncidentFilter | None = None) -> int:
+        query = cast(AsyncAggregationQuery, self._query_by_field(client_id, 'assigned_to', assignee_id, filters).count())
+        result = (await query.get())[0][0]
+        return int(result.value)
+
+    def _history_ref(self, client_id: str, incident_id: str) -> AsyncCollectionReference:
+        return cast(AsyncCollectionReference, self._incidents_ref(client_id).document(incident_id).collection('history'))
+
+    async def get_history(self, client_id: str, incident_id: str) -> AsyncGenerator[HistoryEntry, None]:
+        query = self._history_ref(client_id, incident_id).order_by('seq', direction='ASCENDING')
+
+        async for doc in query.stream():
+            yield doc_to_history_entry(doc)
+
+    async def _get_history_list(self, client_id: str, incident_id: str) -> list[HistoryEntry]:
+        return [x async for x in self.get_history(client_id, incident_id)]
+
+    async def get_histories(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, list[HistoryEntry]]:
+        histories = await self._gather([self._get_history_list(client_id, x) for x in incident_ids])
+        return dict(zip(incident_ids, histories, strict=True))
+
+    async def get_summary(self, client_id: str, incident_id: str) -> HistorySummary | None:
+        history_ref = self._history_ref(client_id, incident_id)
+
+        # Only the first entry and the last two are needed, regardless of how long the history is
+        first, last = await asyncio.gather(
+            history_ref.order_by('seq', direction='ASCENDING').limit(1).get(),
+            history_ref.order_by('seq', direction='DESCENDING').limit(2).get(),
+        )
+
+        return docs_to_history_summary(client_id, incident_id, first, last)
+
+    async def get_summaries(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, HistorySummary]:
+        summaries = await self._gather([self.get_summary(client_id, x) for x in incident_ids])
+        return {k: v for k, v in zip(incident_ids, summaries, strict=True) if v is not None}
+
+    async def get_last_seq(self, client_id: str, incident_id: str) -> int | None:
+        query = self._history_ref(client_id, incident_id).order_by('seq', direction='DESCENDING').limit(1)
+        docs = await query.select(['seq']).get()
+
+        if len(docs) == 0:
+            return None
+
+        return int(cast(dict[str, Any], docs[0].to_dict())['seq'])
+
+    async def get_last_seqs(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, int]:
+        seqs = await self._gather([self.get_last_seq(client_id, x) for x in incident_ids])
+        return {k: v for k, v in zip(incident_ids, seqs, strict=True) if v is not None}
+
+    def get_all_by_client(
+        self, client_id: str, limit: int | None = None, start_after: IncidentCursor | None = None
+    ) -> AsyncGenerator[Incident, None]:
+        query = self._incidents_ref(client_id).order_by('last_modified', direction='DESCENDING')
+        query = query.order_by('__name__', direction='DESCENDING')
+        return self._stream(page_query(query, IncidentSort.LAST_MODIFIED, None, limit, start_after))
@@ -1,49 +1,115 @@
 import logging
-from collections.abc import Generator
-from enum import Enum
-from typing import Any, cast
+from collections.abc import Callable, Generator, Sequence
+from typing import Any, TypeVar, cast
 
-import dacite
 from google.cloud.firestore import Client as FirestoreClient  # type: ignore[import-untyped]
 from google.cloud.firestore_v1 import CollectionReference, DocumentReference, DocumentSnapshot, Query
 from google.cloud.firestore_v1.aggregation import AggregationQuery
 from google.cloud.firestore_v1.base_aggregation import AggregationResult
-from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.base_query import BaseQuery, FieldFilter
 
-from models import HistoryEntry, Incident
-from repositories import IncidentRepository
+from concurrency import FanOutExecutor
+from metrics import observed_methods
+from models import Action, HistoryEntry, HistorySummary, Incident, PartialIncident
+from repositories import IncidentCursor, IncidentFilter, IncidentRepository, IncidentSort
+from timing import timed_methods
 
+from .mapping import compile_mapper
 
+map_incident = compile_mapper(Incident)
+map_partial_incident = compile_mapper(PartialIncident)
+map_history_entry = compile_mapper(HistoryEntry)
+
+QueryT = TypeVar('QueryT', bound=BaseQuery)
+
+
+def _incident_data(doc: DocumentSnapshot) -> dict[str, Any]:
+    client_id = cast(DocumentReference, cast(CollectionReference, cast(DocumentReference, doc.reference).parent).parent).id
+    data = cast(dict[str, Any], doc.to_dict())
+    data['id'] = doc.id
+    data['client_id'] = client_id
+    return data
+
+
+def doc_to_incident(doc: DocumentSnapshot) -> Incident:
+    return map_incident(_incident_data(doc))
+
+
+def doc_to_partial_incident(doc: DocumentSnapshot) -> PartialIncident:
+    return map_partial_incident(_incident_data(doc))
+
+
+def projection(fields: Sequence[str]) -> list[str]:
+    # The modification date is always read, the cursors of the listings are built from it
+    return list(dict.fromkeys([*fields, 'last_modified']))
+
+
+def listing_query(query: QueryT, filters: IncidentFilter | None, sort: IncidentSort) -> QueryT:
+    # The filters are applied by Firestore, each combination with each sort has its composite index (firestore.tf)
+    if filters is not None:
+        for field, value in [('risk', filters.risk), ('channel', filters.channel)]:
+            if value is not None:
+                query = query.where(filter=FieldFilter(field, '==', value.value))  # type: ignore[no-untyped-call]
+
+    direction = 'DESCENDING' if sort == IncidentSort.LAST_MODIFIED else 'ASCENDING'
+    # Order by document id as well, so that incidents with the same sort key have a stable position for cursors
+    return query.order_by(sort.value, direction=direction).order_by('__name__', direction=direction)
+
+
+def page_query(
+    query: QueryT, sort: IncidentSort, offset: int | None, limit: int | None, start_after: IncidentCursor | None
+) -> QueryT:
+    if start_after is not None:
+        if sort != IncidentSort.LAST_MODIFIED:
+            raise ValueError('Cursors can only be used with listings sorted by last modification')
+
+        last_modified, incident_id = start_after
+        query = query.start_after({'last_modified': last_modified, '__name__': incident_id})
+
+    if offset is not None:
+        query = query.offset(offset)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query
+
+
+def doc_to_history_entry(doc: DocumentSnapshot) -> HistoryEntry:
+    incident_ref = cast(DocumentReference, cast(CollectionReference, cast(DocumentReference, doc.reference).parent).parent)
+    client_ref = cast(DocumentReference, cast(CollectionReference, incident_ref.parent).parent)
+    data = cast(dict[str, Any], doc.to_dict())
+    data['incident_id'] = incident_ref.id
+    data['client_id'] = client_ref.id
+    return map_history_entry(data)
+
+
+def docs_to_history_summary(
+    client_id: str, incident_id: str, first: list[DocumentSnapshot], last: list[DocumentSnapshot]
+) -> HistorySummary | None:
+    # Builds the summary from the first history entry and the last two
+    if len(first) == 0:
+        return None
+
+    last_actions = [Action(cast(dict[str, Any], doc.to_dict())['action']) for doc in last]
+
+    return HistorySummary(
+        incident_id=incident_id,
+        client_id=client_id,
+        filing_date=cast(dict[str, Any], first[0].to_dict())['date'],
+        # AI responses don't change the status of the incident
+        status=last_actions[1] if last_actions[0] == Action.AI_RESPONSE and len(last_actions) > 1 else last_actions[0],
+    )
+
+
+@observed_methods('firestore_incident')
+@timed_methods('firestore')
 class FirestoreIncidentRepository(IncidentRepository):
-    def __init__(self, database: str) -> None:
+    def __init__(self, database: str, executor: FanOutExecutor | None = None) -> None:
         self.db = FirestoreClient(database=database)
+        self.executor = executor or FanOutExecutor()
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def doc_to_incident(self, doc: DocumentSnapshot) -> Incident:
-        client_id = cast(DocumentReference, cast(CollectionReference, cast(DocumentReference, doc.reference).parent).parent).id
-        return dacite.from_dict(
-            data_class=Incident,
-            data={
-                **cast(dict[str, Any], doc.to_dict()),
-                'id': doc.id,
-                'client_id': client_id,
-            },
-            config=dacite.Config(cast=[Enum]),
-        )
-
-    def doc_to_history_entry(self, doc: DocumentSnapshot) -> HistoryEntry:
-        incident_ref = cast(DocumentReference, cast(CollectionReference, cast(DocumentReference, doc.reference).parent).parent)
-        client_ref = cast(DocumentReference, cast(CollectionReference, incident_ref.parent).parent)
-        return dacite.from_dict(
-            data_class=HistoryEntry,
-            data={
-                **cast(dict[str, Any], doc.to_dict()),
-                'incident_id': incident_ref.id,
-                'client_id': client_ref.id,
-            },
-            config=dacite.Config(cast=[Enum]),
-        )
-
     def get(self, client_id: str, incident_id: str) -> Incident | None:
         client_ref = self.db.collection('clients').document(client_id)
         incident_ref = cast(CollectionReference, client_ref.collection('incidents')).document(incident_id)
@@ -52,61 +118,170 @@ class FirestoreIncidentRepository(IncidentRepository):
         if not doc.exists:
             return None
 
-        return self.doc_to_incident(doc)
+        return doc_to_incident(doc)
 
-    def _query_by_field(self, client_id: str, field: str, value: str) -> Query:
+    def _query_by_field(
+        self,
+        client_id: str,
+        field: str,
+        value: str,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> Query:
         client_ref = self.db.collection('clients').document(client_id)
         incidents_ref = cast(CollectionReference, client_ref.collection('incidents'))
         query = incidents_ref.where(filter=FieldFilter(field, '==', value))  # type: ignore[no-untyped-call]
-        return query.order_by('last_modified', direction='DESCENDING')
+        return listing_query(query, filters, sort)
 
-    def _get_all_by_field(
-        self, client_id: str, field: str, value: str, offset: int | None, limit: int | None
-    ) -> Generator[Incident, None, None]:
-        query = self._query_by_field(client_id, field, value)
-
-        if offset is not None:
-            query = query.offset(offset)
+    def _get_all(self, query: Query) -> Generator[Incident, None, None]:
+        docs = query.stream()
 
-        if limit is not None:
-            query = query.limit(limit)
+        for doc in docs:
+            yield doc_to_incident(doc)
 
-        docs = query.stream()
+    def _select_all(self, query: Query, fields: Sequence[str]) -> Generator[PartialIncident, None, None]:
+        # Firestore only sends the selected fields, so less data is transferred and decoded for each document
+        docs = query.select(projection(fields)).stream()
 
         for doc in docs:
-            yield self.doc_to_incident(doc)
+            yield doc_to_partial_incident(doc)
 
     def get_all_by_reporter(
-        self, client_id: str, reporter_id: str, offset: int | None = None, limit: int | None = None
+        self,
+        client_id: str,
+        reporter_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
     ) -> Generator[Incident, None, None]:
-        return self._get_all_by_field(client_id, 'reported_by', reporter_id, offset, limit)
+        query = self._query_by_field(client_id, 'reported_by', reporter_id)
+        return self._get_all(page_query(query, IncidentSort.LAST_MODIFIED, offset, limit, start_after))
+
+    def select_all_by_reporter(  # noqa: PLR0913
+        self,
+        client_id: str,
+        reporter_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+    ) -> Generator[PartialIncident, None, None]:
+        query = self._query_by_field(client_id, 'reported_by', reporter_id)
+        return self._select_all(page_query(query, IncidentSort.LAST_MODIFIED, offset, limit, start_after), fields)
 
-    def get_all_by_assignee(
-        self, client_id: str, assignee_id: str, offset: int | None = None, limit: int | None = None
+    def get_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
     ) -> Generator[Incident, None, None]:
-        return self._get_all_by_field(client_id, 'assigned_to', assignee_id, offset, limit)
+        query = self._query_by_field(client_id, 'assigned_to', assignee_id, filters, sort)
+        return self._get_all(page_query(query, sort, offset, limit, start_after))
 
-    def count_by_assignee(self, client_id: str, assignee_id: str) -> int:
-        query = cast(AggregationQuery, self._query_by_field(client_id, 'assigned_to', assignee_id).count())
+    def select_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> Generator[PartialIncident, None, None]:
+        query = self._query_by_field(client_id, 'assigned_to', assignee_id, filters, sort)
+        return self._select_all(page_query(query, sort, offset, limit, start_after), fields)
+
+    def count_by_assignee(self, client_id: str, assignee_id: str, filters: IncidentFilter | None = None) -> int:
+        query = cast(AggregationQuery, self._query_by_field(client_id, 'assigned_to', assignee_id, filters).count())
         result = cast(list[AggregationResult], query.get()[0])[0]
         return int(result.value)
 
-    def get_history(self, client_id: str, incident_id: str) -> Generator[HistoryEntry, None, None]:
+    def _history_ref(self, client_id: str, incident_id: str) -> CollectionReference:
         client_ref = self.db.collection('clients').document(client_id)
         incident_ref = cast(CollectionReference, client_ref.collection('incidents')).document(incident_id)
-        history_ref = cast(CollectionReference, incident_ref.collection('history'))
+        return cast(CollectionReference, incident_ref.collection('history'))
+
+    def get_history(self, client_id: str, incident_id: str) -> Generator[HistoryEntry, None, None]:
+        history_ref = self._history_ref(client_id, incident_id)
         query = history_ref.order_by('seq', direction='ASCENDING')
 
         docs = query.stream()
 
         for doc in docs:
-            yield self.doc_to_history_entry(doc)
+            yield doc_to_history_entry(doc)
+
+    def get_histories(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, list[HistoryEntry]]:
+        if len(incident_ids) == 0:
+            return {}
+
+        # Each history is a separate subcollection, so fetch them concurrently instead of one after the other
+        histories = self.executor.map(lambda incident_id: list(self.get_history(client_id, incident_id)), incident_ids)
+        return dict(zip(incident_ids, histories, strict=True))
+
+    def get_summary(self, client_id: str, incident_id: str) -> HistorySummary | None:
+        history_ref = self._history_ref(client_id, incident_id)
+
+        # Only the first entry and the last two are needed, regardless of how long the history is
+        first = history_ref.order_by('seq', direction='ASCENDING').limit(1).get()
+        last = history_ref.order_by('seq', direction='DESCENDING').limit(2).get()
+
+        return docs_to_history_summary(client_id, incident_id, first, last)
+
+    def get_summaries(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, HistorySummary]:
+        if len(incident_ids) == 0:
+            return {}
+
+        summaries = self.executor.map(lambda incident_id: self.get_summary(client_id, incident_id), incident_ids)
+        return {k: v for k, v in zip(incident_ids, summaries, strict=True) if v is not None}
+
+    def get_last_seq(self, client_id: str, incident_id: str) -> int | None:
+        # Reads a single entry with a single field, whatever the length of the history
+        query = self._history_ref(client_id, incident_id).order_by('seq', direction='DESCENDING').limit(1)
+        docs = query.select(['seq']).get()
 
-    def get_all_by_client(self, client_id: str) -> Generator[Incident, None, None]:
+        if len(docs) == 0:
+            return None
+
+        return int(cast(dict[str, Any], docs[0].to_dict())['seq'])
+
+    def get_last_seqs(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, int]:
+        if len(incident_ids) == 0:
+            return {}
+
+        seqs = self.executor.map(lambda incident_id: self.get_last_seq(client_id, incident_id), incident_ids)
+        return {k: v for k, v in zip(incident_ids, seqs, strict=True) if v is not None}
+
+    def get_all_by_client(
+        self, client_id: str, limit: int | None = None, start_after: IncidentCursor | None = None
+    ) -> Generator[Incident, None, None]:
         client_ref = self.db.collection('clients').document(client_id)
         incidents_ref = cast(CollectionReference, client_ref.collection('incidents'))
-        query = incidents_ref.order_by('last_modified', direction='DESCENDING')
+        query = incidents_ref.order_by('last_modified', direction='DESCENDING').order_by('__name__', direction='DESCENDING')
 
+        if start_after is not None:
+            last_modified, incident_id = start_after
+            query = query.start_after({'last_modified': last_modified, '__name__': incident_id})
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        # Documents are decoded as they arrive, so the caller can process them without holding the whole result
         docs = query.stream()
         for doc in docs:
-            yield self.doc_to_incident(doc)
+            yield doc_to_incident(doc)
+
+    def watch(self, client_id: str, incident_id: str, on_change: Callable[[Incident | None], None]) -> Callable[[], None]:
+        client_ref = self.db.collection('clients').document(client_id)
+        incident_ref = cast(CollectionReference, client_ref.collection('incidents')).document(incident_id)
+
+        # Runs in the thread of the listener, the list of documents is empty when the incident doesn't exist
+        def on_snapshot(docs: list[DocumentSnapshot], _changes: object, _read_time: object) -> None:
+            on_change(doc_to_incident(docs[0]) if len(docs) > 0 else None)
+
+        listener = incident_ref.on_snapshot(on_snapshot)
+        return cast(Callable[[], None], listener.unsubscribe)
@@ -0,0 +1,69 @@
+from collections.abc import Callable
+from dataclasses import MISSING, Field, fields
+from enum import Enum
+from types import NoneType, UnionType
+from typing import Any, TypeVar, Union, cast, get_args, get_origin, get_type_hints
+
+T = TypeVar('T')
+
+_mappers: dict[type, Callable[[dict[str, Any]], Any]] = {}
+
+
+def _enum_converter(enum_type: type[Enum], *, optional: bool) -> Callable[[Any], Enum | None]:
+    members = {member.value: member for member in enum_type}
+
+    def convert(value: Any) -> Enum | None:  # noqa: ANN401
+        if value is None and optional:
+            return None
+
+        member = members.get(value)
+        # Fall back to the enum itself so invalid values raise the usual ValueError
+        return member if member is not None else enum_type(value)
+
+    return convert
+
+
+def _field_expression(field: Field[Any], field_type: Any, namespace: dict[str, Any]) -> str:  # noqa: ANN401
+    name = field.name
+    optional = False
+    if get_origin(field_type) in {Union, UnionType}:
+        args = [x for x in get_args(field_type) if x is not NoneType]
+        optional = len(args) < len(get_args(field_type))
+        field_type = args[0] if len(args) == 1 else Any
+
+    # Like dacite, optional fields and fields with a default may be missing from the data
+    if field.default is not MISSING:
+        namespace[f'default_{name}'] = field.default
+        value = f'data.get({name!r}, default_{name})'
+    elif optional:
+        value = f'data.get({name!r})'
+    else:
+        value = f'data[{name!r}]'
+
+    if isinstance(field_type, type) and issubclass(field_type, Enum):
+        namespace[f'convert_{name}'] = _enum_converter(field_type, optional=optional)
+        return f'convert_{name}({value})'
+
+    return value
+
+
+# Generates, once per dataclass, a function that builds an instance from a dict with a single constructor call.
+# Enum fields are converted from their values, other values are passed through as they come from Firestore.
+# It replaces dacite.from_dict with Config(cast=[Enum]), which inspects the types again for every document.
+def compile_mapper(data_class: type[T]) -> Callable[[dict[str, Any]], T]:
+    if data_class in _mappers:
+        return _mappers[data_class]
+
+    type_hints = get_type_hints(data_class)
+    namespace: dict[str, Any] = {'data_class': data_class}
+
+    arguments = ', '.join(
+        f'{field.name}={_field_expression(field, type_hints[field.name], namespace)}'
+        for field in fields(cast(Any, data_class))
+    )
+    source = f'def map_{data_class.__name__.lower()}(data):\n    return data_class({arguments})\n'
+
+    exec(source, namespace)  # noqa: S102
+    mapper = cast(Callable[[dict[str, Any]], T], namespace[f'map_{data_class.__name__.lower()}'])
+    _mappers[data_class] = mapper
+    return mapper
@@ -1,6 +1,26 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Callable, Generator, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from enum import StrEnum
 
-from models import HistoryEntry, Incident
+from models import Channel, HistoryEntry, HistorySummary, Incident, PartialIncident, Risk
+
+# Position right after an incident in a listing ordered by last modification: (last_modified, incident id)
+IncidentCursor = tuple[datetime, str]
+
+
+class IncidentSort(StrEnum):
+    # Most recently modified first, the only order that cursors can resume
+    LAST_MODIFIED = 'last_modified'
+    # Alphabetical order of the incident names
+    NAME = 'name'
+
+
+# Conditions on the fields of the incidents in a listing, the ones that are None are not checked
+@dataclass(frozen=True)
+class IncidentFilter:
+    risk: Risk | None = None
+    channel: Channel | None = None
 
 
 class IncidentRepository:
@@ -8,20 +28,162 @@ class IncidentRepository:
         raise NotImplementedError  # pragma: no cover
 
     def get_all_by_reporter(
-        self, client_id: str, reporter_id: str, offset: int | None = None, limit: int | None = None
+        self,
+        client_id: str,
+        reporter_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
     ) -> Generator[Incident, None, None]:
         raise NotImplementedError  # pragma: no cover
 
-    def get_all_by_assignee(
-        self, client_id: str, assignee_id: str, offset: int | None = None, limit: int | None = None
+    # Same as get_all_by_reporter, but only the given fields of each incident are read
+    def select_all_by_reporter(  # noqa: PLR0913
+        self,
+        client_id: str,
+        reporter_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+    ) -> Generator[PartialIncident, None, None]:
+        raise NotImplementedError  # pragma: no cover
+
+    def get_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
     ) -> Generator[Incident, None, None]:
         raise NotImplementedError  # pragma: no cover
 
-    def count_by_assignee(self, client_id: str, assignee_id: str) -> int:
+    # Same as get_all_by_assignee, but only the given fields of each incident are read
+    def select_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> Generator[PartialIncident, None, None]:
+        raise NotImplementedError  # pragma: no cover
+
+    def count_by_assignee(self, client_id: str, assignee_id: str, filters: IncidentFilter | None = None) -> int:
         raise NotImplementedError  # pragma: no cover
 
     def get_history(self, client_id: str, incident_id: str) -> Generator[HistoryEntry, None, None]:
         raise NotImplementedError  # pragma: no cover
 
-    def get_all_by_client(self, client_id: str) -> Generator[Incident, None, None]:
+    def get_histories(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, list[HistoryEntry]]:
+        raise NotImplementedError  # pragma: no cover
+
+    def get_summary(self, client_id: str, incident_id: str) -> HistorySummary | None:
+        raise NotImplementedError  # pragma: no cover
+
+    def get_summaries(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, HistorySummary]:
+        raise NotImplementedError  # pragma: no cover
+
+    # Sequence number of the last history entry, or None if the incident has no history
+    def get_last_seq(self, client_id: str, incident_id: str) -> int | None:
+        raise NotImplementedError  # pragma: no cover
+
+    def get_last_seqs(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, int]:
+        raise NotImplementedError  # pragma: no cover
+
+    def get_all_by_client(
+        self, client_id: str, limit: int | None = None, start_after: IncidentCursor | None = None
+    ) -> Generator[Incident, None, None]:
+        raise NotImplementedError  # pragma: no cover
+
+    # Calls on_change with the new state of the incident, or None once it is deleted, every time its document changes,
+    # starting with the current state. Notifications stop when the returned function is called.
+    def watch(self, client_id: str, incident_id: str, on_change: Callable[[Incident | None], None]) -> Callable[[], None]:
+        raise NotImplementedError  # pragma: no cover
+
+
+# Same contract as IncidentRepository, for the asyncio serving mode
+class AsyncIncidentRepository:
+    async def get(self, client_id: str, incident_id: str) -> Incident | None:
+        raise NotImplementedError  # pragma: no cover
+
+    def get_all_by_reporter(
+        self,
+        client_id: str,
+        reporter_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+    ) -> AsyncGenerator[Incident, None]:
+        raise NotImplementedError  # pragma: no cover
+
+    # Same as get_all_by_reporter, but only the given fields of each incident are read
+    def select_all_by_reporter(  # noqa: PLR0913
+        self,
+        client_id: str,
+        reporter_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+    ) -> AsyncGenerator[PartialIncident, None]:
+        raise NotImplementedError  # pragma: no cover
+
+    def get_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> AsyncGenerator[Incident, None]:
+        raise NotImplementedError  # pragma: no cover
+
+    # Same as get_all_by_assignee, but only the given fields of each incident are read
+    def select_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> AsyncGenerator[PartialIncident, None]:
+        raise NotImplementedError  # pragma: no cover
+
+    async def count_by_assignee(self, client_id: str, assignee_id: str, filters: IncidentFilter | None = None) -> int:
+        raise NotImplementedError  # pragma: no cover
+
+    def get_history(self, client_id: str, incident_id: str) -> AsyncGenerator[HistoryEntry, None]:
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_histories(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, list[HistoryEntry]]:
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_summary(self, client_id: str, incident_id: str) -> HistorySummary | None:
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_summaries(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, HistorySummary]:
+        raise NotImplementedError  # pragma: no cover
+
+    # Sequence number of the last history entry, or None if the incident has no history
+    async def get_last_seq(self, client_id: str, incident_id: str) -> int | None:
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_last_seqs(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, int]:
+        raise NotImplementedError  # pragma: no cover
+
+    def get_all_by_client(
+        self, client_id: str, limit: int | None = None, start_after: IncidentCursor | None = None
+    ) -> AsyncGenerator[Incident, None]:
         raise NotImplementedError  # pragma: no cover
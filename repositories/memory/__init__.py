@@ -0,0 +1,3 @@
+from .incident import InMemoryIncidentRepository
+
+__all__ = ['InMemoryIncidentRepository']
@@ -0,0 +1,319 @@
+import json
+import threading
+from bisect import bisect_left, insort
+from collections.abc import Callable, Generator, Sequence
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from models import Action, HistoryEntry, HistorySummary, Incident, PartialIncident
+from repositories import IncidentCursor, IncidentFilter, IncidentRepository, IncidentSort
+from repositories.firestore.mapping import compile_mapper
+
+map_incident = compile_mapper(Incident)
+map_history_entry = compile_mapper(HistoryEntry)
+
+
+# Identifies the incidents of a listing: all the incidents of a client, or the ones with a value in a field, optionally
+# narrowed down by filters. Like the composite indexes of Firestore, there is one index for each of them.
+@dataclass(frozen=True)
+class IndexKey:
+    client_id: str
+    field_path: str = ''
+    value: str = ''
+    filters: IncidentFilter = field(default_factory=IncidentFilter)
+
+
+# Positions of the incidents of a listing in both sort orders, kept sorted so that a page is located by bisection
+@dataclass
+class IncidentIndex:
+    by_last_modified: list[tuple[datetime, str]] = field(default_factory=list)
+    by_name: list[tuple[str, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.by_last_modified)
+
+    def add(self, incident: Incident) -> None:
+        insort(self.by_last_modified, (incident.last_modified, incident.id))
+        insort(self.by_name, (incident.name, incident.id))
+
+    def remove(self, incident: Incident) -> None:
+        del self.by_last_modified[bisect_left(self.by_last_modified, (incident.last_modified, incident.id))]
+        del self.by_name[bisect_left(self.by_name, (incident.name, incident.id))]
+
+    def page(self, sort: IncidentSort, offset: int | None, limit: int | None, start_after: IncidentCursor | None) -> list[str]:
+        # Ids of the incidents of the page, in the same order as Firestore returns them
+        if sort == IncidentSort.NAME:
+            if start_after is not None:
+                raise ValueError('Cursors can only be used with listings sorted by last modification')
+
+            start = offset or 0
+            return [x[1] for x in self.by_name[start : None if limit is None else start + limit]]
+
+        # Most recent first, so the page is taken backwards from the end of the list, or from the cursor
+        end = len(self.by_last_modified) if start_after is None else bisect_left(self.by_last_modified, start_after)
+        end = max(end - (offset or 0), 0)
+        start = 0 if limit is None else max(end - limit, 0)
+        return [x[1] for x in reversed(self.by_last_modified[start:end])]
+
+
+def index_keys(incident: Incident) -> list[IndexKey]:
+    # Listings by assignee can be filtered, so the incident is added to the index of each filter it matches
+    assignee_keys = [
+        IndexKey(incident.client_id, 'assigned_to', incident.assigned_to, IncidentFilter(risk=risk, channel=channel))
+        for risk in dict.fromkeys([None, incident.risk])
+        for channel in [None, incident.channel]
+    ]
+
+    return [IndexKey(incident.client_id), IndexKey(incident.client_id, 'reported_by', incident.reported_by), *assignee_keys]
+
+
+def history_summary(client_id: str, incident_id: str, history: list[HistoryEntry]) -> HistorySummary | None:
+    if len(history) == 0:
+        return None
+
+    last_actions = [x.action for x in reversed(history[-2:])]
+
+    return HistorySummary(
+        incident_id=incident_id,
+        client_id=client_id,
+        filing_date=history[0].date,
+        # AI responses don't change the status of the incident
+        status=last_actions[1] if last_actions[0] == Action.AI_RESPONSE and len(last_actions) > 1 else last_actions[0],
+    )
+
+
+# Keeps the incidents and their histories in memory, for load tests without the Firestore emulator. Every listing has
+# an index ordered by modification date and by name, so counts are O(1), pages are located in O(log n) and only the
+# incidents of the page are read.
+class InMemoryIncidentRepository(IncidentRepository):
+    def __init__(self, data_file: str | None = None) -> None:
+        self._incidents: dict[tuple[str, str], Incident] = {}
+        self._histories: dict[tuple[str, str], list[HistoryEntry]] = {}
+        self._indexes: dict[IndexKey, IncidentIndex] = {}
+        self._listeners: dict[tuple[str, str], list[Callable[[Incident | None], None]]] = {}
+        self._lock = threading.RLock()
+
+        if data_file is not None:
+            self.load(data_file)
+
+    def load(self, data_file: str) -> None:
+        # Same layout as dump(): the incidents, each one with its history, and dates in ISO 8601
+        data = json.loads(Path(data_file).read_text())
+
+        for incident_data in data['incidents']:
+            history = incident_data.pop('history', [])
+            incident_data['last_modified'] = datetime.fromisoformat(incident_data['last_modified'])
+            self.put(map_incident(incident_data))
+
+            for entry_data in history:
+                entry_data['date'] = datetime.fromisoformat(entry_data['date'])
+                self.add_history_entry(
+                    map_history_entry(
+                        {**entry_data, 'incident_id': incident_data['id'], 'client_id': incident_data['client_id']}
+                    )
+                )
+
+    def dump(self, data_file: str) -> None:
+        def encode(value: object) -> object:
+            return value.isoformat() if isinstance(value, datetime) else value
+
+        with self._lock:
+            incidents = [
+                {
+                    **{k: encode(v) for k, v in asdict(incident).items()},
+                    'history': [
+                        {k: encode(v) for k, v in asdict(x).items() if k not in {'incident_id', 'client_id'}}
+                        for x in self._histories.get(key, [])
+                    ],
+                }
+                for key, incident in self._incidents.items()
+            ]
+
+        Path(data_file).write_text(json.dumps({'incidents': incidents}))
+
+    def _notify(self, key: tuple[str, str]) -> None:
+        with self._lock:
+            incident = self._incidents.get(key)
+            listeners = list(self._listeners.get(key, []))
+
+        for on_change in listeners:
+            on_change(incident)
+
+    def _unindex(self, incident: Incident) -> None:
+        for index_key in index_keys(incident):
+            index = self._indexes[index_key]
+            index.remove(incident)
+            # Indexes of listings that became empty are dropped, so they don't pile up as incidents are reassigned
+            if len(index) == 0:
+                del self._indexes[index_key]
+
+    def put(self, incident: Incident) -> None:
+        key = (incident.client_id, incident.id)
+
+        with self._lock:
+            previous = self._incidents.get(key)
+            if previous is not None:
+                self._unindex(previous)
+
+            self._incidents[key] = incident
+            for index_key in index_keys(incident):
+                self._indexes.setdefault(index_key, IncidentIndex()).add(incident)
+
+        self._notify(key)
+
+    def delete(self, client_id: str, incident_id: str) -> None:
+        key = (client_id, incident_id)
+
+        with self._lock:
+            incident = self._incidents.pop(key, None)
+            if incident is None:
+                return
+
+            self._histories.pop(key, None)
+            self._unindex(incident)
+
+        self._notify(key)
+
+    def add_history_entry(self, entry: HistoryEntry) -> None:
+        key = (entry.client_id, entry.incident_id)
+
+        with self._lock:
+            insort(self._histories.setdefault(key, []), entry, key=lambda x: x.seq)
+
+        # The listeners of the incident are told about new entries, as the document changes along with its history
+        self._notify(key)
+
+    def _page(
+        self,
+        index_key: IndexKey,
+        sort: IncidentSort,
+        offset: int | None,
+        limit: int | None,
+        start_after: IncidentCursor | None,
+    ) -> list[Incident]:
+        with self._lock:
+            index = self._indexes.get(index_key)
+            if index is None:
+                return []
+
+            return [self._incidents[(index_key.client_id, x)] for x in index.page(sort, offset, limit, start_after)]
+
+    def _select(self, incidents: list[Incident], fields: Sequence[str]) -> Generator[PartialIncident, None, None]:
+        # Only the selected fields are set, as in the Firestore implementation
+        for incident in incidents:
+            selected: dict[str, Any] = {x: getattr(incident, x) for x in fields}
+            yield PartialIncident(
+                **{**selected, 'id': incident.id, 'client_id': incident.client_id, 'last_modified': incident.last_modified}
+            )
+
+    def get(self, client_id: str, incident_id: str) -> Incident | None:
+        with self._lock:
+            return self._incidents.get((client_id, incident_id))
+
+    def get_all_by_reporter(
+        self,
+        client_id: str,
+        reporter_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+    ) -> Generator[Incident, None, None]:
+        index_key = IndexKey(client_id, 'reported_by', reporter_id)
+        yield from self._page(index_key, IncidentSort.LAST_MODIFIED, offset, limit, start_after)
+
+    def select_all_by_reporter(  # noqa: PLR0913
+        self,
+        client_id: str,
+        reporter_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+    ) -> Generator[PartialIncident, None, None]:
+        index_key = IndexKey(client_id, 'reported_by', reporter_id)
+        return self._select(self._page(index_key, IncidentSort.LAST_MODIFIED, offset, limit, start_after), fields)
+
+    def get_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> Generator[Incident, None, None]:
+        index_key = IndexKey(client_id, 'assigned_to', assignee_id, filters or IncidentFilter())
+        yield from self._page(index_key, sort, offset, limit, start_after)
+
+    def select_all_by_assignee(  # noqa: PLR0913
+        self,
+        client_id: str,
+        assignee_id: str,
+        fields: Sequence[str],
+        offset: int | None = None,
+        limit: int | None = None,
+        start_after: IncidentCursor | None = None,
+        filters: IncidentFilter | None = None,
+        sort: IncidentSort = IncidentSort.LAST_MODIFIED,
+    ) -> Generator[PartialIncident, None, None]:
+        index_key = IndexKey(client_id, 'assigned_to', assignee_id, filters or IncidentFilter())
+        return self._select(self._page(index_key, sort, offset, limit, start_after), fields)
+
+    def count_by_assignee(self, client_id: str, assignee_id: str, filters: IncidentFilter | None = None) -> int:
+        with self._lock:
+            index = self._indexes.get(IndexKey(client_id, 'assigned_to', assignee_id, filters or IncidentFilter()))
+            return 0 if index is None else len(index)
+
+    def get_history(self, client_id: str, incident_id: str) -> Generator[HistoryEntry, None, None]:
+        with self._lock:
+            history = list(self._histories.get((client_id, incident_id), []))
+
+        yield from history
+
+    def get_histories(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, list[HistoryEntry]]:
+        return {x: list(self.get_history(client_id, x)) for x in incident_ids}
+
+    def get_summary(self, client_id: str, incident_id: str) -> HistorySummary | None:
+        with self._lock:
+            return history_summary(client_id, incident_id, self._histories.get((client_id, incident_id), []))
+
+    def get_summaries(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, HistorySummary]:
+        summaries = {x: self.get_summary(client_id, x) for x in incident_ids}
+        return {k: v for k, v in summaries.items() if v is not None}
+
+    def get_last_seq(self, client_id: str, incident_id: str) -> int | None:
+        with self._lock:
+            history = self._histories.get((client_id, incident_id))
+            return history[-1].seq if history else None
+
+    def get_last_seqs(self, client_id: str, incident_ids: Sequence[str]) -> dict[str, int]:
+        seqs = {x: self.get_last_seq(client_id, x) for x in incident_ids}
+        return {k: v for k, v in seqs.items() if v is not None}
+
+    def get_all_by_client(
+        self, client_id: str, limit: int | None = None, start_after: IncidentCursor | None = None
+    ) -> Generator[Incident, None, None]:
+        yield from self._page(IndexKey(client_id), IncidentSort.LAST_MODIFIED, None, limit, start_after)
+
+    def watch(self, client_id: str, incident_id: str, on_change: Callable[[Incident | None], None]) -> Callable[[], None]:
+        key = (client_id, incident_id)
+
+        with self._lock:
+            self._listeners.setdefault(key, []).append(on_change)
+            incident = self._incidents.get(key)
+
+        # Like Firestore listeners, the first notification is the current state
+        on_change(incident)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                listeners = self._listeners.get(key, [])
+                if on_change in listeners:
+                    listeners.remove(on_change)
+                if len(listeners) == 0:
+                    self._listeners.pop(key, None)
+
+        return unsubscribe
@@ -1,6 +1,25 @@
-from .client import RestClientRepository
-from .employee import RestEmployeeRepository
-from .user import RestUserRepository
+from .client import AsyncRestClientRepository, RestClientRepository
+from .employee import AsyncRestEmployeeRepository, RestEmployeeRepository
+from .resilience import CircuitBreaker, CircuitOpenError, CircuitState, Upstream
+from .session import PooledSession, client_session_resource, pooled_client_session
+from .token import CachingTokenProvider
+from .user import AsyncRestUserRepository, RestUserRepository
 from .util import TokenProvider
 
-__all__ = ['RestEmployeeRepository', 'RestUserRepository', 'TokenProvider', 'RestClientRepository']
+__all__ = [
+    'AsyncRestClientRepository',
+    'AsyncRestEmployeeRepository',
+    'AsyncRestUserRepository',
+    'CachingTokenProvider',
+    'CircuitBreaker',
+    'CircuitOpenError',
+    'CircuitState',
+    'PooledSession',
+    'RestEmployeeRepository',
+    'RestUserRepository',
+    'TokenProvider',
+    'Upstream',
+    'RestClientRepository',
+    'client_session_resource',
+    'pooled_client_session',
+]
@@ -1,15 +1,35 @@
+import asyncio
 import logging
-from typing import Never
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, Never, TypeVar
 
+import aiohttp
 import requests
 
+from concurrency import FanOutExecutor
+
+from .resilience import Upstream
+from .session import PooledSession, pooled_client_session
 from .util import TokenProvider
 
+T = TypeVar('T')
+
 
 class RestBaseRepository:
-    def __init__(self, base_url: str, token_provider: TokenProvider | None) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        token_provider: TokenProvider | None,
+        session: requests.Session | None = None,
+        executor: FanOutExecutor | None = None,
+        upstream: Upstream | None = None,
+    ) -> None:
         self.base_url = base_url
         self.token_provider = token_provider
+        self.session = session or PooledSession()
+        self.executor = executor or FanOutExecutor()
+        # Circuit breaker and hedging of the requests, shared with the other repositories calling the same service
+        self.upstream = upstream
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def _get_headers(self) -> dict[str, str] | None:
@@ -22,9 +42,108 @@ class RestBaseRepository:
         return headers
 
     def authenticated_get(self, url: str) -> requests.Response:
-        return requests.get(url, timeout=2, headers=self._get_headers())
+        headers = self._get_headers()
+
+        def get() -> requests.Response:
+            return self.session.get(url, timeout=2, headers=headers)
+
+        if self.upstream is None:
+            return get()
+
+        # Server errors count as failures of the upstream service, a missing resource does not
+        return self.upstream.call(get, lambda resp: resp.status_code >= 500)  # noqa: PLR2004
+
+    def fetch_many(self, ids: Iterable[str], fetch: Callable[[str], T | None]) -> dict[str, T]:
+        # The upstream services have no batch endpoint, so fetch each distinct id concurrently on the shared executor
+        unique_ids = list(dict.fromkeys(ids))
+
+        results = [fetch(x) for x in unique_ids] if len(unique_ids) <= 1 else self.executor.map(fetch, unique_ids)
+
+        return {k: v for k, v in zip(unique_ids, results, strict=True) if v is not None}
 
     def unexpected_error(self, resp: requests.Response) -> Never:
         resp.raise_for_status()
 
         raise requests.HTTPError('Unexpected response from server', response=resp)
+
+
+class AsyncRestBaseRepository:
+    def __init__(
+        self,
+        base_url: str,
+        token_provider: TokenProvider | None,
+        session: aiohttp.ClientSession | None = None,
+        max_concurrency: int = 8,
+        upstream: Upstream | None = None,
+    ) -> None:
+        self.base_url = base_url
+        self.token_provider = token_provider
+        self._session = session
+        self.max_concurrency = max_concurrency
+        self.upstream = upstream
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # Created on first use, a client session has to be created inside the event loop that runs it
+        if self._session is None:
+            self._session = pooled_client_session()
+        return self._session
+
+    async def _get_headers(self) -> dict[str, str] | None:
+        if self.token_provider is None:
+            return None
+
+        # Token providers are blocking, they only do I/O when the cached token has to be refreshed
+        id_token = await asyncio.to_thread(self.token_provider.get_token)
+        return {'Authorization': f'Bearer {id_token}'}
+
+    async def authenticated_get_json(self, url: str) -> Any | None:  # noqa: ANN401
+        # Returns the decoded body of a successful response, or None if the resource does not exist
+        headers = await self._get_headers()
+
+        async def get() -> tuple[int, Any | None, aiohttp.ClientResponseError | None]:
+            # Unexpected responses are returned instead of raised, so the circuit breaker can tell them apart from the
+            # requests that did not get a response
+            async with self.session.get(url, headers=headers) as resp:
+                if resp.status == requests.codes.ok:
+                    return resp.status, await resp.json(), None
+
+                if resp.status == requests.codes.not_found:
+                    return resp.status, None, None
+
+                try:
+                    resp.raise_for_status()
+                except aiohttp.ClientResponseError as e:
+                    return resp.status, None, e
+
+                return (
+                    resp.status,
+                    None,
+                    aiohttp.ClientResponseError(
+                        resp.request_info, resp.history, status=resp.status, message='Unexpected response from server'
+                    ),
+                )
+
+        if self.upstream is None:
+            _, body, error = await get()
+        else:
+            _, body, error = await self.upstream.call_async(get, lambda x: x[0] >= 500)  # noqa: PLR2004
+
+        if error is not None:
+            raise error
+
+        return body
+
+    async def fetch_many(self, ids: Iterable[str], fetch: Callable[[str], Awaitable[T | None]]) -> dict[str, T]:
+        unique_ids = list(dict.fromkeys(ids))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded_fetch(id_: str) -> T | None:
+            async with semaphore:
+                return await fetch(id_)
+
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(bounded_fetch(x)) for x in unique_ids]
+
+        return {k: v for k, v in zip(unique_ids, (x.result() for x in tasks), strict=True) if v is not None}
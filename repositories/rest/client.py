@@ -1,32 +1,66 @@
 from typing import Any, cast
 
+import aiohttp
 import dacite
 import requests
 
+from concurrency import FanOutExecutor
+from metrics import observed_methods
 from models import Client
-from repositories.client import ClientRepository
-from repositories.rest.base import RestBaseRepository
+from repositories.client import AsyncClientRepository, ClientRepository
+from repositories.rest.base import AsyncRestBaseRepository, RestBaseRepository
+from timing import timed_methods
 
+from .resilience import Upstream
 from .util import TokenProvider
 
 
+def json_to_client(json: dict[str, Any]) -> Client:
+    # Convert from json naming convention to Python naming convention
+    json['email_incidents'] = json.pop('emailIncidents')
+    return dacite.from_dict(
+        data_class=Client,
+        data=json,
+    )
+
+
+@observed_methods('rest_client')
+@timed_methods('client-svc')
 class RestClientRepository(ClientRepository, RestBaseRepository):
-    def __init__(self, base_url: str, token_provider: TokenProvider | None) -> None:
-        RestBaseRepository.__init__(self, base_url, token_provider)
+    def __init__(
+        self,
+        base_url: str,
+        token_provider: TokenProvider | None,
+        session: requests.Session | None = None,
+        executor: FanOutExecutor | None = None,
+        upstream: Upstream | None = None,
+    ) -> None:
+        RestBaseRepository.__init__(self, base_url, token_provider, session, executor, upstream)
 
     def get(self, client_id: str) -> Client | None:
         resp = self.authenticated_get(f'{self.base_url}/api/v1/clients/{client_id}')
 
         if resp.status_code == requests.codes.ok:
-            json = cast(dict[str, Any], resp.json())
-            # Convert from json naming convention to Python naming convention
-            json['email_incidents'] = json.pop('emailIncidents')
-            return dacite.from_dict(
-                data_class=Client,
-                data=json,
-            )
+            return json_to_client(cast(dict[str, Any], resp.json()))
 
         if resp.status_code == requests.codes.not_found:
             return None
 
         self.unexpected_error(resp)  # noqa: RET503
+
+
+@observed_methods('rest_client')
+@timed_methods('client-svc')
+class AsyncRestClientRepository(AsyncClientRepository, AsyncRestBaseRepository):
+    def __init__(
+        self,
+        base_url: str,
+        token_provider: TokenProvider | None,
+        session: aiohttp.ClientSession | None = None,
+        upstream: Upstream | None = None,
+    ) -> None:
+        AsyncRestBaseRepository.__init__(self, base_url, token_provider, session, upstream=upstream)
+
+    async def get(self, client_id: str) -> Client | None:
+        json = await self.authenticated_get_json(f'{self.base_url}/api/v1/clients/{client_id}')
+        return None if json is None else json_to_client(json)
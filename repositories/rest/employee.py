@@ -1,37 +1,79 @@
 import datetime
+from collections.abc import Iterable
 from enum import Enum
 from typing import Any, cast
 
+import aiohttp
 import dacite
 import requests
 
+from concurrency import FanOutExecutor
+from metrics import observed_methods
 from models import Employee
-from repositories import EmployeeRepository
+from repositories import AsyncEmployeeRepository, EmployeeRepository
+from timing import timed_methods
 
-from .base import RestBaseRepository
+from .base import AsyncRestBaseRepository, RestBaseRepository
+from .resilience import Upstream
 from .util import TokenProvider
 
 
+def json_to_employee(json: dict[str, Any]) -> Employee:
+    # Convert from json naming convention to Python naming convention
+    json['client_id'] = json.pop('clientId')
+    json['invitation_status'] = json.pop('invitationStatus')
+    json['invitation_date'] = json.pop('invitationDate')
+    return dacite.from_dict(
+        data_class=Employee,
+        data=json,
+        config=dacite.Config(cast=[Enum], type_hooks={datetime.datetime: datetime.datetime.fromisoformat}),
+    )
+
+
+@observed_methods('rest_employee')
+@timed_methods('client-svc')
 class RestEmployeeRepository(EmployeeRepository, RestBaseRepository):
-    def __init__(self, base_url: str, token_provider: TokenProvider | None) -> None:
-        RestBaseRepository.__init__(self, base_url, token_provider)
+    def __init__(
+        self,
+        base_url: str,
+        token_provider: TokenProvider | None,
+        session: requests.Session | None = None,
+        executor: FanOutExecutor | None = None,
+        upstream: Upstream | None = None,
+    ) -> None:
+        RestBaseRepository.__init__(self, base_url, token_provider, session, executor, upstream)
 
     def get(self, employee_id: str, client_id: str) -> Employee | None:
         resp = self.authenticated_get(f'{self.base_url}/api/v1/employees/{client_id}/{employee_id}')
 
         if resp.status_code == requests.codes.ok:
-            json = cast(dict[str, Any], resp.json())
-            # Convert from json naming convention to Python naming convention
-            json['client_id'] = json.pop('clientId')
-            json['invitation_status'] = json.pop('invitationStatus')
-            json['invitation_date'] = json.pop('invitationDate')
-            return dacite.from_dict(
-                data_class=Employee,
-                data=json,
-                config=dacite.Config(cast=[Enum], type_hooks={datetime.datetime: datetime.datetime.fromisoformat}),
-            )
+            return json_to_employee(cast(dict[str, Any], resp.json()))
 
         if resp.status_code == requests.codes.not_found:
             return None
 
         self.unexpected_error(resp)  # noqa: RET503
+
+    def get_many(self, employee_ids: Iterable[str], client_id: str) -> dict[str, Employee]:
+        return self.fetch_many(employee_ids, lambda employee_id: self.get(employee_id, client_id))
+
+
+@observed_methods('rest_employee')
+@timed_methods('client-svc')
+class AsyncRestEmployeeRepository(AsyncEmployeeRepository, AsyncRestBaseRepository):
+    def __init__(
+        self,
+        base_url: str,
+        token_provider: TokenProvider | None,
+        session: aiohttp.ClientSession | None = None,
+        max_concurrency: int = 8,
+        upstream: Upstream | None = None,
+    ) -> None:
+        AsyncRestBaseRepository.__init__(self, base_url, token_provider, session, max_concurrency, upstream)
+
+    async def get(self, employee_id: str, client_id: str) -> Employee | None:
+        json = await self.authenticated_get_json(f'{self.base_url}/api/v1/employees/{client_id}/{employee_id}')
+        return None if json is None else json_to_employee(json)
+
+    async def get_many(self, employee_ids: Iterable[str], client_id: str) -> dict[str, Employee]:
+        return await self.fetch_many(employee_ids, lambda employee_id: self.get(employee_id, client_id))
@@ -0,0 +1,255 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from enum import IntEnum
+from typing import TypeVar
+
+import requests
+
+from metrics import UPSTREAM_CIRCUIT_STATE, UPSTREAM_HEDGES, UPSTREAM_REJECTED
+
+T = TypeVar('T')
+
+
+class CircuitState(IntEnum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitOpenError(requests.ConnectionError):
+    # Raised instead of sending a request to an upstream service that keeps failing
+    pass
+
+
+class CircuitBreaker:
+    # Opens after failure_threshold consecutive failures, so requests fail fast instead of waiting for their timeout.
+    # Once reset_timeout has passed a single probe request is let through: it closes the circuit if it succeeds, and
+    # opens it again if it fails.
+    def __init__(
+        self, name: str, failure_threshold: int = 5, reset_timeout: float = 10.0, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        UPSTREAM_CIRCUIT_STATE.set(self.state, name)
+
+    def _transition(self, state: CircuitState) -> None:
+        self.state = state
+        self._probing = False
+        UPSTREAM_CIRCUIT_STATE.set(state, self.name)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CircuitState.OPEN:
+                if self.clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._transition(CircuitState.HALF_OPEN)
+
+            if self.state == CircuitState.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self.state != CircuitState.CLOSED:
+                self._transition(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == CircuitState.HALF_OPEN or (
+                self.state == CircuitState.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = self.clock()
+                self._transition(CircuitState.OPEN)
+
+
+class Upstream:
+    # Shared by the repositories calling the same service: its circuit breaker, and the latency of its recent responses
+    # used for hedging. When the request is still running after the hedge_percentile of those latencies, a second
+    # identical one is sent and the first of them to succeed answers the call. Hedged requests are sent from a small
+    # pool of the upstream and never wait on the shared executor, so calls made from its tasks cannot exhaust it. When
+    # every thread of that pool is busy, the request is sent from the calling thread without a hedge. Hedging is
+    # disabled when hedge_percentile is None.
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        hedge_percentile: float | None = None,
+        min_hedge_delay: float = 0.01,
+        max_hedge_delay: float = 1.0,
+        hedge_workers: int = 16,
+        timeout: float = 5.0,
+        window: int = 256,
+        min_samples: int = 20,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout, clock)
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        # Longest wait for the answer of a hedged call, on top of the timeout of the requests themselves
+        self.timeout = timeout
+        self.min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(hedge_workers)
+        self._pool = (
+            None
+            if hedge_percentile is None
+            else ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix=f'upstream-{name}')
+        )
+
+    def hedge_delay(self) -> float | None:
+        if self.hedge_percentile is None:
+            return None
+
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        # Until enough responses have been seen, only requests slower than the longest delay are hedged
+        if len(latencies) < max(self.min_samples, 1):
+            return self.max_hedge_delay
+
+        delay = latencies[min(int(len(latencies) * self.hedge_percentile / 100), len(latencies) - 1)]
+        return min(max(delay, self.min_hedge_delay), self.max_hedge_delay)
+
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            UPSTREAM_REJECTED.inc(self.name)
+            raise CircuitOpenError(f'Circuit breaker of {self.name} is open')
+
+    def _record(self, latency: float | None) -> None:
+        # A single outcome per call, hedged or not, latency is None when the call failed
+        if latency is None:
+            self.breaker.record_failure()
+            return
+
+        self.breaker.record_success()
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _can_hedge(self) -> bool:
+        # A probe of a half-open circuit is never hedged. Unlike allow(), reading the state does not use up the probe.
+        return self.breaker.state == CircuitState.CLOSED
+
+    def _submit(self, fn: Callable[[], T]) -> Future[tuple[T, float]] | None:
+        # Sends the request from the pool of the upstream, the future is None when all of its threads are busy
+        if self._pool is None or not self._slots.acquire(blocking=False):
+            return None
+
+        def attempt() -> tuple[T, float]:
+            try:
+                start = time.perf_counter()
+                result = fn()
+                return result, time.perf_counter() - start
+            finally:
+                self._slots.release()
+
+        # Like the tasks of the executor, the requests see the context variables of the caller
+        context = contextvars.copy_context()
+        return self._pool.submit(context.run, attempt)
+
+    def call(self, fn: Callable[[], T], failed: Callable[[T], bool]) -> T:
+        # Sends the request with fn, failed tells which of its results count as failures for the circuit breaker
+        self._admit()
+
+        delay = self.hedge_delay()
+        primary = None if delay is None else self._submit(fn)
+        if primary is None:
+            start = time.perf_counter()
+            try:
+                result = fn()
+            except Exception:
+                self._record(None)
+                raise
+            self._record(None if failed(result) else time.perf_counter() - start)
+            return result
+
+        deadline = time.perf_counter() + self.timeout
+        attempts = [primary]
+        done, _ = wait(attempts, timeout=delay)
+        if not done and self._can_hedge() and (hedge := self._submit(fn)) is not None:
+            UPSTREAM_HEDGES.inc(self.name, 'fired')
+            attempts.append(hedge)
+
+        # The request left running once the other one has answered is not waited for, its answer is dropped
+        pending = set(attempts)
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.perf_counter(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for attempt in done:
+                if attempt.exception() is None and not failed(attempt.result()[0]):
+                    if attempt is not primary:
+                        UPSTREAM_HEDGES.inc(self.name, 'won')
+                    self._record(attempt.result()[1])
+                    return attempt.result()[0]
+
+        # Neither succeeded in time, the outcome of the first request is the one reported
+        self._record(None)
+        if not primary.done():
+            raise requests.Timeout(f'No answer from {self.name} after {self.timeout}s')
+        return primary.result()[0]
+
+    async def _timed_async(self, fn: Callable[[], Awaitable[T]]) -> tuple[T, float]:
+        start = time.perf_counter()
+        result = await fn()
+        return result, time.perf_counter() - start
+
+    async def call_async(self, fn: Callable[[], Awaitable[T]], failed: Callable[[T], bool]) -> T:
+        # Same as call, for the asyncio serving mode. Both requests run on the event loop, so the first of them to
+        # succeed is used and the other one is cancelled.
+        self._admit()
+
+        delay = self.hedge_delay()
+        if delay is None:
+            try:
+                result, latency = await self._timed_async(fn)
+            except Exception:
+                self._record(None)
+                raise
+            self._record(None if failed(result) else latency)
+            return result
+
+        primary = asyncio.create_task(self._timed_async(fn))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self._can_hedge():
+                UPSTREAM_HEDGES.inc(self.name, 'fired')
+                tasks.add(asyncio.create_task(self._timed_async(fn)))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and not failed(task.result()[0]):
+                        if task is not primary:
+                            UPSTREAM_HEDGES.inc(self.name, 'won')
+                        self._record(task.result()[1])
+                        return task.result()[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # Neither succeeded, the outcome of the first request is the one reported
+        self._record(None)
+        return (await primary)[0]
@@ -0,0 +1,56 @@
+from collections.abc import AsyncGenerator
+from typing import TypedDict
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PoolStats(TypedDict):
+    requests: int
+    connections: int
+    reused: int
+
+
+# Keeps connections to the upstream services alive and reuses them across requests and threads.
+# Each host gets a pool of up to pool_size connections, it should be at least the number of threads that can make
+# requests at the same time, otherwise the extra connections are closed after use instead of being kept alive.
+# The container sizes it from the executor workers and the request threads, its stats are exported as metrics.
+class PooledSession(requests.Session):
+    def __init__(self, pool_size: int = 16, max_hosts: int = 10) -> None:
+        super().__init__()
+        self.adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=pool_size)
+        self.mount('http://', self.adapter)
+        self.mount('https://', self.adapter)
+
+    def stats(self) -> PoolStats:
+        pools = self.adapter.poolmanager.pools
+        requests_count = 0
+        connections_count = 0
+
+        for key in pools.keys():  # noqa: SIM118
+            pool = pools.get(key)
+            if pool is not None:
+                requests_count += pool.num_requests
+                connections_count += pool.num_connections
+
+        return {
+            'requests': requests_count,
+            'connections': connections_count,
+            'reused': requests_count - connections_count,
+        }
+
+
+# Pooled client session for the asyncio serving mode, with the same request timeout as the blocking repositories
+def pooled_client_session(pool_size: int = 16) -> aiohttp.ClientSession:
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=0, limit_per_host=pool_size),
+        timeout=aiohttp.ClientTimeout(total=2),
+    )
+
+
+# Container resource for the session above, closed along with the application
+async def client_session_resource(pool_size: int = 16) -> AsyncGenerator[aiohttp.ClientSession, None]:
+    session = pooled_client_session(pool_size)
+    yield session
+    await session.close()
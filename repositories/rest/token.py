@@ -0,0 +1,88 @@
+import base64
+import binascii
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+from .util import TokenProvider
+
+
+def token_expiry(token: str) -> float | None:
+    # Reads the exp claim of a JWT, the signature is not verified as the token is only forwarded
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return float(claims['exp'])
+    except (IndexError, KeyError, TypeError, ValueError, binascii.Error):
+        return None
+
+
+# Caches the token of another provider until shortly before it expires.
+# Once the token enters its last refresh_margin seconds, a single background thread fetches a new one while callers
+# keep using the cached token. Callers only wait for the provider when there is no token or it is about to expire.
+# Tokens without an exp claim are kept for default_ttl seconds.
+class CachingTokenProvider:
+    # Seconds of validity a token must have left to be handed out without waiting for a new one
+    MIN_VALIDITY = 10
+    # Seconds between background refreshes when the provider keeps returning the same token or fails
+    RETRY_INTERVAL = 30
+
+    def __init__(
+        self,
+        token_provider: TokenProvider,
+        refresh_margin: float = 300,
+        default_ttl: float = 300,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.token_provider = token_provider
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._token: str | None = None
+        self._expiry = 0.0
+        self._refresh_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fetch(self) -> str:
+        token = self.token_provider.get_token()
+        now = self.clock()
+        expiry = token_expiry(token) or now + self.default_ttl
+
+        self._token, self._expiry = token, expiry
+        # Don't ask the provider again right away if it keeps handing out the same token
+        self._refresh_at = max(expiry - self.refresh_margin, now + self.RETRY_INTERVAL)
+        return token
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self._fetch()
+        except Exception:
+            self.logger.exception('Background token refresh failed')
+            self._refresh_at = self.clock() + self.RETRY_INTERVAL
+        finally:
+            self._lock.release()
+
+    def get_token(self) -> str:
+        token = self._token
+        now = self.clock()
+
+        if token is None or now >= self._expiry - self.MIN_VALIDITY:
+            with self._lock:
+                # Another thread may have refreshed the token while we were waiting
+                if self._token is not None and self.clock() < self._expiry - self.MIN_VALIDITY:
+                    return self._token
+
+                return self._fetch()
+
+        if now >= self._refresh_at and self._lock.acquire(blocking=False):
+            if self.clock() < self._refresh_at:
+                # Refreshed by another thread in the meantime
+                self._lock.release()
+            else:
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+        return token
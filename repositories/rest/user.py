@@ -1,29 +1,71 @@
+from collections.abc import Iterable
 from typing import Any, cast
 
+import aiohttp
 import dacite
 import requests
 
+from concurrency import FanOutExecutor
+from metrics import observed_methods
 from models import User
-from repositories import UserRepository
+from repositories import AsyncUserRepository, UserRepository
+from timing import timed_methods
 
-from .base import RestBaseRepository
+from .base import AsyncRestBaseRepository, RestBaseRepository
+from .resilience import Upstream
 from .util import TokenProvider
 
 
+def json_to_user(json: dict[str, Any]) -> User:
+    # Convert from json naming convention to Python naming convention
+    json['client_id'] = json.pop('clientId')
+    return dacite.from_dict(data_class=User, data=json)
+
+
+@observed_methods('rest_user')
+@timed_methods('user-svc')
 class RestUserRepository(UserRepository, RestBaseRepository):
-    def __init__(self, base_url: str, token_provider: TokenProvider | None) -> None:
-        RestBaseRepository.__init__(self, base_url, token_provider)
+    def __init__(
+        self,
+        base_url: str,
+        token_provider: TokenProvider | None,
+        session: requests.Session | None = None,
+        executor: FanOutExecutor | None = None,
+        upstream: Upstream | None = None,
+    ) -> None:
+        RestBaseRepository.__init__(self, base_url, token_provider, session, executor, upstream)
 
     def get(self, user_id: str, client_id: str) -> User | None:
         resp = self.authenticated_get(f'{self.base_url}/api/v1/users/{client_id}/{user_id}')
 
         if resp.status_code == requests.codes.ok:
-            json = cast(dict[str, Any], resp.json())
-            # Convert from json naming convention to Python naming convention
-            json['client_id'] = json.pop('clientId')
-            return dacite.from_dict(data_class=User, data=json)
+            return json_to_user(cast(dict[str, Any], resp.json()))
 
         if resp.status_code == requests.codes.not_found:
             return None
 
         self.unexpected_error(resp)  # noqa: RET503
+
+    def get_many(self, user_ids: Iterable[str], client_id: str) -> dict[str, User]:
+        return self.fetch_many(user_ids, lambda user_id: self.get(user_id, client_id))
+
+
+@observed_methods('rest_user')
+@timed_methods('user-svc')
+class AsyncRestUserRepository(AsyncUserRepository, AsyncRestBaseRepository):
+    def __init__(
+        self,
+        base_url: str,
+        token_provider: TokenProvider | None,
+        session: aiohttp.ClientSession | None = None,
+        max_concurrency: int = 8,
+        upstream: Upstream | None = None,
+    ) -> None:
+        AsyncRestBaseRepository.__init__(self, base_url, token_provider, session, max_concurrency, upstream)
+
+    async def get(self, user_id: str, client_id: str) -> User | None:
+        json = await self.authenticated_get_json(f'{self.base_url}/api/v1/users/{client_id}/{user_id}')
+        return None if json is None else json_to_user(json)
+
+    async def get_many(self, user_ids: Iterable[str], client_id: str) -> dict[str, User]:
+        return await self.fetch_many(user_ids, lambda user_id: self.get(user_id, client_id))
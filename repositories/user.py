@@ -1,6 +1,20 @@
+from collections.abc import Iterable
+
 from models import User
 
 
 class UserRepository:
     def get(self, user_id: str, client_id: str) -> User | None:
         raise NotImplementedError  # pragma: no cover
+
+    def get_many(self, user_ids: Iterable[str], client_id: str) -> dict[str, User]:
+        raise NotImplementedError  # pragma: no cover
+
+
+# Same contract as UserRepository, for the asyncio serving mode
+class AsyncUserRepository:
+    async def get(self, user_id: str, client_id: str) -> User | None:
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_many(self, user_ids: Iterable[str], client_id: str) -> dict[str, User]:
+        raise NotImplementedError  # pragma: no cover
@@ -52,6 +52,18 @@ resource "google_cloud_run_v2_service" "default" {
         value = "https://client-${data.google_project.default.number}.${local.region}.run.app"
       }
 
+      # Requests to the user and client services still waiting after the 95th percentile of their latency are sent again
+      env {
+        name = "HEDGE_PERCENTILE"
+        value = "95"
+      }
+
+      # Opens the connections to Firestore and the other services before the startup probe passes
+      env {
+        name = "ENABLE_WARMUP"
+        value = "1"
+      }
+
       startup_probe {
         http_get {
           path = "/api/v1/health/${local.service_name}"
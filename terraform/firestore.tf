@@ -13,3 +13,61 @@ resource "google_project_iam_member" "firestore" {
   role    = "roles/datastore.user"
   member  = google_service_account.service.member
 }
+
+locals {
+  # Filters of the employee incident list, each combination needs its own composite index
+  incident_list_filters = {
+    "none"         = []
+    "risk"         = ["risk"]
+    "channel"      = ["channel"]
+    "risk-channel" = ["risk", "channel"]
+  }
+
+  # Sorts of the employee incident list, the document name breaks ties so that pages don't overlap
+  incident_list_sorts = {
+    "last-modified" = { field = "last_modified", order = "DESCENDING" }
+    "name"          = { field = "name", order = "ASCENDING" }
+  }
+
+  incident_list_indexes = {
+    for pair in setproduct(keys(local.incident_list_filters), keys(local.incident_list_sorts)) :
+    "${pair[0]}-${pair[1]}" => {
+      filters = local.incident_list_filters[pair[0]]
+      sort    = local.incident_list_sorts[pair[1]]
+    }
+  }
+}
+
+# Composite indexes of the incidents assigned to an employee, filtered and sorted by the database.
+resource "google_firestore_index" "incidents_by_assignee" {
+  for_each = local.incident_list_indexes
+
+  project    = local.project_id
+  database   = local.database_name
+  collection = "incidents"
+
+  fields {
+    field_path = "assigned_to"
+    order      = "ASCENDING"
+  }
+
+  dynamic "fields" {
+    for_each = each.value.filters
+    content {
+      field_path = fields.value
+      order      = "ASCENDING"
+    }
+  }
+
+  fields {
+    field_path = each.value.sort.field
+    order      = each.value.sort.order
+  }
+
+  fields {
+    field_path = "__name__"
+    order      = each.value.sort.order
+  }
+
+  depends_on = [google_project_service.firestore]
+}
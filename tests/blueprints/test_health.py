@@ -1,4 +1,6 @@
+import os
 from unittest import TestCase
+from unittest.mock import patch
 
 from app import create_app
 
@@ -12,3 +14,30 @@ class TestHealth(TestCase):
         resp = self.client.get('/api/v1/health/incidentquery')
 
         self.assertEqual(resp.status_code, 200)
+
+    def test_metrics(self) -> None:
+        self.client.get('/api/v1/health/incidentquery')
+
+        resp = self.client.get('/api/v1/metrics/incidentquery')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content_type, 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertRegex(
+            resp.get_data(as_text=True),
+            r'incidentquery_request_duration_seconds_count'
+            r'\{endpoint="/api/v1/health/incidentquery",method="GET",status="200"\} \d+',
+        )
+
+    def test_metrics_resources(self) -> None:
+        resp = self.client.get('/api/v1/metrics/incidentquery')
+
+        self.assertRegex(resp.get_data(as_text=True), r'\nincidentquery_http_pool_connections \d+\n')
+        self.assertRegex(resp.get_data(as_text=True), r'\nincidentquery_executor\{stat="queued"\} \d+\n')
+
+    def test_metrics_incident_cache_listeners(self) -> None:
+        with patch.dict(os.environ, {'INCIDENT_CACHE_BACKEND': 'memory'}):
+            client = create_app().test_client()
+
+        resp = client.get('/api/v1/metrics/incidentquery')
+
+        self.assertRegex(resp.get_data(as_text=True), r'\nincidentquery_incident_cache_listeners 0\n')
@@ -1,17 +1,23 @@
 import base64
 import json
+import threading
+from collections.abc import Generator
 from typing import cast
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 from faker import Faker
 from unittest_parametrize import ParametrizedTestCase, parametrize
 from werkzeug.test import TestResponse
 
 from app import create_app
-from models import Action, Client, Employee, HistoryEntry, InvitationStatus, Role, User
-from repositories import EmployeeRepository, IncidentRepository, UserRepository
+from blueprints.incident import IncidentsByClient
+from blueprints.serializers import EMPLOYEE_INCIDENT_FIELDS, USER_INCIDENT_FIELDS
+from blueprints.util import encode_cursor, incidents_etag
+from concurrency import FanOutExecutor
+from models import Channel, Client, Employee, HistoryEntry, HistorySummary, Incident, InvitationStatus, Risk, Role, User
+from repositories import EmployeeRepository, IncidentFilter, IncidentRepository, IncidentSort, UserRepository
 from repositories.client import ClientRepository
-from tests.util import create_random_history_entry, create_random_incident
+from tests.util import create_random_history_entry, create_random_history_summary, create_random_incident, found_many
 
 from .util import gen_token
 
@@ -27,23 +33,33 @@ class TestIncident(ParametrizedTestCase):
         self.app = create_app()
         self.client = self.app.test_client()
 
-    def call_incident_api_user(self, token: dict[str, str] | None) -> TestResponse:
+    def call_incident_api_user(self, token: dict[str, str] | None, headers: dict[str, str] | None = None) -> TestResponse:
         if token is None:
             return self.client.get(self.INCIDENT_API_USER_URL)
 
         token_encoded = base64.urlsafe_b64encode(json.dumps(token).encode()).decode()
-        return self.client.get(self.INCIDENT_API_USER_URL, headers={'X-Apigateway-Api-Userinfo': token_encoded})
+        return self.client.get(
+            self.INCIDENT_API_USER_URL, headers={'X-Apigateway-Api-Userinfo': token_encoded, **(headers or {})}
+        )
 
     def call_incident_api_employee(
-        self, token: dict[str, str] | None, page_size: int | None = None, page_number: int | None = None
+        self,
+        token: dict[str, str] | None,
+        page_size: int | None = None,
+        page_number: int | None = None,
+        cursor: str | None = None,
+        filters: dict[str, str] | None = None,
     ) -> TestResponse:
-        params = {}
+        params: dict[str, int | str] = {**(filters or {})}
         if page_size is not None:
             params['page_size'] = page_size
 
         if page_number is not None:
             params['page_number'] = page_number
 
+        if cursor is not None:
+            params['cursor'] = cursor
+
         if token is None:
             return self.client.get(self.INCIDENT_API_EMPLOYEE_URL, query_string=params)
 
@@ -52,17 +68,22 @@ class TestIncident(ParametrizedTestCase):
             self.INCIDENT_API_EMPLOYEE_URL, headers={'X-Apigateway-Api-Userinfo': token_encoded}, query_string=params
         )
 
-    def call_incident_detail_api(self, token: dict[str, str] | None, incident_id: str) -> TestResponse:
+    def call_incident_detail_api(
+        self, token: dict[str, str] | None, incident_id: str, headers: dict[str, str] | None = None
+    ) -> TestResponse:
         if token is None:
             return self.client.get(self.INCIDENT_API_DETAIL_URL.format(incident_id=incident_id))
 
         token_encoded = base64.urlsafe_b64encode(json.dumps(token).encode()).decode()
         return self.client.get(
-            self.INCIDENT_API_DETAIL_URL.format(incident_id=incident_id), headers={'X-Apigateway-Api-Userinfo': token_encoded}
+            self.INCIDENT_API_DETAIL_URL.format(incident_id=incident_id),
+            headers={'X-Apigateway-Api-Userinfo': token_encoded, **(headers or {})},
         )
 
-    def call_incidents_by_client(self, client_id: str) -> TestResponse:
-        return self.client.get(self.INCIDENTS_BY_CLIENT_URL.format(client_id=client_id))
+    def call_incidents_by_client(
+        self, client_id: str, params: dict[str, str | int] | None = None, headers: dict[str, str] | None = None
+    ) -> TestResponse:
+        return self.client.get(self.INCIDENTS_BY_CLIENT_URL.format(client_id=client_id), query_string=params, headers=headers)
 
     def test_user_incidents_no_token(self) -> None:
         resp = self.call_incident_api_user(None)
@@ -118,12 +139,66 @@ class TestIncident(ParametrizedTestCase):
             ]
 
         incident_repo_mock = Mock(IncidentRepository)
-        cast(Mock, incident_repo_mock.get_all_by_reporter).return_value = (x for x in incidents)
-        cast(Mock, incident_repo_mock.get_history).side_effect = lambda client_id, incident_id: incident_history[incident_id]  # noqa: ARG005
+        cast(Mock, incident_repo_mock.select_all_by_reporter).return_value = (x for x in incidents)
+        cast(Mock, incident_repo_mock.get_histories).return_value = incident_history
         with self.app.container.incident_repo.override(incident_repo_mock):
             resp = self.call_incident_api_user(token)
 
+        cast(Mock, incident_repo_mock.select_all_by_reporter).assert_called_once_with(
+            client_id=client_id, reporter_id=user_id, fields=USER_INCIDENT_FIELDS
+        )
+        cast(Mock, incident_repo_mock.get_histories).assert_called_once_with(
+            client_id=client_id, incident_ids=[x.id for x in incidents]
+        )
+        cast(Mock, incident_repo_mock.get_history).assert_not_called()
+
         self.assertEqual(resp.status_code, 200)
+        resp_data = json.loads(resp.get_data())
+
+        self.assertEqual([x['id'] for x in resp_data], [x.id for x in incidents])
+        self.assertEqual([len(x['history']) for x in resp_data], [3, 3, 3])
+        # Repositories are mocked, so only the encoding is timed, once for the whole response
+        self.assertRegex(resp.headers['Server-Timing'], r'^serialize;dur=[\d.]+;desc="1 calls", total;dur=[\d.]+$')
+
+    @parametrize(
+        'current',
+        [
+            (True,),
+            (False,),
+        ],
+    )
+    def test_user_incidents_if_none_match(self, current: bool) -> None:  # noqa: FBT001
+        client_id = cast(str, self.faker.uuid4())
+        user_id = cast(str, self.faker.uuid4())
+
+        token = gen_token(user_id=user_id, client_id=client_id, role=Role.USER, assigned=True)
+
+        incidents = [create_random_incident(self.faker, client_id=client_id, reported_by=user_id) for _ in range(2)]
+        histories = {
+            x.id: [create_random_history_entry(self.faker, seq=i, client_id=client_id, incident_id=x.id) for i in range(3)]
+            for x in incidents
+        }
+        etag = incidents_etag((x.id, x.last_modified, 2) for x in incidents)
+
+        incident_repo_mock = Mock(IncidentRepository)
+        cast(Mock, incident_repo_mock.select_all_by_reporter).side_effect = lambda **_: (x for x in incidents)
+        cast(Mock, incident_repo_mock.get_last_seqs).return_value = {x.id: 2 for x in incidents}
+        cast(Mock, incident_repo_mock.get_histories).return_value = histories
+        with self.app.container.incident_repo.override(incident_repo_mock):
+            resp = self.call_incident_api_user(token, headers={'If-None-Match': f'"{etag if current else "stale"}"'})
+
+        self.assertEqual(resp.headers['ETag'], f'"{etag}"')
+
+        if current:
+            self.assertEqual(resp.status_code, 304)
+            # Only the versions of the incidents are read
+            cast(Mock, incident_repo_mock.select_all_by_reporter).assert_called_once_with(
+                client_id=client_id, reporter_id=user_id, fields=()
+            )
+            cast(Mock, incident_repo_mock.get_histories).assert_not_called()
+        else:
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual([x['id'] for x in json.loads(resp.get_data())], [x.id for x in incidents])
 
     def test_employee_incidents(self) -> None:
         client_id = cast(str, self.faker.uuid4())
@@ -145,33 +220,343 @@ class TestIncident(ParametrizedTestCase):
 
         incidents = [
             create_random_incident(self.faker, client_id=client_id, assigned_to=employee_id, reported_by=user.id)
-            for _ in range(3)
+            for _ in range(5)
         ]
 
-        incident_history: dict[str, list[HistoryEntry]] = {}
-
-        for incident in incidents:
-            incident_history[incident.id] = [
-                create_random_history_entry(self.faker, seq=i, client_id=incident.client_id, incident_id=incident.id)
-                for i in range(4)
-            ]
-
-        incident_history[incidents[0].id][-1].action = Action.AI_RESPONSE
+        summaries = {
+            incident.id: create_random_history_summary(self.faker, client_id=client_id, incident_id=incident.id)
+            for incident in incidents
+        }
 
         user_repo_mock = Mock(UserRepository)
-        cast(Mock, user_repo_mock.get).return_value = user
+        cast(Mock, user_repo_mock.get_many).return_value = {user.id: user}
 
         incident_repo_mock = Mock(IncidentRepository)
         cast(Mock, incident_repo_mock.count_by_assignee).return_value = len(incidents)
-        cast(Mock, incident_repo_mock.get_all_by_assignee).return_value = (x for x in incidents)
-        cast(Mock, incident_repo_mock.get_history).side_effect = lambda client_id, incident_id: incident_history[incident_id]  # noqa: ARG005
+        cast(Mock, incident_repo_mock.select_all_by_assignee).return_value = (x for x in incidents)
+        cast(Mock, incident_repo_mock.get_summaries).return_value = summaries
         with (
             self.app.container.incident_repo.override(incident_repo_mock),
             self.app.container.user_repo.override(user_repo_mock),
         ):
             resp = self.call_incident_api_employee(token, page_size=20, page_number=1)
 
+        cast(Mock, incident_repo_mock.count_by_assignee).assert_called_once_with(
+            client_id=client_id, assignee_id=employee_id, filters=IncidentFilter()
+        )
+        # The summaries are looked up in batches that grow as the page streams in, and the shared reporter only once
+        self.assertEqual(
+            [x.kwargs['incident_ids'] for x in cast(Mock, incident_repo_mock.get_summaries).call_args_list],
+            [[incidents[0].id], [incidents[1].id], [incidents[2].id, incidents[3].id], [incidents[4].id]],
+        )
+        cast(Mock, user_repo_mock.get_many).assert_called_once_with([user.id], client_id)
+        cast(Mock, user_repo_mock.get).assert_not_called()
+        cast(Mock, incident_repo_mock.get_summary).assert_not_called()
+        cast(Mock, incident_repo_mock.get_history).assert_not_called()
+        cast(Mock, incident_repo_mock.get_histories).assert_not_called()
+
         self.assertEqual(resp.status_code, 200)
+        resp_data = json.loads(resp.get_data())
+
+        for incident, incident_dict in zip(incidents, resp_data['incidents'], strict=True):
+            summary = summaries[incident.id]
+            self.assertEqual(incident_dict['status'], summary.status)
+            self.assertEqual(incident_dict['filingDate'], summary.filing_date.isoformat().replace('+00:00', 'Z'))
+            self.assertEqual(incident_dict['reportedBy']['id'], user.id)
+
+    def test_employee_incidents_pipelined(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        employee_id = cast(str, self.faker.uuid4())
+
+        token = gen_token(
+            user_id=employee_id,
+            client_id=client_id,
+            role=Role.AGENT,
+            assigned=True,
+        )
+
+        incidents = [create_random_incident(self.faker, client_id=client_id, assigned_to=employee_id) for _ in range(2)]
+        looked_up = threading.Event()
+        looked_up_while_streaming: list[bool] = []
+        looked_up_while_counting: list[bool] = []
+
+        def stream_page(**_: object) -> Generator[Incident, None, None]:
+            yield incidents[0]
+            # The next document only arrives after the lookups of the first one have started
+            looked_up_while_streaming.append(looked_up.wait(5))
+            yield incidents[1]
+
+        def count_by_assignee(**_: object) -> int:
+            # The count only returns once the lookups of the page have started
+            looked_up_while_counting.append(looked_up.wait(5))
+            return len(incidents)
+
+        def get_summaries(client_id: str, incident_ids: list[str]) -> dict[str, HistorySummary]:
+            looked_up.set()
+            return {x: create_random_history_summary(self.faker, client_id=client_id, incident_id=x) for x in incident_ids}
+
+        user_repo_mock = Mock(UserRepository)
+        cast(Mock, user_repo_mock.get_many).side_effect = lambda user_ids, client_id: {
+            x: User(id=x, client_id=client_id, name=self.faker.name(), email=self.faker.email()) for x in user_ids
+        }
+
+        incident_repo_mock = Mock(IncidentRepository)
+        cast(Mock, incident_repo_mock.count_by_assignee).side_effect = count_by_assignee
+        cast(Mock, incident_repo_mock.select_all_by_assignee).side_effect = stream_page
+        cast(Mock, incident_repo_mock.get_summaries).side_effect = get_summaries
+        with (
+            self.app.container.incident_repo.override(incident_repo_mock),
+            self.app.container.user_repo.override(user_repo_mock),
+        ):
+            resp = self.call_incident_api_employee(token)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(looked_up_while_streaming, [True])
+        self.assertEqual(looked_up_while_counting, [True])
+        self.assertEqual([x['id'] for x in json.loads(resp.get_data())['incidents']], [x.id for x in incidents])
+
+    def test_employee_incidents_no_history(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        employee_id = cast(str, self.faker.uuid4())
+
+        token = gen_token(
+            user_id=employee_id,
+            client_id=client_id,
+            role=Role.AGENT,
+            assigned=True,
+        )
+
+        incident = create_random_incident(self.faker, client_id=client_id, assigned_to=employee_id)
+        user = User(
+            id=incident.reported_by,
+            client_id=client_id,
+            name=self.faker.name(),
+            email=self.faker.email(),
+        )
+
+        user_repo_mock = Mock(UserRepository)
+        cast(Mock, user_repo_mock.get_many).return_value = {user.id: user}
+
+        incident_repo_mock = Mock(IncidentRepository)
+        cast(Mock, incident_repo_mock.count_by_assignee).return_value = 1
+        cast(Mock, incident_repo_mock.select_all_by_assignee).return_value = (x for x in [incident])
+        cast(Mock, incident_repo_mock.get_summaries).return_value = {}
+        with (
+            self.app.container.incident_repo.override(incident_repo_mock),
+            self.app.container.user_repo.override(user_repo_mock),
+            self.assertLogs(),
+        ):
+            resp = self.call_incident_api_employee(token)
+
+        self.assertEqual(resp.status_code, 500)
+
+    def test_employee_incidents_user_not_found(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        employee_id = cast(str, self.faker.uuid4())
+
+        token = gen_token(
+            user_id=employee_id,
+            client_id=client_id,
+            role=Role.AGENT,
+            assigned=True,
+        )
+
+        incident = create_random_incident(self.faker, client_id=client_id, assigned_to=employee_id)
+        summary = create_random_history_summary(self.faker, client_id=client_id, incident_id=incident.id)
+
+        user_repo_mock = Mock(UserRepository)
+        cast(Mock, user_repo_mock.get_many).return_value = {}
+
+        incident_repo_mock = Mock(IncidentRepository)
+        cast(Mock, incident_repo_mock.count_by_assignee).return_value = 1
+        cast(Mock, incident_repo_mock.select_all_by_assignee).return_value = (x for x in [incident])
+        cast(Mock, incident_repo_mock.get_summaries).return_value = {incident.id: summary}
+        with (
+            self.app.container.incident_repo.override(incident_repo_mock),
+            self.app.container.user_repo.override(user_repo_mock),
+            self.assertLogs(),
+        ):
+            resp = self.call_incident_api_employee(token)
+
+        self.assertEqual(resp.status_code, 500)
+
+    @parametrize(
+        ['returned', 'has_next'],
+        [
+            (5, True),
+            (2, False),
+        ],
+    )
+    def test_employee_incidents_cursor(self, returned: int, has_next: bool) -> None:  # noqa: FBT001
+        client_id = cast(str, self.faker.uuid4())
+        employee_id = cast(str, self.faker.uuid4())
+
+        user = User(
+            id=cast(str, self.faker.uuid4()),
+            client_id=client_id,
+            name=self.faker.name(),
+            email=self.faker.email(),
+        )
+
+        token = gen_token(
+            user_id=employee_id,
+            client_id=client_id,
+            role=Role.AGENT,
+            assigned=True,
+        )
+
+        previous = create_random_incident(self.faker, client_id=client_id, assigned_to=employee_id, reported_by=user.id)
+        incidents = [
+            create_random_incident(self.faker, client_id=client_id, assigned_to=employee_id, reported_by=user.id)
+            for _ in range(returned)
+        ]
+
+        summaries = {
+            incident.id: create_random_history_summary(self.faker, client_id=client_id, incident_id=incident.id)
+            for incident in incidents
+        }
+
+        user_repo_mock = Mock(UserRepository)
+        cast(Mock, user_repo_mock.get_many).return_value = {user.id: user}
+
+        incident_repo_mock = Mock(IncidentRepository)
+        cast(Mock, incident_repo_mock.count_by_assignee).return_value = 10
+        cast(Mock, incident_repo_mock.select_all_by_assignee).return_value = (x for x in incidents)
+        cast(Mock, incident_repo_mock.get_summaries).return_value = summaries
+        with (
+            self.app.container.incident_repo.override(incident_repo_mock),
+            self.app.container.user_repo.override(user_repo_mock),
+        ):
+            resp = self.call_incident_api_employee(token, page_size=5, page_number=2, cursor=encode_cursor(previous))
+
+        cast(Mock, incident_repo_mock.select_all_by_assignee).assert_called_once_with(
+            client_id=client_id,
+            assignee_id=employee_id,
+            fields=EMPLOYEE_INCIDENT_FIELDS,
+            offset=None,
+            limit=5,
+            start_after=(previous.last_modified, previous.id),
+            filters=IncidentFilter(),
+            sort=IncidentSort.LAST_MODIFIED,
+        )
+
+        self.assertEqual(resp.status_code, 200)
+        resp_data = json.loads(resp.get_data())
+
+        self.assertEqual([x['id'] for x in resp_data['incidents']], [x.id for x in incidents])
+        self.assertEqual(resp_data['nextCursor'], encode_cursor(incidents[-1]) if has_next else None)
+
+    def test_employee_incidents_filtered(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        employee_id = cast(str, self.faker.uuid4())
+
+        user = User(id=cast(str, self.faker.uuid4()), client_id=client_id, name=self.faker.name(), email=self.faker.email())
+
+        token = gen_token(
+            user_id=employee_id,
+            client_id=client_id,
+            role=Role.AGENT,
+            assigned=True,
+        )
+
+        incidents = [
+            create_random_incident(self.faker, client_id=client_id, assigned_to=employee_id, reported_by=user.id)
+            for _ in range(5)
+        ]
+
+        summaries = {
+            incident.id: create_random_history_summary(self.faker, client_id=client_id, incident_id=incident.id)
+            for incident in incidents
+        }
+
+        user_repo_mock = Mock(UserRepository)
+        cast(Mock, user_repo_mock.get_many).return_value = {user.id: user}
+
+        incident_repo_mock = Mock(IncidentRepository)
+        cast(Mock, incident_repo_mock.count_by_assignee).return_value = 7
+        cast(Mock, incident_repo_mock.select_all_by_assignee).return_value = (x for x in incidents)
+        cast(Mock, incident_repo_mock.get_summaries).return_value = summaries
+        with (
+            self.app.container.incident_repo.override(incident_repo_mock),
+            self.app.container.user_repo.override(user_repo_mock),
+        ):
+            resp = self.call_incident_api_employee(token, filters={'risk': 'LOW', 'channel': 'web', 'sort': 'name'})
+
+        filters = IncidentFilter(risk=Risk.LOW, channel=Channel.WEB)
+        cast(Mock, incident_repo_mock.count_by_assignee).assert_called_once_with(
+            client_id=client_id, assignee_id=employee_id, filters=filters
+        )
+        cast(Mock, incident_repo_mock.select_all_by_assignee).assert_called_once_with(
+            client_id=client_id,
+            assignee_id=employee_id,
+            fields=EMPLOYEE_INCIDENT_FIELDS,
+            offset=0,
+            limit=5,
+            start_after=None,
+            filters=filters,
+            sort=IncidentSort.NAME,
+        )
+
+        self.assertEqual(resp.status_code, 200)
+        resp_data = json.loads(resp.get_data())
+
+        self.assertEqual(resp_data['totalIncidents'], 7)
+        # Cursors only follow the default sort
+        self.assertIsNone(resp_data['nextCursor'])
+
+    @parametrize(
+        ('filters', 'message'),
+        [
+            ({'risk': 'CRITICAL'}, "Invalid risk. Allowed values are ['LOW', 'MEDIUM', 'HIGH']."),
+            ({'channel': 'phone'}, "Invalid channel. Allowed values are ['web', 'mobile', 'email']."),
+            ({'sort': 'status'}, "Invalid sort. Allowed values are ['last_modified', 'name']."),
+        ],
+    )
+    def test_employee_incidents_invalid_filter(self, filters: dict[str, str], message: str) -> None:
+        token = gen_token(
+            user_id=cast(str, self.faker.uuid4()),
+            client_id=cast(str, self.faker.uuid4()),
+            role=Role.AGENT,
+            assigned=True,
+        )
+
+        resp = self.call_incident_api_employee(token, filters=filters)
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(json.loads(resp.get_data()), {'code': 400, 'message': message})
+
+    def test_employee_incidents_cursor_with_sort(self) -> None:
+        token = gen_token(
+            user_id=cast(str, self.faker.uuid4()),
+            client_id=cast(str, self.faker.uuid4()),
+            role=Role.AGENT,
+            assigned=True,
+        )
+
+        resp = self.call_incident_api_employee(
+            token, cursor=encode_cursor(create_random_incident(self.faker)), filters={'sort': 'name'}
+        )
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(
+            json.loads(resp.get_data()),
+            {'code': 400, 'message': 'Cursors can only be used when sorting by last_modified.'},
+        )
+
+    def test_employee_incidents_invalid_cursor(self) -> None:
+        token = gen_token(
+            user_id=cast(str, self.faker.uuid4()),
+            client_id=cast(str, self.faker.uuid4()),
+            role=Role.AGENT,
+            assigned=True,
+        )
+
+        resp = self.call_incident_api_employee(token, cursor='invalid-cursor')
+
+        self.assertEqual(resp.status_code, 400)
+        resp_data = json.loads(resp.get_data())
+
+        self.assertEqual(resp_data, {'code': 400, 'message': 'Invalid cursor.'})
 
     def test_employee_incidents_invalid_page_size(self) -> None:
         client_id = cast(str, self.faker.uuid4())
@@ -237,6 +622,8 @@ class TestIncident(ParametrizedTestCase):
 
         incident_repo_mock = Mock(IncidentRepository)
         cast(Mock, incident_repo_mock.get).return_value = None
+        # The history is read along with the incident, a missing incident has no history entries
+        cast(Mock, incident_repo_mock.get_history).return_value = []
 
         with self.app.container.incident_repo.override(incident_repo_mock):
             resp = self.call_incident_detail_api(token, incident_id)
@@ -246,6 +633,37 @@ class TestIncident(ParametrizedTestCase):
 
         self.assertEqual(resp_data, {'code': 404, 'message': 'Incident not found.'})
 
+    def test_incident_detail_not_found_history_dropped(self) -> None:
+        token = gen_token(
+            user_id=cast(str, self.faker.uuid4()), client_id=cast(str, self.faker.uuid4()), role=Role.AGENT, assigned=True
+        )
+
+        # The only pool thread is busy, so the history read is still pending when the incident is found missing
+        executor = FanOutExecutor(max_workers=1)
+        busy = threading.Event()
+
+        def occupy() -> None:
+            busy.wait(5)
+
+        executor.dispatch(occupy)
+
+        incident_repo_mock = Mock(IncidentRepository)
+        cast(Mock, incident_repo_mock.get).return_value = None
+        cast(Mock, incident_repo_mock.get_history).return_value = []
+
+        try:
+            with (
+                self.app.container.incident_repo.override(incident_repo_mock),
+                self.app.container.executor.override(executor),
+            ):
+                resp = self.call_incident_detail_api(token, cast(str, self.faker.uuid4()))
+        finally:
+            busy.set()
+            executor.shutdown()
+
+        self.assertEqual(resp.status_code, 404)
+        cast(Mock, incident_repo_mock.get_history).assert_not_called()
+
     def _employee_repo_mock_get(
         self, employee_id: str, missing: str | None, employee_assigned_to: Employee, employee_created_by: Employee | None
     ) -> Employee | None:
@@ -339,13 +757,17 @@ class TestIncident(ParametrizedTestCase):
         ]
 
         user_repo_mock = Mock(UserRepository)
-        cast(Mock, user_repo_mock.get).side_effect = lambda user_id, client_id: self._user_repo_mock_get(  # noqa: ARG005
-            user_id, missing, user_reported_by, user_created_by if created_by == 'user' else None
+        cast(Mock, user_repo_mock.get_many).side_effect = found_many(
+            lambda user_id: self._user_repo_mock_get(
+                user_id, missing, user_reported_by, user_created_by if created_by == 'user' else None
+            )
         )
 
         employee_repo_mock = Mock(EmployeeRepository)
-        cast(Mock, employee_repo_mock.get).side_effect = lambda employee_id, client_id: self._employee_repo_mock_get(  # noqa: ARG005
-            employee_id, missing, employee_assigned_to, employee_created_by if created_by == 'agent' else None
+        cast(Mock, employee_repo_mock.get_many).side_effect = found_many(
+            lambda employee_id: self._employee_repo_mock_get(
+                employee_id, missing, employee_assigned_to, employee_created_by if created_by == 'agent' else None
+            )
         )
 
         incident_repo_mock = Mock(IncidentRepository)
@@ -397,6 +819,147 @@ class TestIncident(ParametrizedTestCase):
         self.assertEqual(resp_data['assignedTo']['email'], employee_assigned_to.email)
         self.assertEqual(resp_data['assignedTo']['role'], 'agent')
 
+    def test_incident_detail_parallel(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        token = gen_token(
+            user_id=cast(str, self.faker.uuid4()),
+            client_id=client_id,
+            role=Role.AGENT,
+            assigned=True,
+        )
+
+        user = User(id=cast(str, self.faker.uuid4()), client_id=client_id, name=self.faker.name(), email=self.faker.email())
+        employee = Employee(
+            id=cast(str, self.faker.uuid4()),
+            client_id=client_id,
+            name=self.faker.name(),
+            email=self.faker.email(),
+            role=Role.AGENT,
+            invitation_status=InvitationStatus.ACCEPTED,
+            invitation_date=self.faker.past_datetime(),
+        )
+        incident = create_random_incident(
+            self.faker, client_id=client_id, reported_by=user.id, created_by=user.id, assigned_to=employee.id
+        )
+
+        history_started = threading.Event()
+        history_read_with_incident: list[bool] = []
+
+        def get_history(client_id: str, incident_id: str) -> list[HistoryEntry]:
+            history_started.set()
+            return [create_random_history_entry(self.faker, seq=0, client_id=client_id, incident_id=incident_id)]
+
+        def get_incident(**_: object) -> Incident:
+            history_read_with_incident.append(history_started.wait(5))
+            return incident
+
+        user_repo_mock = Mock(UserRepository)
+        cast(Mock, user_repo_mock.get_many).side_effect = found_many(lambda user_id: user if user_id == user.id else None)
+
+        employee_repo_mock = Mock(EmployeeRepository)
+        cast(Mock, employee_repo_mock.get_many).side_effect = found_many(
+            lambda employee_id: employee if employee_id == employee.id else None
+        )
+
+        incident_repo_mock = Mock(IncidentRepository)
+        cast(Mock, incident_repo_mock.get).side_effect = get_incident
+        cast(Mock, incident_repo_mock.get_history).side_effect = get_history
+
+        with (
+            self.app.container.incident_repo.override(incident_repo_mock),
+            self.app.container.user_repo.override(user_repo_mock),
+            self.app.container.employee_repo.override(employee_repo_mock),
+        ):
+            resp = self.call_incident_detail_api(token, incident.id)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(history_read_with_incident, [True])
+        # The users and the employees are each looked up with a single call. The creator is also looked up as an
+        # employee, without waiting to know it is not a user.
+        cast(Mock, user_repo_mock.get_many).assert_called_once_with([user.id, user.id], client_id)
+        cast(Mock, employee_repo_mock.get_many).assert_called_once_with([employee.id, user.id], client_id)
+        cast(Mock, user_repo_mock.get).assert_not_called()
+        cast(Mock, employee_repo_mock.get).assert_not_called()
+
+    @parametrize(
+        'current',
+        [
+            (True,),
+            (False,),
+        ],
+    )
+    def test_incident_detail_if_none_match(self, current: bool) -> None:  # noqa: FBT001
+        client_id = cast(str, self.faker.uuid4())
+
+        token = gen_token(user_id=cast(str, self.faker.uuid4()), client_id=client_id, role=Role.AGENT, assigned=True)
+
+        user = User(id=cast(str, self.faker.uuid4()), client_id=client_id, name=self.faker.name(), email=self.faker.email())
+        employee = Employee(
+            id=cast(str, self.faker.uuid4()),
+            client_id=client_id,
+            name=self.faker.name(),
+            email=self.faker.email(),
+            role=Role.AGENT,
+            invitation_status=InvitationStatus.ACCEPTED,
+            invitation_date=self.faker.past_datetime(),
+        )
+        incident = create_random_incident(
+            self.faker, client_id=client_id, reported_by=user.id, created_by=user.id, assigned_to=employee.id
+        )
+        history = [
+            create_random_history_entry(self.faker, seq=i, client_id=client_id, incident_id=incident.id) for i in range(2)
+        ]
+        etag = incidents_etag([(incident.id, incident.last_modified, 1)])
+
+        user_repo_mock = Mock(UserRepository)
+        cast(Mock, user_repo_mock.get_many).return_value = {user.id: user}
+
+        employee_repo_mock = Mock(EmployeeRepository)
+        cast(Mock, employee_repo_mock.get_many).return_value = {employee.id: employee}
+
+        incident_repo_mock = Mock(IncidentRepository)
+        cast(Mock, incident_repo_mock.get).return_value = incident
+        cast(Mock, incident_repo_mock.get_last_seq).return_value = 1
+        cast(Mock, incident_repo_mock.get_history).return_value = history
+
+        with (
+            self.app.container.incident_repo.override(incident_repo_mock),
+            self.app.container.user_repo.override(user_repo_mock),
+            self.app.container.employee_repo.override(employee_repo_mock),
+        ):
+            resp = self.call_incident_detail_api(
+                token, incident.id, headers={'If-None-Match': f'"{etag if current else "stale"}"'}
+            )
+
+        self.assertEqual(resp.headers['ETag'], f'"{etag}"')
+        # The incident is only read once, whether it changed or not
+        cast(Mock, incident_repo_mock.get).assert_called_once_with(client_id=client_id, incident_id=incident.id)
+
+        if current:
+            self.assertEqual(resp.status_code, 304)
+            cast(Mock, incident_repo_mock.get_history).assert_not_called()
+            cast(Mock, user_repo_mock.get_many).assert_not_called()
+            cast(Mock, employee_repo_mock.get_many).assert_not_called()
+        else:
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(json.loads(resp.get_data())['id'], incident.id)
+
+    def test_incident_detail_if_none_match_not_found(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        token = gen_token(user_id=cast(str, self.faker.uuid4()), client_id=client_id, role=Role.AGENT, assigned=True)
+
+        incident_repo_mock = Mock(IncidentRepository)
+        cast(Mock, incident_repo_mock.get).return_value = None
+        cast(Mock, incident_repo_mock.get_last_seq).return_value = None
+
+        with self.app.container.incident_repo.override(incident_repo_mock):
+            resp = self.call_incident_detail_api(token, cast(str, self.faker.uuid4()), headers={'If-None-Match': '*'})
+
+        self.assertEqual(resp.status_code, 404)
+        cast(Mock, incident_repo_mock.get_history).assert_not_called()
+
     def test_incidents_by_client_not_found(self) -> None:
         client_id = cast(str, self.faker.uuid4())
 
@@ -423,6 +986,7 @@ class TestIncident(ParametrizedTestCase):
 
         incident_repo_mock = Mock(IncidentRepository)
         cast(Mock, incident_repo_mock.get_all_by_client).return_value = iter([])
+        cast(Mock, incident_repo_mock.get_histories).return_value = {}
 
         with (
             self.app.container.client_repo.override(client_repo_mock),
@@ -457,7 +1021,7 @@ class TestIncident(ParametrizedTestCase):
 
         incident_repo_mock = Mock(IncidentRepository)
         cast(Mock, incident_repo_mock.get_all_by_client).return_value = iter(incidents)
-        cast(Mock, incident_repo_mock.get_history).side_effect = lambda client_id, incident_id: incident_history[incident_id]  # noqa: ARG005
+        cast(Mock, incident_repo_mock.get_histories).return_value = incident_history
 
         with (
             self.app.container.client_repo.override(client_repo_mock),
@@ -492,3 +1056,106 @@ class TestIncident(ParametrizedTestCase):
             expected_data.append(incident_dict)
 
         self.assertEqual(resp_data, expected_data)
+
+    def _incidents_by_client_mocks(self, client_id: str, n: int) -> tuple[list[Incident], Mock, Mock]:
+        incidents = [create_random_incident(self.faker, client_id=client_id) for _ in range(n)]
+
+        incident_history = {
+            incident.id: [
+                create_random_history_entry(self.faker, seq=i, client_id=client_id, incident_id=incident.id) for i in range(2)
+            ]
+            for incident in incidents
+        }
+
+        client_repo_mock = Mock(ClientRepository)
+        cast(Mock, client_repo_mock.get).return_value = Client(
+            id=client_id,
+            name=self.faker.company(),
+            email_incidents=self.faker.email(),
+        )
+
+        incident_repo_mock = Mock(IncidentRepository)
+        cast(Mock, incident_repo_mock.get_all_by_client).return_value = iter(incidents)
+        cast(Mock, incident_repo_mock.get_histories).side_effect = lambda client_id, incident_ids: {  # noqa: ARG005
+            x: incident_history[x] for x in incident_ids
+        }
+
+        return incidents, client_repo_mock, incident_repo_mock
+
+    @parametrize(
+        ['returned', 'has_next'],
+        [
+            (3, True),
+            (2, False),
+        ],
+    )
+    def test_incidents_by_client_limit_cursor(self, returned: int, has_next: bool) -> None:  # noqa: FBT001
+        client_id = cast(str, self.faker.uuid4())
+        previous = create_random_incident(self.faker, client_id=client_id)
+        incidents, client_repo_mock, incident_repo_mock = self._incidents_by_client_mocks(client_id, returned)
+
+        with (
+            self.app.container.client_repo.override(client_repo_mock),
+            self.app.container.incident_repo.override(incident_repo_mock),
+        ):
+            resp = self.call_incidents_by_client(client_id, {'limit': 3, 'cursor': encode_cursor(previous)})
+
+        cast(Mock, incident_repo_mock.get_all_by_client).assert_called_once_with(
+            client_id, limit=3, start_after=(previous.last_modified, previous.id)
+        )
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([x['id'] for x in json.loads(resp.get_data())], [x.id for x in incidents])
+        self.assertEqual(resp.headers.get('X-Next-Cursor'), encode_cursor(incidents[-1]) if has_next else None)
+
+    @parametrize(
+        ['params', 'message'],
+        [
+            ({'limit': 0}, 'Invalid limit. Limit must be 1 or greater.'),
+            ({'cursor': 'invalid-cursor'}, 'Invalid cursor.'),
+        ],
+    )
+    def test_incidents_by_client_invalid_params(self, params: dict[str, str | int], message: str) -> None:
+        resp = self.call_incidents_by_client(cast(str, self.faker.uuid4()), params)
+
+        self.assertEqual(resp.status_code, 400)
+        resp_data = json.loads(resp.get_data())
+
+        self.assertEqual(resp_data, {'code': 400, 'message': message})
+
+    def test_incidents_by_client_stream(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        incidents, client_repo_mock, incident_repo_mock = self._incidents_by_client_mocks(client_id, 5)
+
+        with (
+            self.app.container.client_repo.override(client_repo_mock),
+            self.app.container.incident_repo.override(incident_repo_mock),
+            patch.object(IncidentsByClient, 'CHUNK_SIZE', 2),
+        ):
+            resp = self.call_incidents_by_client(client_id, {'stream': 'true'})
+
+            self.assertTrue(resp.is_streamed)
+            resp_data = json.loads(resp.get_data())
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, 'application/json')
+        self.assertEqual([x['id'] for x in resp_data], [x.id for x in incidents])
+        self.assertEqual([len(x['history']) for x in resp_data], [2] * 5)
+        # Histories are loaded one chunk at a time
+        self.assertEqual(cast(Mock, incident_repo_mock.get_histories).call_count, 3)
+
+    def test_incidents_by_client_ndjson(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        incidents, client_repo_mock, incident_repo_mock = self._incidents_by_client_mocks(client_id, 3)
+
+        with (
+            self.app.container.client_repo.override(client_repo_mock),
+            self.app.container.incident_repo.override(incident_repo_mock),
+        ):
+            resp = self.call_incidents_by_client(client_id, headers={'Accept': 'application/x-ndjson'})
+
+            lines = resp.get_data(as_text=True).splitlines()
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, 'application/x-ndjson')
+        self.assertEqual([json.loads(x)['id'] for x in lines], [x.id for x in incidents])
@@ -0,0 +1,136 @@
+import json
+from datetime import UTC, datetime, timedelta, timezone
+from typing import Any, cast
+from unittest import TestCase
+
+from faker import Faker
+
+from blueprints.serializers import (
+    encode_client_incident,
+    encode_employee_incident,
+    encode_employee_incidents_page,
+    encode_history_entry,
+    encode_incident_detail,
+    encode_list,
+    encode_user_incident,
+    format_datetime,
+)
+from models import Employee, HistoryEntry, InvitationStatus, Role, User
+from tests.util import create_random_history_entry, create_random_history_summary, create_random_incident
+
+
+def history_to_dict(entry: HistoryEntry) -> dict[str, Any]:
+    return {
+        'seq': entry.seq,
+        'date': entry.date.isoformat().replace('+00:00', 'Z'),
+        'action': entry.action,
+        'description': entry.description,
+    }
+
+
+class TestSerializers(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.incident = create_random_incident(self.faker)
+        self.history = [create_random_history_entry(self.faker, seq=i, incident_id=self.incident.id) for i in range(3)]
+        self.user = User(
+            id=cast(str, self.faker.uuid4()),
+            client_id=self.incident.client_id,
+            name='José "Pepe" Ñuñez\n',
+            email=self.faker.email(),
+        )
+        self.employee = Employee(
+            id=cast(str, self.faker.uuid4()),
+            client_id=self.incident.client_id,
+            name=self.faker.name(),
+            email=self.faker.email(),
+            role=Role.AGENT,
+            invitation_status=InvitationStatus.ACCEPTED,
+            invitation_date=self.faker.past_datetime(),
+        )
+
+    def test_format_datetime(self) -> None:
+        self.assertEqual(format_datetime(datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC)), '"2024-01-02T03:04:05Z"')
+        self.assertEqual(
+            format_datetime(datetime(2024, 1, 2, 3, 4, 5, 6, tzinfo=timezone(timedelta(hours=-5)))),
+            '"2024-01-02T03:04:05.000006-05:00"',
+        )
+
+    def test_history_entry(self) -> None:
+        entry = self.history[0]
+
+        self.assertEqual(encode_history_entry(entry), json.dumps(history_to_dict(entry)))
+
+    def test_user_incident(self) -> None:
+        expected = {
+            'id': self.incident.id,
+            'name': self.incident.name,
+            'channel': self.incident.channel,
+            'history': [history_to_dict(x) for x in self.history],
+        }
+
+        self.assertEqual(encode_user_incident(self.incident, self.history), json.dumps(expected))
+
+    def test_employee_incidents_page(self) -> None:
+        self.incident.risk = None
+        summary = create_random_history_summary(self.faker, incident_id=self.incident.id)
+        expected = {
+            'incidents': [
+                {
+                    'id': self.incident.id,
+                    'name': self.incident.name,
+                    'reportedBy': {'id': self.user.id, 'name': self.user.name, 'email': self.user.email},
+                    'filingDate': summary.filing_date.isoformat().replace('+00:00', 'Z'),
+                    'status': summary.status,
+                    'risk': None,
+                }
+            ],
+            'totalPages': 3,
+            'currentPage': 1,
+            'totalIncidents': 11,
+            'nextCursor': None,
+        }
+
+        encoded = encode_employee_incidents_page([encode_employee_incident(self.incident, self.user, summary)], 3, 1, 11, None)
+
+        self.assertEqual(encoded, json.dumps(expected))
+
+    def test_incident_detail(self) -> None:
+        expected = {
+            'id': self.incident.id,
+            'name': self.incident.name,
+            'channel': self.incident.channel,
+            'reportedBy': {'id': self.user.id, 'name': self.user.name, 'email': self.user.email, 'role': 'user'},
+            'createdBy': {'id': self.user.id, 'name': self.user.name, 'email': self.user.email, 'role': 'user'},
+            'assignedTo': {
+                'id': self.employee.id,
+                'name': self.employee.name,
+                'email': self.employee.email,
+                'role': self.employee.role,
+            },
+            'history': [history_to_dict(x) for x in self.history],
+            'risk': self.incident.risk,
+        }
+
+        encoded = encode_incident_detail(self.incident, self.history, self.user, self.user, 'user', self.employee)
+
+        self.assertEqual(encoded, json.dumps(expected))
+
+    def test_client_incidents(self) -> None:
+        expected = [
+            {
+                'id': self.incident.id,
+                'name': self.incident.name,
+                'channel': self.incident.channel,
+                'reported_by': self.incident.reported_by,
+                'created_by': self.incident.created_by,
+                'assigned_to': self.incident.assigned_to,
+                'history': [history_to_dict(x) for x in self.history],
+                'risk': self.incident.risk,
+            }
+        ]
+
+        self.assertEqual(encode_list([encode_client_incident(self.incident, self.history)]), json.dumps(expected))
+
+    def test_empty_list(self) -> None:
+        self.assertEqual(encode_list([]), '[]')
@@ -0,0 +1,143 @@
+import contextvars
+import threading
+from unittest import TestCase
+
+from concurrency import FanOutExecutor
+
+request_id: contextvars.ContextVar[str] = contextvars.ContextVar('request_id', default='')
+
+
+class TestFanOutExecutor(TestCase):
+    def setUp(self) -> None:
+        self.executor = FanOutExecutor(max_workers=4, max_queue=8, max_concurrency=2)
+
+    def tearDown(self) -> None:
+        self.executor.shutdown()
+
+    def test_map(self) -> None:
+        self.assertEqual(self.executor.map(lambda x: x * 2, range(10)), [x * 2 for x in range(10)])
+
+    def test_map_empty(self) -> None:
+        self.assertEqual(self.executor.map(lambda x: x, []), [])
+
+    def test_group_results(self) -> None:
+        with self.executor.group() as group:
+            a = group.submit(lambda x, y: x + y, 1, y=2)
+            b = group.submit(str.upper, 'b')
+
+        self.assertEqual(a.result(), 3)
+        self.assertEqual(b.result(), 'B')
+
+    def test_max_concurrency(self) -> None:
+        lock = threading.Lock()
+        running = 0
+        max_running = 0
+        release = threading.Event()
+
+        def task() -> None:
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            release.wait(1)
+            with lock:
+                running -= 1
+
+        with self.executor.group(max_concurrency=1) as group:
+            for _ in range(5):
+                group.submit(task)
+            release.set()
+
+        # One pool thread plus the waiting thread, which helps once it reaches the end of the block
+        self.assertLessEqual(max_running, 2)
+
+    def test_nested_groups_share_slots(self) -> None:
+        # Every level waits on the next one, which would exhaust a small pool if waiting threads didn't run tasks
+        def level(depth: int) -> int:
+            if depth == 0:
+                return 1
+            return sum(self.executor.map(level, [depth - 1] * 3))
+
+        self.assertEqual(sum(self.executor.map(level, [3] * 3)), 81)
+        self.assertLessEqual(self.executor.stats()['threads'], 4)
+
+    def test_failure_cancels_siblings(self) -> None:
+        started = threading.Event()
+        release = threading.Event()
+
+        def fail() -> None:
+            started.wait(1)
+            raise ValueError('failed')
+
+        def block() -> None:
+            started.set()
+            release.wait(1)
+
+        with self.assertRaises(ValueError), self.executor.group(max_concurrency=2) as group:
+            blocked = group.submit(block)
+            failed = group.submit(fail)
+            pending = [group.submit(lambda: None) for _ in range(3)]
+            failed.exception()
+            release.set()
+
+        self.assertIsNone(blocked.result())
+        self.assertTrue(all(x.cancelled() for x in pending))
+
+    def test_submit_after_failure(self) -> None:
+        with self.assertRaises(ValueError), self.executor.group() as group:
+            group.submit(int, 'x').exception()
+            future = group.submit(int, '1')
+
+        self.assertTrue(future.cancelled())
+
+    def test_error_in_block_cancels_pending(self) -> None:
+        release = threading.Event()
+
+        with self.assertRaises(RuntimeError), self.executor.group(max_concurrency=1) as group:
+            group.submit(release.wait, 1)
+            pending = group.submit(lambda: None)
+            release.set()
+            raise RuntimeError
+
+        self.assertTrue(pending.cancelled())
+
+    def test_context_is_propagated(self) -> None:
+        request_id.set('abc')
+
+        self.assertEqual(self.executor.map(lambda _: request_id.get(), range(4)), ['abc'] * 4)
+
+    def test_caller_runs_when_queue_is_full(self) -> None:
+        executor = FanOutExecutor(max_workers=1, max_queue=1, max_concurrency=4)
+        release = threading.Event()
+        caller = threading.get_ident()
+
+        with executor.group() as group:
+            group.submit(release.wait, 1)
+            group.submit(threading.get_ident)
+            # The worker is busy and the queue holds one task, so the pending tasks run in this thread
+            inline = group.submit(threading.get_ident)
+            release.set()
+
+        self.assertEqual(inline.result(), caller)
+        self.assertEqual(executor.stats()['caller_runs'], 1)
+        executor.shutdown()
+
+    def test_stats(self) -> None:
+        started = threading.Event()
+        release = threading.Event()
+
+        def task() -> None:
+            started.set()
+            release.wait(1)
+
+        with self.executor.group() as group:
+            group.submit(task)
+            started.wait(1)
+            stats = self.executor.stats()
+            release.set()
+
+        self.assertEqual(stats['max_workers'], 4)
+        self.assertEqual(stats['threads'], 1)
+        self.assertEqual(stats['active'], 1)
+        self.assertEqual(stats['queued'], 0)
+        self.assertEqual(self.executor.stats()['active'], 0)
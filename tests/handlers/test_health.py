@@ -0,0 +1,27 @@
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from app_async import create_async_app
+
+
+class TestHealth(AioHTTPTestCase):
+    async def get_application(self) -> web.Application:
+        return create_async_app()
+
+    async def test_health(self) -> None:
+        async with self.client.get('/api/v1/health/incidentquery') as resp:
+            self.assertEqual(resp.status, 200)
+            self.assertEqual(await resp.json(), {'status': 'Ok'})
+
+    async def test_metrics(self) -> None:
+        async with self.client.get('/api/v1/health/incidentquery'):
+            pass
+
+        async with self.client.get('/api/v1/metrics/incidentquery') as resp:
+            self.assertEqual(resp.status, 200)
+            self.assertEqual(resp.headers['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+            self.assertRegex(
+                await resp.text(),
+                r'incidentquery_request_duration_seconds_count'
+                r'\{endpoint="/api/v1/health/incidentquery",method="GET",status="200"\} \d+',
+            )
@@ -0,0 +1,522 @@
+import asyncio
+import base64
+import json
+from collections.abc import AsyncGenerator
+from typing import Any, cast
+from unittest.mock import Mock
+
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+from faker import Faker
+
+from app_async import container_key, create_async_app
+from blueprints.serializers import EMPLOYEE_INCIDENT_FIELDS, USER_INCIDENT_FIELDS
+from blueprints.util import encode_cursor, incidents_etag
+from containers import Container
+from handlers.util import async_iter
+from models import Channel, Client, Employee, HistoryEntry, HistorySummary, Incident, InvitationStatus, Risk, Role, User
+from repositories import AsyncEmployeeRepository, AsyncIncidentRepository, AsyncUserRepository, IncidentFilter, IncidentSort
+from repositories.client import AsyncClientRepository
+from tests.blueprints.util import gen_token
+from tests.util import create_random_history_entry, create_random_history_summary, create_random_incident, found_many
+
+
+class TestIncident(AioHTTPTestCase):
+    INCIDENT_API_USER_URL = '/api/v1/users/me/incidents'
+    INCIDENT_API_EMPLOYEE_URL = '/api/v1/employees/me/incidents'
+    INCIDENT_API_DETAIL_URL = '/api/v1/incidents/{incident_id}'
+    INCIDENTS_BY_CLIENT_URL = '/api/v1/clients/{client_id}/incidents'
+
+    async def get_application(self) -> web.Application:
+        self.faker = Faker()
+        return create_async_app()
+
+    @property
+    def container(self) -> Container:
+        return self.app[container_key]
+
+    def token_headers(self, token: dict[str, Any]) -> dict[str, str]:
+        return {'X-Apigateway-Api-Userinfo': base64.urlsafe_b64encode(json.dumps(token).encode()).decode()}
+
+    def random_user(self, client_id: str) -> User:
+        return User(id=cast(str, self.faker.uuid4()), client_id=client_id, name=self.faker.name(), email=self.faker.email())
+
+    def random_employee(self, client_id: str) -> Employee:
+        return Employee(
+            id=cast(str, self.faker.uuid4()),
+            client_id=client_id,
+            name=self.faker.name(),
+            email=self.faker.email(),
+            role=Role.AGENT,
+            invitation_status=InvitationStatus.ACCEPTED,
+            invitation_date=self.faker.past_datetime(),
+        )
+
+    async def test_user_incidents_no_token(self) -> None:
+        async with self.client.get(self.INCIDENT_API_USER_URL) as resp:
+            self.assertEqual(resp.status, 401)
+            self.assertEqual(await resp.json(), {'code': 401, 'message': 'Token is missing'})
+
+    async def test_user_incidents_token_missing_field(self) -> None:
+        token = gen_token(user_id=cast(str, self.faker.uuid4()), client_id=None, role=Role.USER, assigned=True)
+        del token['aud']
+
+        async with self.client.get(self.INCIDENT_API_USER_URL, headers=self.token_headers(token)) as resp:
+            self.assertEqual(resp.status, 401)
+            self.assertEqual(await resp.json(), {'code': 401, 'message': 'aud is missing in token'})
+
+    async def test_user_incidents(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        user_id = cast(str, self.faker.uuid4())
+        token = gen_token(user_id=user_id, client_id=client_id, role=Role.USER, assigned=True)
+
+        incidents = [create_random_incident(self.faker, client_id=client_id, reported_by=user_id) for _ in range(3)]
+        histories = {
+            x.id: [create_random_history_entry(self.faker, seq=i, client_id=client_id, incident_id=x.id) for i in range(3)]
+            for x in incidents
+        }
+
+        incident_repo_mock = Mock(AsyncIncidentRepository)
+        cast(Mock, incident_repo_mock.select_all_by_reporter).return_value = async_iter(incidents)
+        cast(Mock, incident_repo_mock.get_histories).return_value = histories
+
+        with self.container.async_incident_repo.override(incident_repo_mock):
+            async with self.client.get(self.INCIDENT_API_USER_URL, headers=self.token_headers(token)) as resp:
+                self.assertEqual(resp.status, 200)
+                resp_data = await resp.json()
+                server_timing = resp.headers['Server-Timing']
+
+        cast(Mock, incident_repo_mock.select_all_by_reporter).assert_called_once_with(
+            client_id=client_id, reporter_id=user_id, fields=USER_INCIDENT_FIELDS
+        )
+        self.assertEqual([x['id'] for x in resp_data], [x.id for x in incidents])
+        self.assertEqual([len(x['history']) for x in resp_data], [3, 3, 3])
+        # Repositories are mocked, so only the encoding is timed, once for the whole response
+        self.assertRegex(server_timing, r'^serialize;dur=[\d.]+;desc="1 calls", total;dur=[\d.]+$')
+
+    async def test_user_incidents_not_modified(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        user_id = cast(str, self.faker.uuid4())
+        token = gen_token(user_id=user_id, client_id=client_id, role=Role.USER, assigned=True)
+
+        incidents = [create_random_incident(self.faker, client_id=client_id, reported_by=user_id) for _ in range(3)]
+        etag = incidents_etag((x.id, x.last_modified, 1) for x in incidents)
+
+        incident_repo_mock = Mock(AsyncIncidentRepository)
+        cast(Mock, incident_repo_mock.select_all_by_reporter).return_value = async_iter(incidents)
+        cast(Mock, incident_repo_mock.get_last_seqs).return_value = {x.id: 1 for x in incidents}
+
+        with self.container.async_incident_repo.override(incident_repo_mock):
+            async with self.client.get(
+                self.INCIDENT_API_USER_URL, headers={**self.token_headers(token), 'If-None-Match': f'"{etag}"'}
+            ) as resp:
+                self.assertEqual(resp.status, 304)
+
+        cast(Mock, incident_repo_mock.select_all_by_reporter).assert_called_once_with(
+            client_id=client_id, reporter_id=user_id, fields=()
+        )
+        cast(Mock, incident_repo_mock.get_histories).assert_not_called()
+
+    async def test_employee_incidents(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        employee_id = cast(str, self.faker.uuid4())
+        token = gen_token(user_id=employee_id, client_id=client_id, role=Role.AGENT, assigned=True)
+
+        user = self.random_user(client_id)
+        incidents = [
+            create_random_incident(self.faker, client_id=client_id, assigned_to=employee_id, reported_by=user.id)
+            for _ in range(5)
+        ]
+        summaries = {x.id: create_random_history_summary(self.faker, client_id=client_id, incident_id=x.id) for x in incidents}
+
+        user_repo_mock = Mock(AsyncUserRepository)
+        cast(Mock, user_repo_mock.get_many).return_value = {user.id: user}
+
+        incident_repo_mock = Mock(AsyncIncidentRepository)
+        cast(Mock, incident_repo_mock.count_by_assignee).return_value = 12
+        cast(Mock, incident_repo_mock.select_all_by_assignee).return_value = async_iter(incidents)
+        cast(Mock, incident_repo_mock.get_summaries).return_value = summaries
+
+        with (
+            self.container.async_incident_repo.override(incident_repo_mock),
+            self.container.async_user_repo.override(user_repo_mock),
+        ):
+            async with self.client.get(
+                self.INCIDENT_API_EMPLOYEE_URL, headers=self.token_headers(token), params={'page_number': 2}
+            ) as resp:
+                self.assertEqual(resp.status, 200)
+                resp_data = await resp.json()
+
+        cast(Mock, incident_repo_mock.select_all_by_assignee).assert_called_once_with(
+            client_id=client_id,
+            assignee_id=employee_id,
+            fields=EMPLOYEE_INCIDENT_FIELDS,
+            offset=5,
+            limit=5,
+            start_after=None,
+            filters=IncidentFilter(),
+            sort=IncidentSort.LAST_MODIFIED,
+        )
+        # The summaries are looked up in batches that grow as the page streams in, and the shared reporter only once
+        self.assertEqual(
+            [x.kwargs['incident_ids'] for x in cast(Mock, incident_repo_mock.get_summaries).call_args_list],
+            [[incidents[0].id], [incidents[1].id], [incidents[2].id, incidents[3].id], [incidents[4].id]],
+        )
+        cast(Mock, user_repo_mock.get_many).assert_called_once_with([user.id], client_id)
+
+        self.assertEqual([x['id'] for x in resp_data['incidents']], [x.id for x in incidents])
+        self.assertEqual([x['status'] for x in resp_data['incidents']], [summaries[x.id].status for x in incidents])
+        self.assertEqual(resp_data['totalPages'], 3)
+        self.assertEqual(resp_data['currentPage'], 2)
+        self.assertEqual(resp_data['totalIncidents'], 12)
+        self.assertEqual(resp_data['nextCursor'], encode_cursor(incidents[-1]))
+
+    async def test_employee_incidents_pipelined(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        employee_id = cast(str, self.faker.uuid4())
+        token = gen_token(user_id=employee_id, client_id=client_id, role=Role.AGENT, assigned=True)
+
+        incidents = [create_random_incident(self.faker, client_id=client_id, assigned_to=employee_id) for _ in range(2)]
+        looked_up = asyncio.Event()
+        looked_up_while_streaming: list[bool] = []
+
+        async def stream_page(**_: object) -> AsyncGenerator[Incident, None]:
+            yield incidents[0]
+            # The next document only arrives after the lookups of the first one have started
+            try:
+                await asyncio.wait_for(looked_up.wait(), 5)
+            except TimeoutError:
+                looked_up_while_streaming.append(False)
+            else:
+                looked_up_while_streaming.append(True)
+            yield incidents[1]
+
+        def get_summaries(client_id: str, incident_ids: list[str]) -> dict[str, HistorySummary]:
+            looked_up.set()
+            return {x: create_random_history_summary(self.faker, client_id=client_id, incident_id=x) for x in incident_ids}
+
+        user_repo_mock = Mock(AsyncUserRepository)
+        cast(Mock, user_repo_mock.get_many).side_effect = lambda user_ids, client_id: {
+            x: User(id=x, client_id=client_id, name=self.faker.name(), email=self.faker.email()) for x in user_ids
+        }
+
+        incident_repo_mock = Mock(AsyncIncidentRepository)
+        cast(Mock, incident_repo_mock.count_by_assignee).return_value = len(incidents)
+        cast(Mock, incident_repo_mock.select_all_by_assignee).side_effect = stream_page
+        cast(Mock, incident_repo_mock.get_summaries).side_effect = get_summaries
+
+        with (
+            self.container.async_incident_repo.override(incident_repo_mock),
+            self.container.async_user_repo.override(user_repo_mock),
+        ):
+            async with self.client.get(self.INCIDENT_API_EMPLOYEE_URL, headers=self.token_headers(token)) as resp:
+                self.assertEqual(resp.status, 200)
+                resp_data = await resp.json()
+
+        self.assertEqual(looked_up_while_streaming, [True])
+        self.assertEqual([x['id'] for x in resp_data['incidents']], [x.id for x in incidents])
+
+    async def test_employee_incidents_filtered(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        employee_id = cast(str, self.faker.uuid4())
+        token = gen_token(user_id=employee_id, client_id=client_id, role=Role.AGENT, assigned=True)
+
+        user = self.random_user(client_id)
+        incidents = [
+            create_random_incident(self.faker, client_id=client_id, assigned_to=employee_id, reported_by=user.id)
+            for _ in range(5)
+        ]
+        summaries = {x.id: create_random_history_summary(self.faker, client_id=client_id, incident_id=x.id) for x in incidents}
+
+        user_repo_mock = Mock(AsyncUserRepository)
+        cast(Mock, user_repo_mock.get_many).return_value = {user.id: user}
+
+        incident_repo_mock = Mock(AsyncIncidentRepository)
+        cast(Mock, incident_repo_mock.count_by_assignee).return_value = 6
+        cast(Mock, incident_repo_mock.select_all_by_assignee).return_value = async_iter(incidents)
+        cast(Mock, incident_repo_mock.get_summaries).return_value = summaries
+
+        with (
+            self.container.async_incident_repo.override(incident_repo_mock),
+            self.container.async_user_repo.override(user_repo_mock),
+        ):
+            async with self.client.get(
+                self.INCIDENT_API_EMPLOYEE_URL,
+                headers=self.token_headers(token),
+                params={'risk': 'HIGH', 'channel': 'email', 'sort': 'name'},
+            ) as resp:
+                self.assertEqual(resp.status, 200)
+                resp_data = await resp.json()
+
+        filters = IncidentFilter(risk=Risk.HIGH, channel=Channel.EMAIL)
+        cast(Mock, incident_repo_mock.count_by_assignee).assert_called_once_with(
+            client_id=client_id, assignee_id=employee_id, filters=filters
+        )
+        cast(Mock, incident_repo_mock.select_all_by_assignee).assert_called_once_with(
+            client_id=client_id,
+            assignee_id=employee_id,
+            fields=EMPLOYEE_INCIDENT_FIELDS,
+            offset=0,
+            limit=5,
+            start_after=None,
+            filters=filters,
+            sort=IncidentSort.NAME,
+        )
+
+        self.assertEqual(resp_data['totalIncidents'], 6)
+        # Cursors only follow the default sort
+        self.assertIsNone(resp_data['nextCursor'])
+
+    async def test_employee_incidents_invalid_params(self) -> None:
+        token = gen_token(
+            user_id=cast(str, self.faker.uuid4()), client_id=cast(str, self.faker.uuid4()), role=Role.AGENT, assigned=True
+        )
+
+        cases: list[tuple[dict[str, str], str]] = [
+            ({'page_size': '1'}, 'Invalid page_size. Allowed values are [5, 10, 20].'),
+            ({'page_number': '0'}, 'Invalid page_number. Page number must be 1 or greater.'),
+            ({'cursor': 'invalid-cursor'}, 'Invalid cursor.'),
+            ({'risk': 'CRITICAL'}, "Invalid risk. Allowed values are ['LOW', 'MEDIUM', 'HIGH']."),
+            ({'sort': 'status'}, "Invalid sort. Allowed values are ['last_modified', 'name']."),
+            (
+                {'sort': 'name', 'cursor': encode_cursor(create_random_incident(self.faker))},
+                'Cursors can only be used when sorting by last_modified.',
+            ),
+        ]
+
+        for params, message in cases:
+            with self.subTest(params=params):
+                async with self.client.get(
+                    self.INCIDENT_API_EMPLOYEE_URL, headers=self.token_headers(token), params=params
+                ) as resp:
+                    self.assertEqual(resp.status, 400)
+                    self.assertEqual(await resp.json(), {'code': 400, 'message': message})
+
+    async def test_employee_incidents_user_not_found(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        employee_id = cast(str, self.faker.uuid4())
+        token = gen_token(user_id=employee_id, client_id=client_id, role=Role.AGENT, assigned=True)
+
+        incident = create_random_incident(self.faker, client_id=client_id, assigned_to=employee_id)
+
+        user_repo_mock = Mock(AsyncUserRepository)
+        cast(Mock, user_repo_mock.get_many).return_value = {}
+
+        incident_repo_mock = Mock(AsyncIncidentRepository)
+        cast(Mock, incident_repo_mock.count_by_assignee).return_value = 1
+        cast(Mock, incident_repo_mock.select_all_by_assignee).return_value = async_iter([incident])
+        cast(Mock, incident_repo_mock.get_summaries).return_value = {
+            incident.id: create_random_history_summary(self.faker, client_id=client_id, incident_id=incident.id)
+        }
+
+        with (
+            self.container.async_incident_repo.override(incident_repo_mock),
+            self.container.async_user_repo.override(user_repo_mock),
+            self.assertLogs(),
+        ):
+            async with self.client.get(self.INCIDENT_API_EMPLOYEE_URL, headers=self.token_headers(token)) as resp:
+                self.assertEqual(resp.status, 500)
+
+    async def test_incident_detail(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        token = gen_token(user_id=cast(str, self.faker.uuid4()), client_id=client_id, role=Role.AGENT, assigned=True)
+
+        user = self.random_user(client_id)
+        employee_created_by = self.random_employee(client_id)
+        employee_assigned_to = self.random_employee(client_id)
+        employees = {x.id: x for x in [employee_created_by, employee_assigned_to]}
+
+        incident = create_random_incident(
+            self.faker,
+            client_id=client_id,
+            reported_by=user.id,
+            created_by=employee_created_by.id,
+            assigned_to=employee_assigned_to.id,
+        )
+        history = [
+            create_random_history_entry(self.faker, seq=i, client_id=client_id, incident_id=incident.id) for i in range(2)
+        ]
+
+        user_repo_mock = Mock(AsyncUserRepository)
+        cast(Mock, user_repo_mock.get_many).side_effect = found_many(lambda user_id: user if user_id == user.id else None)
+
+        employee_repo_mock = Mock(AsyncEmployeeRepository)
+        cast(Mock, employee_repo_mock.get_many).side_effect = found_many(employees.get)
+
+        incident_repo_mock = Mock(AsyncIncidentRepository)
+        cast(Mock, incident_repo_mock.get).return_value = incident
+        cast(Mock, incident_repo_mock.get_history).return_value = async_iter(history)
+
+        with (
+            self.container.async_incident_repo.override(incident_repo_mock),
+            self.container.async_user_repo.override(user_repo_mock),
+            self.container.async_employee_repo.override(employee_repo_mock),
+        ):
+            async with self.client.get(
+                self.INCIDENT_API_DETAIL_URL.format(incident_id=incident.id), headers=self.token_headers(token)
+            ) as resp:
+                self.assertEqual(resp.status, 200)
+                resp_data = await resp.json()
+
+        self.assertEqual(resp_data['id'], incident.id)
+        self.assertEqual(resp_data['reportedBy']['id'], user.id)
+        self.assertEqual(resp_data['createdBy']['id'], employee_created_by.id)
+        self.assertEqual(resp_data['createdBy']['role'], 'agent')
+        self.assertEqual(resp_data['assignedTo']['id'], employee_assigned_to.id)
+        self.assertEqual([x['seq'] for x in resp_data['history']], [0, 1])
+        self.assertEqual(resp.headers['ETag'], f'"{incidents_etag([(incident.id, incident.last_modified, 1)])}"')
+
+    async def test_incident_detail_not_modified(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        token = gen_token(user_id=cast(str, self.faker.uuid4()), client_id=client_id, role=Role.AGENT, assigned=True)
+
+        incident = create_random_incident(self.faker, client_id=client_id)
+        etag = incidents_etag([(incident.id, incident.last_modified, 3)])
+
+        user_repo_mock = Mock(AsyncUserRepository)
+        employee_repo_mock = Mock(AsyncEmployeeRepository)
+
+        incident_repo_mock = Mock(AsyncIncidentRepository)
+        cast(Mock, incident_repo_mock.get).return_value = incident
+        cast(Mock, incident_repo_mock.get_last_seq).return_value = 3
+
+        with (
+            self.container.async_incident_repo.override(incident_repo_mock),
+            self.container.async_user_repo.override(user_repo_mock),
+            self.container.async_employee_repo.override(employee_repo_mock),
+        ):
+            async with self.client.get(
+                self.INCIDENT_API_DETAIL_URL.format(incident_id=incident.id),
+                headers={**self.token_headers(token), 'If-None-Match': f'W/"stale", "{etag}"'},
+            ) as resp:
+                self.assertEqual(resp.status, 304)
+                self.assertEqual(resp.headers['ETag'], f'"{etag}"')
+
+        # Neither the history nor the people involved are read
+        cast(Mock, incident_repo_mock.get_history).assert_not_called()
+        cast(Mock, user_repo_mock.get_many).assert_not_called()
+        cast(Mock, employee_repo_mock.get_many).assert_not_called()
+
+    async def test_incident_detail_not_found(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        token = gen_token(user_id=cast(str, self.faker.uuid4()), client_id=client_id, role=Role.AGENT, assigned=True)
+
+        incident_repo_mock = Mock(AsyncIncidentRepository)
+        cast(Mock, incident_repo_mock.get).return_value = None
+        cast(Mock, incident_repo_mock.get_history).return_value = async_iter([])
+
+        with self.container.async_incident_repo.override(incident_repo_mock):
+            async with self.client.get(
+                self.INCIDENT_API_DETAIL_URL.format(incident_id=self.faker.uuid4()), headers=self.token_headers(token)
+            ) as resp:
+                self.assertEqual(resp.status, 404)
+                self.assertEqual(await resp.json(), {'code': 404, 'message': 'Incident not found.'})
+
+    async def test_incident_detail_not_found_history_cancelled(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        token = gen_token(user_id=cast(str, self.faker.uuid4()), client_id=client_id, role=Role.AGENT, assigned=True)
+        history_started = asyncio.Event()
+        history_cancelled: list[bool] = []
+
+        async def slow_history(**_: object) -> AsyncGenerator[HistoryEntry, None]:
+            history_started.set()
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                history_cancelled.append(True)
+                raise
+            yield create_random_history_entry(self.faker, seq=1)
+
+        async def get(**_: object) -> None:
+            # The incident is found missing while its history is being read
+            await history_started.wait()
+
+        incident_repo_mock = Mock(AsyncIncidentRepository)
+        cast(Mock, incident_repo_mock.get).side_effect = get
+        cast(Mock, incident_repo_mock.get_history).side_effect = slow_history
+
+        with self.container.async_incident_repo.override(incident_repo_mock):
+            async with (
+                asyncio.timeout(2),
+                self.client.get(
+                    self.INCIDENT_API_DETAIL_URL.format(incident_id=self.faker.uuid4()), headers=self.token_headers(token)
+                ) as resp,
+            ):
+                self.assertEqual(resp.status, 404)
+
+        self.assertEqual(history_cancelled, [True])
+
+    async def test_incident_detail_invalid_incident_id(self) -> None:
+        token = gen_token(
+            user_id=cast(str, self.faker.uuid4()), client_id=cast(str, self.faker.uuid4()), role=Role.AGENT, assigned=True
+        )
+
+        async with self.client.get(
+            self.INCIDENT_API_DETAIL_URL.format(incident_id='invalid-incident-id'), headers=self.token_headers(token)
+        ) as resp:
+            self.assertEqual(resp.status, 400)
+            self.assertEqual(await resp.json(), {'code': 400, 'message': 'Invalid incident ID.'})
+
+    async def test_incidents_by_client_not_found(self) -> None:
+        client_repo_mock = Mock(AsyncClientRepository)
+        cast(Mock, client_repo_mock.get).return_value = None
+
+        with self.container.async_client_repo.override(client_repo_mock):
+            async with self.client.get(self.INCIDENTS_BY_CLIENT_URL.format(client_id=self.faker.uuid4())) as resp:
+                self.assertEqual(resp.status, 404)
+                self.assertEqual(await resp.json(), {'code': 404, 'message': 'Client not found.'})
+
+    async def test_incidents_by_client(self) -> None:
+        client = Client(id=cast(str, self.faker.uuid4()), name=self.faker.company(), email_incidents=self.faker.email())
+        incidents = [create_random_incident(self.faker, client_id=client.id) for _ in range(5)]
+        histories = {
+            x.id: [create_random_history_entry(self.faker, seq=0, client_id=client.id, incident_id=x.id)] for x in incidents
+        }
+
+        client_repo_mock = Mock(AsyncClientRepository)
+        cast(Mock, client_repo_mock.get).return_value = client
+
+        cases: list[tuple[dict[str, str], dict[str, str]]] = [
+            ({'limit': '5'}, {}),
+            ({'stream': 'true'}, {}),
+            ({}, {'Accept': 'application/x-ndjson'}),
+        ]
+
+        for params, headers in cases:
+            incident_repo_mock = Mock(AsyncIncidentRepository)
+            cast(Mock, incident_repo_mock.get_all_by_client).return_value = async_iter(incidents)
+            cast(Mock, incident_repo_mock.get_histories).side_effect = lambda client_id, incident_ids: {  # noqa: ARG005
+                x: histories[x] for x in incident_ids
+            }
+
+            with (
+                self.subTest(params=params, headers=headers),
+                self.container.async_client_repo.override(client_repo_mock),
+                self.container.async_incident_repo.override(incident_repo_mock),
+            ):
+                async with self.client.get(
+                    self.INCIDENTS_BY_CLIENT_URL.format(client_id=client.id), params=params, headers=headers
+                ) as resp:
+                    self.assertEqual(resp.status, 200)
+                    body = await resp.text()
+                    next_cursor = resp.headers.get('X-Next-Cursor')
+
+                ndjson = 'Accept' in headers
+                resp_data = [json.loads(x) for x in body.splitlines()] if ndjson else json.loads(body)
+
+                self.assertEqual([x['id'] for x in resp_data], [x.id for x in incidents])
+                self.assertEqual(next_cursor, encode_cursor(incidents[-1]) if 'limit' in params else None)
+
+    async def test_incidents_by_client_invalid_params(self) -> None:
+        cases: list[tuple[dict[str, str], str]] = [
+            ({'limit': '0'}, 'Invalid limit. Limit must be 1 or greater.'),
+            ({'cursor': 'invalid-cursor'}, 'Invalid cursor.'),
+        ]
+
+        for params, message in cases:
+            with self.subTest(params=params):
+                async with self.client.get(
+                    self.INCIDENTS_BY_CLIENT_URL.format(client_id=self.faker.uuid4()), params=params
+                ) as resp:
+                    self.assertEqual(resp.status, 400)
+                    self.assertEqual(await resp.json(), {'code': 400, 'message': message})
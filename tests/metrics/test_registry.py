@@ -0,0 +1,128 @@
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from metrics import MetricsRegistry, observed_methods
+from metrics.instrument import REPOSITORY_CALL_DURATION
+
+
+@observed_methods('test_repo')
+class Repository:
+    def get(self, found: bool) -> int | None:  # noqa: FBT001
+        return 1 if found else None
+
+    def fail(self) -> None:
+        raise ValueError
+
+    def stream(self, n: int) -> Generator[int, None, None]:
+        yield from range(n)
+
+
+def call_count(method: str, outcome: str) -> float:
+    counts = REPOSITORY_CALL_DURATION.values().get(('test_repo', method, outcome))
+    return 0.0 if counts is None else sum(counts[:-1], 0.0)
+
+
+class TestRegistry(TestCase):
+    def setUp(self) -> None:
+        self.registry = MetricsRegistry()
+
+    def test_counter(self) -> None:
+        counter = self.registry.counter('lookups_total', 'Lookups.', ['outcome'])
+        counter.inc('hit')
+        counter.inc('hit', amount=2)
+        counter.inc('miss')
+
+        self.assertEqual(
+            self.registry.render(),
+            '# HELP lookups_total Lookups.\n'
+            '# TYPE lookups_total counter\n'
+            'lookups_total{outcome="hit"} 3\n'
+            'lookups_total{outcome="miss"} 1\n',
+        )
+
+    def test_histogram(self) -> None:
+        histogram = self.registry.histogram('duration_seconds', 'Duration.', ['endpoint'], buckets=[0.1, 1.0])
+        histogram.observe(0.05, '/a')
+        histogram.observe(0.5, '/a')
+        histogram.observe(2, '/a')
+
+        self.assertEqual(
+            self.registry.render(),
+            '# HELP duration_seconds Duration.\n'
+            '# TYPE duration_seconds histogram\n'
+            'duration_seconds_bucket{endpoint="/a",le="0.1"} 1\n'
+            'duration_seconds_bucket{endpoint="/a",le="1.0"} 2\n'
+            'duration_seconds_bucket{endpoint="/a",le="+Inf"} 3\n'
+            'duration_seconds_sum{endpoint="/a"} 2.55\n'
+            'duration_seconds_count{endpoint="/a"} 3\n',
+        )
+
+    def test_gauge(self) -> None:
+        gauge = self.registry.gauge('state', 'State.', ['name'])
+        gauge.set(2, 'a')
+        gauge.set(0, 'a')
+
+        self.assertEqual(self.registry.render(), '# HELP state State.\n# TYPE state gauge\nstate{name="a"} 0\n')
+
+    def test_gauge_function(self) -> None:
+        gauge = self.registry.gauge('size', 'Size.', [])
+        items = [1, 2]
+        gauge.set_function(lambda: len(items))
+        items.append(3)
+
+        self.assertEqual(gauge.values(), {(): 3})
+
+    def test_threads_added_up(self) -> None:
+        counter = self.registry.counter('calls_total', 'Calls.', [])
+
+        def work(_: int) -> None:
+            for _ in range(1000):
+                counter.inc()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(work, range(16)))
+
+        self.assertEqual(counter.values(), {(): 16000})
+
+    def test_label_escaping(self) -> None:
+        counter = self.registry.counter('errors_total', 'Errors.', ['message'])
+        counter.inc('say "hi"\n')
+
+        self.assertIn('errors_total{message="say \\"hi\\"\\n"} 1\n', self.registry.render())
+
+
+class TestObserved(TestCase):
+    def setUp(self) -> None:
+        self.repo = Repository()
+
+    def test_outcomes(self) -> None:
+        ok, not_found, error = call_count('get', 'ok'), call_count('get', 'not_found'), call_count('fail', 'error')
+
+        self.repo.get(found=True)
+        self.repo.get(found=False)
+        with self.assertRaises(ValueError):
+            self.repo.fail()
+
+        self.assertEqual(call_count('get', 'ok'), ok + 1)
+        self.assertEqual(call_count('get', 'not_found'), not_found + 1)
+        self.assertEqual(call_count('fail', 'error'), error + 1)
+
+    def test_generator_recorded_once_exhausted(self) -> None:
+        before = call_count('stream', 'ok')
+
+        gen = self.repo.stream(3)
+        next(gen)
+        self.assertEqual(call_count('stream', 'ok'), before)
+        self.assertEqual(list(gen), [1, 2])
+
+        self.assertEqual(call_count('stream', 'ok'), before + 1)
+
+    def test_generator_recorded_when_closed(self) -> None:
+        before = call_count('stream', 'ok')
+
+        gen = self.repo.stream(3)
+        next(gen)
+        gen.close()
+
+        self.assertEqual(call_count('stream', 'ok'), before + 1)
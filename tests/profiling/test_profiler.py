@@ -0,0 +1,135 @@
+import cProfile
+import os
+import pstats
+import tempfile
+import threading
+from typing import cast
+from unittest import IsolatedAsyncioTestCase, TestCase, skipUnless
+from unittest.mock import patch
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from app import create_app
+from app_async import create_async_app
+from concurrency import FanOutExecutor
+from profiling import PROFILE_HEADER, PROFILES_ALL_THREADS, RequestProfile, finish_request_profile, start_request_profile
+
+
+def busy_work() -> str:
+    total = 0
+    for i in range(20000):
+        total += i
+    return threading.current_thread().name
+
+
+def profiled_functions(path: str) -> set[str]:
+    return {name for _, _, name in pstats.Stats(path).stats}  # type: ignore[attr-defined]
+
+
+def summary_functions(profile: RequestProfile) -> list[str]:
+    return [str(x['function']) for x in profile.summary(limit=1000)]
+
+
+class TestProfiler(TestCase):
+    def setUp(self) -> None:
+        self.executor = FanOutExecutor(max_workers=2)
+
+    def tearDown(self) -> None:
+        self.executor.shutdown()
+
+    def test_request_thread_profiled(self) -> None:
+        profile = cast(RequestProfile, start_request_profile())
+        try:
+            busy_work()
+        finally:
+            finish_request_profile(profile)
+
+        self.assertTrue(any(x.endswith('(busy_work)') for x in summary_functions(profile)))
+
+    @skipUnless(PROFILES_ALL_THREADS, 'cProfile only covers the thread that enabled it before Python 3.12')
+    def test_executor_threads_included(self) -> None:
+        profile = cast(RequestProfile, start_request_profile())
+        try:
+            with self.executor.group() as group:
+                # Waiting on the task inside the group makes a pool thread run it
+                thread_name = group.submit(busy_work).result()
+        finally:
+            finish_request_profile(profile)
+
+        self.assertTrue(thread_name.startswith('fanout'))
+        self.assertTrue(any(x.endswith('(busy_work)') for x in summary_functions(profile)))
+
+    def test_one_request_at_a_time(self) -> None:
+        first = start_request_profile()
+        try:
+            self.assertIsNotNone(first)
+            # Another request, here from another thread, is not profiled while the first one is
+            self.assertEqual(self.executor.map(lambda _: start_request_profile(), range(1)), [None])
+        finally:
+            finish_request_profile(cast(RequestProfile, first))
+
+        second = start_request_profile()
+        self.assertIsNotNone(second)
+        finish_request_profile(cast(RequestProfile, second))
+
+    @skipUnless(PROFILES_ALL_THREADS, 'Before Python 3.12 a profiler replaces the previous one without failing')
+    def test_other_profiler_active(self) -> None:
+        other = cProfile.Profile()
+        other.enable()
+        try:
+            self.assertIsNone(start_request_profile())
+        finally:
+            other.disable()
+
+        # The failed start did not keep other requests from being profiled
+        profile = start_request_profile()
+        self.assertIsNotNone(profile)
+        finish_request_profile(cast(RequestProfile, profile))
+
+    def test_not_profiled(self) -> None:
+        profile = RequestProfile()
+
+        self.assertIsNone(profile.stats())
+        self.assertEqual(profile.summary(), [])
+
+
+class TestProfilingHook(TestCase):
+    def test_profile_saved(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, patch.dict(os.environ, {'ENABLE_PROFILING': '1', 'PROFILING_DIR': tmp}):
+            client = create_app().test_client()
+
+            with self.assertLogs('profiling') as logs:
+                resp = client.get('/api/v1/health/incidentquery', headers={PROFILE_HEADER: '1'})
+            client.get('/api/v1/health/incidentquery')
+
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(len(os.listdir(tmp)), 1)
+            self.assertIn('get', profiled_functions(os.path.join(tmp, os.listdir(tmp)[0])))  # noqa: PTH118
+            self.assertEqual(len(logs.records), 1)
+            self.assertEqual(logs.records[0].json_fields['all_threads'], PROFILES_ALL_THREADS)  # type: ignore[attr-defined]
+
+    def test_profile_busy(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, patch.dict(os.environ, {'ENABLE_PROFILING': '1', 'PROFILING_DIR': tmp}):
+            client = create_app().test_client()
+
+            running = cast(RequestProfile, start_request_profile())
+            try:
+                with self.assertLogs('profiling', 'WARNING'):
+                    resp = client.get('/api/v1/health/incidentquery', headers={PROFILE_HEADER: '1'})
+            finally:
+                finish_request_profile(running)
+
+            # The request is still served, only without being profiled
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(os.listdir(tmp), [])
+
+
+class TestAsyncProfilingHook(IsolatedAsyncioTestCase):
+    async def test_profile_saved(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, patch.dict(os.environ, {'ENABLE_PROFILING': '1', 'PROFILING_DIR': tmp}):
+            async with TestClient(TestServer(create_async_app())) as client:
+                with self.assertLogs('profiling'):
+                    async with client.get('/api/v1/health/incidentquery', headers={PROFILE_HEADER: '1'}) as resp:
+                        self.assertEqual(resp.status, 200)
+
+            self.assertEqual(len(os.listdir(tmp)), 1)
@@ -0,0 +1,88 @@
+import os
+from typing import cast
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from faker import Faker
+
+from app import create_app
+from models import Employee, InvitationStatus, Role
+from repositories import EmployeeRepository
+from repositories.cache import CachedEmployeeRepository
+from repositories.rest import RestEmployeeRepository
+
+
+class TestEmployee(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.inner = Mock(EmployeeRepository)
+        self.repo = CachedEmployeeRepository(self.inner, max_size=10, ttl=60)
+
+    def random_employee(self) -> Employee:
+        return Employee(
+            id=cast(str, self.faker.uuid4()),
+            client_id=cast(str, self.faker.uuid4()),
+            name=self.faker.name(),
+            email=self.faker.email(),
+            role=Role.AGENT,
+            invitation_status=InvitationStatus.ACCEPTED,
+            invitation_date=self.faker.past_datetime(),
+        )
+
+    def test_get_cached(self) -> None:
+        employee = self.random_employee()
+        client_id = cast(str, employee.client_id)
+        cast(Mock, self.inner.get).return_value = employee
+
+        self.assertEqual(self.repo.get(employee.id, client_id), employee)
+        self.assertEqual(self.repo.get(employee.id, client_id), employee)
+
+        cast(Mock, self.inner.get).assert_called_once_with(employee.id, client_id)
+        self.assertEqual((self.repo.cache.hits, self.repo.cache.misses), (1, 1))
+
+    def test_get_not_found_not_cached(self) -> None:
+        employee = self.random_employee()
+        client_id = cast(str, employee.client_id)
+        cast(Mock, self.inner.get).return_value = None
+
+        self.assertIsNone(self.repo.get(employee.id, client_id))
+        self.assertIsNone(self.repo.get(employee.id, client_id))
+
+        self.assertEqual(cast(Mock, self.inner.get).call_count, 2)
+
+    def test_invalidate(self) -> None:
+        employee = self.random_employee()
+        client_id = cast(str, employee.client_id)
+        cast(Mock, self.inner.get).return_value = employee
+
+        self.repo.get(employee.id, client_id)
+        self.repo.invalidate(employee.id, client_id)
+        self.repo.get(employee.id, client_id)
+
+        self.assertEqual(cast(Mock, self.inner.get).call_count, 2)
+
+    def test_get_many(self) -> None:
+        cached, fetched = self.random_employee(), self.random_employee()
+        client_id = cast(str, cached.client_id)
+        cast(Mock, self.inner.get).return_value = cached
+        cast(Mock, self.inner.get_many).return_value = {fetched.id: fetched}
+        missing_id = cast(str, self.faker.uuid4())
+
+        self.repo.get(cached.id, client_id)
+        result = self.repo.get_many([cached.id, fetched.id, missing_id, fetched.id], client_id)
+
+        self.assertEqual(result, {cached.id: cached, fetched.id: fetched})
+        # Only the ids that are not cached are fetched
+        cast(Mock, self.inner.get_many).assert_called_once_with([fetched.id, missing_id], client_id)
+
+        self.assertEqual(self.repo.get_many([fetched.id], client_id), {fetched.id: fetched})
+        cast(Mock, self.inner.get_many).assert_called_once()
+
+    def test_container_selection(self) -> None:
+        self.assertIsInstance(create_app().container.employee_repo(), RestEmployeeRepository)
+
+        with patch.dict(os.environ, {'PROFILE_CACHE_BACKEND': 'memory', 'PROFILE_CACHE_MAX_SIZE': '3'}):
+            repo = create_app().container.employee_repo()
+
+        self.assertIsInstance(repo, CachedEmployeeRepository)
+        self.assertEqual(cast(CachedEmployeeRepository, repo).cache.max_size, 3)
@@ -0,0 +1,175 @@
+import os
+from collections.abc import Callable
+from dataclasses import replace
+from typing import cast
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from faker import Faker
+
+from app import create_app
+from models import HistoryEntry, Incident
+from repositories import IncidentRepository
+from repositories.cache import CachedIncidentRepository
+from repositories.firestore import FirestoreIncidentRepository
+from tests.util import create_random_history_entry, create_random_incident
+
+
+class TestIncident(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.inner = Mock(IncidentRepository)
+        self.repo = CachedIncidentRepository(self.inner, max_listeners=2, max_history=5)
+
+        # Listeners started by the cache, by incident id, along with the mock that stops each one
+        self.listeners: dict[str, Callable[[Incident | None], None]] = {}
+        self.unsubscribes: dict[str, Mock] = {}
+
+        def watch(client_id: str, incident_id: str, on_change: Callable[[Incident | None], None]) -> Mock:  # noqa: ARG001
+            self.listeners[incident_id] = on_change
+            self.unsubscribes[incident_id] = Mock()
+            return self.unsubscribes[incident_id]
+
+        cast(Mock, self.inner.watch).side_effect = watch
+
+    def watched_incident(self) -> Incident:
+        # Reads an incident through the cache, which starts listening to it
+        incident = create_random_incident(self.faker)
+        cast(Mock, self.inner.get).return_value = incident
+
+        self.repo.get(incident.client_id, incident.id)
+        self.listeners[incident.id](incident)
+        return incident
+
+    def history(self, incident: Incident, n: int) -> list[HistoryEntry]:
+        return [
+            create_random_history_entry(self.faker, seq=i, client_id=incident.client_id, incident_id=incident.id)
+            for i in range(n)
+        ]
+
+    def test_get_cached(self) -> None:
+        incident = self.watched_incident()
+
+        self.assertEqual(self.repo.get(incident.client_id, incident.id), incident)
+        self.assertEqual(self.repo.get(incident.client_id, incident.id), incident)
+
+        cast(Mock, self.inner.get).assert_called_once_with(incident.client_id, incident.id)
+        cast(Mock, self.inner.watch).assert_called_once()
+        self.assertEqual(self.repo.stats(), {'hits': 2, 'misses': 1, 'invalidations': 0, 'listeners': 1})
+
+    def test_get_not_found_not_watched(self) -> None:
+        cast(Mock, self.inner.get).return_value = None
+
+        self.assertIsNone(self.repo.get(cast(str, self.faker.uuid4()), cast(str, self.faker.uuid4())))
+
+        cast(Mock, self.inner.watch).assert_not_called()
+
+    def test_get_before_first_notification(self) -> None:
+        incident = create_random_incident(self.faker)
+        cast(Mock, self.inner.get).return_value = incident
+
+        self.repo.get(incident.client_id, incident.id)
+        self.repo.get(incident.client_id, incident.id)
+
+        # Read through until the listener reports the current state, without starting a second listener
+        self.assertEqual(cast(Mock, self.inner.get).call_count, 2)
+        cast(Mock, self.inner.watch).assert_called_once()
+
+    def test_history_cached(self) -> None:
+        incident = self.watched_incident()
+        history = self.history(incident, 3)
+        cast(Mock, self.inner.get_history).side_effect = lambda *_: iter(history)
+
+        self.assertEqual(list(self.repo.get_history(incident.client_id, incident.id)), history)
+        self.assertEqual(list(self.repo.get_history(incident.client_id, incident.id)), history)
+
+        cast(Mock, self.inner.get_history).assert_called_once_with(incident.client_id, incident.id)
+
+    def test_change_replaces_incident_and_history(self) -> None:
+        incident = self.watched_incident()
+        history = self.history(incident, 3)
+        cast(Mock, self.inner.get_history).side_effect = lambda *_: iter(history)
+        list(self.repo.get_history(incident.client_id, incident.id))
+
+        updated = replace(incident, name=self.faker.sentence(3))
+        history = self.history(incident, 4)
+        self.listeners[incident.id](updated)
+
+        self.assertEqual(self.repo.get(incident.client_id, incident.id), updated)
+        self.assertEqual(list(self.repo.get_history(incident.client_id, incident.id)), history)
+
+        cast(Mock, self.inner.get).assert_called_once()
+        self.assertEqual(cast(Mock, self.inner.get_history).call_count, 2)
+        self.assertEqual(self.repo.stats()['invalidations'], 1)
+
+    def test_history_changed_while_reading_not_cached(self) -> None:
+        incident = self.watched_incident()
+        history = self.history(incident, 2)
+
+        def get_history(*_: object) -> list[HistoryEntry]:
+            # A new entry is added while the history is being read
+            self.listeners[incident.id](incident)
+            return history
+
+        cast(Mock, self.inner.get_history).side_effect = get_history
+
+        list(self.repo.get_history(incident.client_id, incident.id))
+        list(self.repo.get_history(incident.client_id, incident.id))
+
+        self.assertEqual(cast(Mock, self.inner.get_history).call_count, 2)
+
+    def test_long_history_not_cached(self) -> None:
+        incident = self.watched_incident()
+        history = self.history(incident, 6)
+        cast(Mock, self.inner.get_history).side_effect = lambda *_: iter(history)
+
+        list(self.repo.get_history(incident.client_id, incident.id))
+        list(self.repo.get_history(incident.client_id, incident.id))
+
+        self.assertEqual(cast(Mock, self.inner.get_history).call_count, 2)
+
+    def test_deleted_incident_removed(self) -> None:
+        incident = self.watched_incident()
+
+        self.listeners[incident.id](None)
+        # The listener is stopped by the next request, not by the thread that notified the deletion
+        self.unsubscribes[incident.id].assert_not_called()
+        cast(Mock, self.inner.get).return_value = None
+
+        self.assertIsNone(self.repo.get(incident.client_id, incident.id))
+        self.unsubscribes[incident.id].assert_called_once()
+        self.assertEqual(self.repo.stats()['listeners'], 0)
+
+    def test_listener_limit(self) -> None:
+        first = self.watched_incident()
+        second = self.watched_incident()
+        self.repo.get(first.client_id, first.id)
+
+        # The least recently used incident is evicted to make room
+        third = self.watched_incident()
+
+        self.unsubscribes[second.id].assert_called_once()
+        self.unsubscribes[first.id].assert_not_called()
+        self.assertEqual(self.repo.stats()['listeners'], 2)
+
+        # Notifications of an evicted incident are ignored
+        self.listeners[second.id](second)
+        self.assertEqual(self.repo.get(third.client_id, third.id), third)
+        self.assertEqual(self.repo.stats()['listeners'], 2)
+
+    def test_clear(self) -> None:
+        incident = self.watched_incident()
+
+        self.repo.clear()
+
+        self.unsubscribes[incident.id].assert_called_once()
+        self.assertEqual(self.repo.stats()['listeners'], 0)
+
+    def test_container_selection(self) -> None:
+        self.assertIsInstance(create_app().container.incident_repo(), FirestoreIncidentRepository)
+
+        with patch.dict(os.environ, {'INCIDENT_CACHE_BACKEND': 'memory', 'INCIDENT_CACHE_MAX_LISTENERS': '10'}):
+            repo = create_app().container.incident_repo()
+
+        self.assertIsInstance(repo, CachedIncidentRepository)
+        self.assertEqual(cast(CachedIncidentRepository, repo).max_listeners, 10)
@@ -0,0 +1,82 @@
+import os
+from typing import cast
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from faker import Faker
+
+from app import create_app
+from models import User
+from repositories import UserRepository
+from repositories.cache import CachedUserRepository
+from repositories.rest import RestUserRepository
+
+
+class TestUser(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.inner = Mock(UserRepository)
+        self.repo = CachedUserRepository(self.inner, max_size=10, ttl=60)
+
+    def random_user(self) -> User:
+        return User(
+            id=cast(str, self.faker.uuid4()),
+            client_id=cast(str, self.faker.uuid4()),
+            name=self.faker.name(),
+            email=self.faker.email(),
+        )
+
+    def test_get_cached(self) -> None:
+        user = self.random_user()
+        cast(Mock, self.inner.get).return_value = user
+
+        self.assertEqual(self.repo.get(user.id, user.client_id), user)
+        self.assertEqual(self.repo.get(user.id, user.client_id), user)
+
+        cast(Mock, self.inner.get).assert_called_once_with(user.id, user.client_id)
+        self.assertEqual((self.repo.cache.hits, self.repo.cache.misses), (1, 1))
+
+    def test_get_not_found_not_cached(self) -> None:
+        user = self.random_user()
+        cast(Mock, self.inner.get).return_value = None
+
+        self.assertIsNone(self.repo.get(user.id, user.client_id))
+        self.assertIsNone(self.repo.get(user.id, user.client_id))
+
+        self.assertEqual(cast(Mock, self.inner.get).call_count, 2)
+
+    def test_invalidate(self) -> None:
+        user = self.random_user()
+        cast(Mock, self.inner.get).return_value = user
+
+        self.repo.get(user.id, user.client_id)
+        self.repo.invalidate(user.id, user.client_id)
+        self.repo.get(user.id, user.client_id)
+
+        self.assertEqual(cast(Mock, self.inner.get).call_count, 2)
+
+    def test_get_many(self) -> None:
+        cached, fetched = self.random_user(), self.random_user()
+        client_id = cached.client_id
+        cast(Mock, self.inner.get).return_value = cached
+        cast(Mock, self.inner.get_many).return_value = {fetched.id: fetched}
+        missing_id = cast(str, self.faker.uuid4())
+
+        self.repo.get(cached.id, client_id)
+        result = self.repo.get_many([cached.id, fetched.id, missing_id, fetched.id], client_id)
+
+        self.assertEqual(result, {cached.id: cached, fetched.id: fetched})
+        # Only the ids that are not cached are fetched
+        cast(Mock, self.inner.get_many).assert_called_once_with([fetched.id, missing_id], client_id)
+
+        self.assertEqual(self.repo.get_many([fetched.id], client_id), {fetched.id: fetched})
+        cast(Mock, self.inner.get_many).assert_called_once()
+
+    def test_container_selection(self) -> None:
+        self.assertIsInstance(create_app().container.user_repo(), RestUserRepository)
+
+        with patch.dict(os.environ, {'PROFILE_CACHE_BACKEND': 'memory', 'PROFILE_CACHE_TTL': '5'}):
+            repo = create_app().container.user_repo()
+
+        self.assertIsInstance(repo, CachedUserRepository)
+        self.assertEqual(cast(CachedUserRepository, repo).cache.ttl, 5)
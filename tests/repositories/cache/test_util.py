@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+from metrics import CACHE_LOOKUPS
+from repositories.cache import TTLCache
+
+
+class TestTTLCache(TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.cache: TTLCache[str, int] = TTLCache(max_size=2, ttl=10, clock=lambda: self.now)
+
+    def test_get_miss(self) -> None:
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+    def test_get_hit(self) -> None:
+        self.cache.put('a', 1)
+
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 0))
+
+    def test_expired(self) -> None:
+        self.cache.put('a', 1)
+        self.now = 10
+
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_evicts_least_recently_used(self) -> None:
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.get('a')
+        self.cache.put('c', 3)
+
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('c'), 3)
+
+    def test_invalidate(self) -> None:
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.invalidate('a')
+
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('b'), 2)
+
+    def test_clear(self) -> None:
+        self.cache.put('a', 1)
+        self.cache.clear()
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_named_lookups_recorded(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(max_size=2, ttl=10, name='test')
+        before = CACHE_LOOKUPS.values()
+
+        cache.put('a', 1)
+        cache.get('a')
+        cache.get('b')
+
+        after = CACHE_LOOKUPS.values()
+        self.assertEqual(after[('test', 'hit')] - before.get(('test', 'hit'), 0), 1)
+        self.assertEqual(after[('test', 'miss')] - before.get(('test', 'miss'), 0), 1)
@@ -0,0 +1,103 @@
+import os
+from typing import cast
+from unittest import IsolatedAsyncioTestCase, skipUnless
+
+import requests
+from faker import Faker
+from google.cloud.firestore import Client as FirestoreClient  # type: ignore[import-untyped]
+
+from models import HistorySummary
+from repositories.firestore import FirestoreAsyncIncidentRepository
+
+from .test_incident import FIRESTORE_DATABASE, FirestoreTestData
+
+
+@skipUnless('FIRESTORE_EMULATOR_HOST' in os.environ, 'Firestore emulator not available')
+class TestAsyncIncident(FirestoreTestData, IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+
+        # Reset Firestore emulator before each test
+        requests.delete(
+            f'http://{os.environ["FIRESTORE_EMULATOR_HOST"]}/emulator/v1/projects/google-cloud-firestore-emulator/databases/{FIRESTORE_DATABASE}/documents',
+            timeout=5,
+        )
+
+        self.repo = FirestoreAsyncIncidentRepository(FIRESTORE_DATABASE)
+        self.client = FirestoreClient(database=FIRESTORE_DATABASE)
+
+    async def test_get(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        incident = self.add_random_incidents(1, client_id=client_id)[0]
+
+        self.assertEqual(await self.repo.get(client_id=client_id, incident_id=incident.id), incident)
+        self.assertIsNone(await self.repo.get(client_id=client_id, incident_id=cast(str, self.faker.uuid4())))
+
+    async def test_get_all_by_assignee(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        assignee_id = cast(str, self.faker.uuid4())
+
+        self.add_random_incidents(2, client_id=client_id)
+        incidents = self.add_random_incidents(5, client_id=client_id, assigned_to=assignee_id)
+        incidents.sort(key=lambda i: (i.last_modified, i.id), reverse=True)
+
+        page = [x async for x in self.repo.get_all_by_assignee(client_id=client_id, assignee_id=assignee_id, limit=2)]
+        rest = [
+            x
+            async for x in self.repo.get_all_by_assignee(
+                client_id=client_id,
+                assignee_id=assignee_id,
+                start_after=(page[-1].last_modified, page[-1].id),
+            )
+        ]
+
+        self.assertEqual(page + rest, incidents)
+        self.assertEqual(await self.repo.count_by_assignee(client_id=client_id, assignee_id=assignee_id), 5)
+
+    async def test_get_histories(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        incidents = self.add_random_incidents(3, client_id=client_id)
+        entries = {
+            incident.id: self.add_random_history_entries(n, client_id=client_id, incident_id=incident.id)
+            for n, incident in enumerate(incidents, start=1)
+        }
+
+        result = await self.repo.get_histories(client_id=client_id, incident_ids=[x.id for x in incidents])
+
+        self.assertEqual(result, entries)
+
+    async def test_get_summaries(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        incidents = self.add_random_incidents(3, client_id=client_id)
+        entries = {
+            incident.id: self.add_random_history_entries(2, client_id=client_id, incident_id=incident.id)
+            for incident in incidents[:2]
+        }
+
+        result = await self.repo.get_summaries(client_id=client_id, incident_ids=[x.id for x in incidents])
+
+        self.assertEqual(
+            result,
+            {
+                incident_id: HistorySummary(
+                    incident_id=incident_id,
+                    client_id=client_id,
+                    filing_date=history[0].date,
+                    status=history[-1].action,
+                )
+                for incident_id, history in entries.items()
+            },
+        )
+
+    async def test_get_all_by_client(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        incidents = self.add_random_incidents(3, client_id=client_id)
+        incidents.sort(key=lambda i: (i.last_modified, i.id), reverse=True)
+
+        result = [x async for x in self.repo.get_all_by_client(client_id=client_id)]
+
+        self.assertEqual(result, incidents)
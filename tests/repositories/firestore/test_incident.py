@@ -1,7 +1,7 @@
 import contextlib
 import os
-from dataclasses import asdict
-from datetime import UTC
+import queue
+from dataclasses import asdict, replace
 from typing import cast
 from unittest import skipUnless
 
@@ -12,26 +12,18 @@ from google.cloud.firestore import Client as FirestoreClient  # type: ignore[imp
 from google.cloud.firestore_v1 import CollectionReference
 from unittest_parametrize import ParametrizedTestCase, parametrize
 
-from models import HistoryEntry, Incident
+from models import Action, HistoryEntry, HistorySummary, Incident, PartialIncident, Risk
+from repositories import IncidentFilter, IncidentSort
 from repositories.firestore import FirestoreIncidentRepository
 from tests.util import create_random_history_entry, create_random_incident
 
 FIRESTORE_DATABASE = '(default)'
 
 
-@skipUnless('FIRESTORE_EMULATOR_HOST' in os.environ, 'Firestore emulator not available')
-class TestClient(ParametrizedTestCase):
-    def setUp(self) -> None:
-        self.faker = Faker()
-
-        # Reset Firestore emulator before each test
-        requests.delete(
-            f'http://{os.environ["FIRESTORE_EMULATOR_HOST"]}/emulator/v1/projects/google-cloud-firestore-emulator/databases/{FIRESTORE_DATABASE}/documents',
-            timeout=5,
-        )
-
-        self.repo = FirestoreIncidentRepository(FIRESTORE_DATABASE)
-        self.client = FirestoreClient(database=FIRESTORE_DATABASE)
+class FirestoreTestData:
+    # Seeds the emulator through the sync client, shared by the tests of the sync and async repositories
+    faker: Faker
+    client: FirestoreClient
 
     def add_random_incidents(
         self, n: int, client_id: str | None = None, reported_by: str | None = None, assigned_to: str | None = None
@@ -54,8 +46,6 @@ class TestClient(ParametrizedTestCase):
                 client_ref.create({})
 
             incident_ref = cast(CollectionReference, client_ref.collection('incidents')).document(incident.id)
-            incident.last_modified = self.faker.past_datetime(tzinfo=UTC)  # type: ignore[attr-defined]
-            incident_dict['last_modified'] = incident.last_modified  # type: ignore[attr-defined]
             incident_ref.create(incident_dict)
 
         return incidents
@@ -81,6 +71,21 @@ class TestClient(ParametrizedTestCase):
 
         return entries
 
+
+@skipUnless('FIRESTORE_EMULATOR_HOST' in os.environ, 'Firestore emulator not available')
+class TestClient(FirestoreTestData, ParametrizedTestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+
+        # Reset Firestore emulator before each test
+        requests.delete(
+            f'http://{os.environ["FIRESTORE_EMULATOR_HOST"]}/emulator/v1/projects/google-cloud-firestore-emulator/databases/{FIRESTORE_DATABASE}/documents',
+            timeout=5,
+        )
+
+        self.repo = FirestoreIncidentRepository(FIRESTORE_DATABASE)
+        self.client = FirestoreClient(database=FIRESTORE_DATABASE)
+
     @parametrize(
         ['field', 'offset', 'limit'],
         [
@@ -111,7 +116,7 @@ class TestClient(ParametrizedTestCase):
                 self.repo.get_all_by_assignee(client_id=client_id, assignee_id=assignee_id, offset=offset, limit=limit)
             )
 
-        incidents.sort(key=lambda i: i.last_modified, reverse=True)  # type: ignore[attr-defined]
+        incidents.sort(key=lambda i: i.last_modified, reverse=True)
 
         if offset is not None:
             incidents = incidents[offset:]
@@ -121,6 +126,80 @@ class TestClient(ParametrizedTestCase):
 
         self.assertEqual(result, incidents)
 
+    @parametrize(
+        'field',
+        [
+            ('reported_by',),
+            ('assigned_to',),
+        ],
+    )
+    def test_get_all_by_field_start_after(self, field: str) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        person_id = cast(str, self.faker.uuid4())
+
+        incidents = self.add_random_incidents(
+            5,
+            client_id=client_id,
+            reported_by=person_id if field == 'reported_by' else None,
+            assigned_to=person_id if field == 'assigned_to' else None,
+        )
+        incidents.sort(key=lambda i: i.last_modified, reverse=True)
+
+        start_after = (incidents[1].last_modified, incidents[1].id)
+        if field == 'reported_by':
+            result = list(
+                self.repo.get_all_by_reporter(client_id=client_id, reporter_id=person_id, limit=2, start_after=start_after)
+            )
+        else:
+            result = list(
+                self.repo.get_all_by_assignee(client_id=client_id, assignee_id=person_id, limit=2, start_after=start_after)
+            )
+
+        self.assertEqual(result, incidents[2:4])
+
+    @parametrize(
+        'field',
+        [
+            ('reported_by',),
+            ('assigned_to',),
+        ],
+    )
+    def test_select_all_by_field(self, field: str) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        person_id = cast(str, self.faker.uuid4())
+
+        self.add_random_incidents(2, client_id=client_id)
+        incidents = self.add_random_incidents(
+            3,
+            client_id=client_id,
+            reported_by=person_id if field == 'reported_by' else None,
+            assigned_to=person_id if field == 'assigned_to' else None,
+        )
+        incidents.sort(key=lambda i: i.last_modified, reverse=True)
+
+        start_after = (incidents[0].last_modified, incidents[0].id)
+        if field == 'reported_by':
+            result = list(
+                self.repo.select_all_by_reporter(
+                    client_id=client_id, reporter_id=person_id, fields=['name', 'risk'], start_after=start_after
+                )
+            )
+        else:
+            result = list(
+                self.repo.select_all_by_assignee(
+                    client_id=client_id, assignee_id=person_id, fields=['name', 'risk'], start_after=start_after
+                )
+            )
+
+        # Only the selected fields are read, along with the ones needed for cursors
+        self.assertEqual(
+            result,
+            [
+                PartialIncident(id=x.id, client_id=client_id, last_modified=x.last_modified, name=x.name, risk=x.risk)
+                for x in incidents[1:]
+            ],
+        )
+
     @parametrize(
         'field',
         [
@@ -140,6 +219,28 @@ class TestClient(ParametrizedTestCase):
 
         self.assertEqual(result, len(incidents))
 
+    def test_select_all_by_assignee_filtered(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        assignee_id = cast(str, self.faker.uuid4())
+
+        incidents = self.add_random_incidents(8, client_id=client_id, assigned_to=assignee_id)
+        filters = IncidentFilter(risk=Risk.HIGH)
+        # At least one incident matches the filter, whatever the random risks
+        client_ref = self.client.collection('clients').document(client_id)
+        cast(CollectionReference, client_ref.collection('incidents')).document(incidents[0].id).update({'risk': 'HIGH'})
+        incidents[0] = replace(incidents[0], risk=Risk.HIGH)
+
+        expected = sorted((x for x in incidents if x.risk == Risk.HIGH), key=lambda x: (x.name, x.id))
+
+        result = list(
+            self.repo.select_all_by_assignee(
+                client_id=client_id, assignee_id=assignee_id, fields=['name'], filters=filters, sort=IncidentSort.NAME
+            )
+        )
+
+        self.assertEqual([x.id for x in result], [x.id for x in expected])
+        self.assertEqual(self.repo.count_by_assignee(client_id, assignee_id, filters), len(expected))
+
     def test_get_history(self) -> None:
         client_id = cast(str, self.faker.uuid4())
         reporter_id = cast(str, self.faker.uuid4())
@@ -151,6 +252,102 @@ class TestClient(ParametrizedTestCase):
 
         self.assertEqual(result, entries)
 
+    def test_get_histories(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        incidents = self.add_random_incidents(3, client_id=client_id)
+        entries = {
+            incident.id: self.add_random_history_entries(n, client_id=client_id, incident_id=incident.id)
+            for n, incident in enumerate(incidents, start=1)
+        }
+
+        result = self.repo.get_histories(client_id=client_id, incident_ids=[x.id for x in incidents])
+
+        self.assertEqual(result, entries)
+
+    def test_get_histories_empty(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        result = self.repo.get_histories(client_id=client_id, incident_ids=[])
+
+        self.assertEqual(result, {})
+
+    @parametrize(
+        ['n', 'last_ai_response'],
+        [
+            (1, False),
+            (3, False),
+            (3, True),
+        ],
+    )
+    def test_get_summary(self, n: int, last_ai_response: bool) -> None:  # noqa: FBT001
+        client_id = cast(str, self.faker.uuid4())
+
+        incident = self.add_random_incidents(1, client_id=client_id)[0]
+        entries = self.add_random_history_entries(n, client_id=client_id, incident_id=incident.id)
+
+        if last_ai_response:
+            client_ref = self.client.collection('clients').document(client_id)
+            incident_ref = cast(CollectionReference, client_ref.collection('incidents')).document(incident.id)
+            cast(CollectionReference, incident_ref.collection('history')).document(str(n - 1)).update(
+                {'action': Action.AI_RESPONSE}
+            )
+
+        result = self.repo.get_summary(client_id=client_id, incident_id=incident.id)
+
+        self.assertEqual(
+            result,
+            HistorySummary(
+                incident_id=incident.id,
+                client_id=client_id,
+                filing_date=entries[0].date,
+                status=entries[-2].action if last_ai_response else entries[-1].action,
+            ),
+        )
+
+    def test_get_summary_no_history(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        incident = self.add_random_incidents(1, client_id=client_id)[0]
+
+        self.assertIsNone(self.repo.get_summary(client_id=client_id, incident_id=incident.id))
+
+    def test_get_summaries(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        incidents = self.add_random_incidents(3, client_id=client_id)
+        entries = {
+            incident.id: self.add_random_history_entries(2, client_id=client_id, incident_id=incident.id)
+            for incident in incidents[:2]
+        }
+
+        result = self.repo.get_summaries(client_id=client_id, incident_ids=[x.id for x in incidents])
+
+        self.assertEqual(
+            result,
+            {
+                incident_id: HistorySummary(
+                    incident_id=incident_id,
+                    client_id=client_id,
+                    filing_date=history[0].date,
+                    status=history[-1].action,
+                )
+                for incident_id, history in entries.items()
+            },
+        )
+
+    def test_get_last_seqs(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        incidents = self.add_random_incidents(3, client_id=client_id)
+        for n, incident in enumerate(incidents[:2], start=2):
+            self.add_random_history_entries(n, client_id=client_id, incident_id=incident.id)
+
+        result = self.repo.get_last_seqs(client_id=client_id, incident_ids=[x.id for x in incidents])
+
+        self.assertEqual(result, {incidents[0].id: 1, incidents[1].id: 2})
+        self.assertIsNone(self.repo.get_last_seq(client_id=client_id, incident_id=incidents[2].id))
+
     def test_get_existing(self) -> None:
         client_id = cast(str, self.faker.uuid4())
 
@@ -175,7 +372,7 @@ class TestClient(ParametrizedTestCase):
         incidents = self.add_random_incidents(5, client_id=client_id)
 
         # Ordenar los incidentes por la fecha de última modificación, de manera descendente
-        incidents.sort(key=lambda i: i.last_modified, reverse=True)  # type: ignore[attr-defined]
+        incidents.sort(key=lambda i: i.last_modified, reverse=True)
 
         # Llamar función get_all_by_client y verificar el resultado
         result = list(self.repo.get_all_by_client(client_id=client_id))
@@ -183,6 +380,20 @@ class TestClient(ParametrizedTestCase):
         # Comprobar que los incidentes obtenidos sean los esperados
         self.assertEqual(result, incidents)
 
+    def test_get_all_by_client_limit_start_after(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+
+        incidents = self.add_random_incidents(5, client_id=client_id)
+        incidents.sort(key=lambda i: i.last_modified, reverse=True)
+
+        result = list(
+            self.repo.get_all_by_client(
+                client_id=client_id, limit=2, start_after=(incidents[0].last_modified, incidents[0].id)
+            )
+        )
+
+        self.assertEqual(result, incidents[1:3])
+
     def test_get_all_by_client_no_incidents(self) -> None:
         client_id = cast(str, self.faker.uuid4())
 
@@ -200,10 +411,31 @@ class TestClient(ParametrizedTestCase):
         incidents = self.add_random_incidents(incident_count, client_id=client_id)
 
         # Ordenar los incidentes por la fecha de última modificación, de manera descendente
-        incidents.sort(key=lambda i: i.last_modified, reverse=True)  # type: ignore[attr-defined]
+        incidents.sort(key=lambda i: i.last_modified, reverse=True)
 
         # Llamar función get_all_by_client y verificar el resultado
         result = list(self.repo.get_all_by_client(client_id=client_id))
 
         # Comprobar que el resultado coincida con el número de incidentes esperados
         self.assertEqual(result, incidents)
+
+    def test_watch(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        incident = self.add_random_incidents(1, client_id=client_id)[0]
+
+        notifications: queue.Queue[Incident | None] = queue.Queue()
+        unsubscribe = self.repo.watch(client_id, incident.id, notifications.put)
+
+        try:
+            # The current state is notified first, then every change
+            self.assertEqual(notifications.get(timeout=5), incident)
+
+            client_ref = self.client.collection('clients').document(client_id)
+            incident_ref = cast(CollectionReference, client_ref.collection('incidents')).document(incident.id)
+            incident_ref.update({'name': 'updated'})
+            self.assertEqual(notifications.get(timeout=5), replace(incident, name='updated'))
+
+            incident_ref.delete()
+            self.assertIsNone(notifications.get(timeout=5))
+        finally:
+            unsubscribe()
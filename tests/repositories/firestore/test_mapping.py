@@ -0,0 +1,78 @@
+from dataclasses import asdict
+from enum import Enum
+from typing import Any, cast
+from unittest import TestCase
+
+import dacite
+from faker import Faker
+
+from models import Channel, HistoryEntry, Incident, PartialIncident, Risk
+from repositories.firestore.mapping import compile_mapper
+from tests.util import create_random_history_entry, create_random_incident
+
+
+class TestMapping(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+
+    def incident_data(self) -> dict[str, Any]:
+        data = asdict(create_random_incident(self.faker))
+        # Firestore returns the values of the enums
+        data['channel'] = str(data['channel'])
+        data['risk'] = str(data['risk'])
+        return data
+
+    def test_same_as_dacite(self) -> None:
+        incident_data = self.incident_data()
+        history_data = asdict(create_random_history_entry(self.faker, seq=0))
+        history_data['action'] = str(history_data['action'])
+
+        self.assertEqual(
+            compile_mapper(Incident)(incident_data),
+            dacite.from_dict(Incident, incident_data, config=dacite.Config(cast=[Enum])),
+        )
+        self.assertEqual(
+            compile_mapper(HistoryEntry)(history_data),
+            dacite.from_dict(HistoryEntry, history_data, config=dacite.Config(cast=[Enum])),
+        )
+
+    def test_enum_converted(self) -> None:
+        incident = compile_mapper(Incident)(self.incident_data())
+
+        self.assertIs(type(incident.channel), Channel)
+
+    def test_optional_missing(self) -> None:
+        data = self.incident_data()
+        del data['risk']
+
+        self.assertIsNone(compile_mapper(Incident)(data).risk)
+
+    def test_default_missing(self) -> None:
+        data = self.incident_data()
+        del data['channel']
+        del data['reported_by']
+
+        incident = compile_mapper(PartialIncident)(data)
+
+        self.assertIsNone(incident.channel)
+        self.assertEqual(incident.reported_by, '')
+        self.assertEqual(incident.name, data['name'])
+        self.assertEqual(incident.risk, Risk(data['risk']))
+
+    def test_required_missing(self) -> None:
+        data = self.incident_data()
+        del data['name']
+
+        with self.assertRaises(KeyError):
+            compile_mapper(Incident)(data)
+
+    def test_invalid_enum(self) -> None:
+        data = self.incident_data()
+        data['channel'] = self.faker.pystr()
+
+        with self.assertRaises(ValueError):
+            compile_mapper(Incident)(data)
+
+    def test_compiled_once(self) -> None:
+        self.assertIs(compile_mapper(Incident), compile_mapper(Incident))
+        self.assertEqual(cast(Any, compile_mapper(Incident)).__name__, 'map_incident')
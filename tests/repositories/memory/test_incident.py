@@ -0,0 +1,202 @@
+import os
+import tempfile
+from dataclasses import replace
+from typing import cast
+from unittest.mock import Mock, patch
+
+from faker import Faker
+from unittest_parametrize import ParametrizedTestCase, parametrize
+
+from app import create_app
+from models import Action, Channel, HistoryEntry, Incident, PartialIncident, Risk
+from repositories import IncidentFilter, IncidentSort
+from repositories.memory import InMemoryIncidentRepository
+from tests.util import create_random_history_entry, create_random_incident
+
+
+class TestIncident(ParametrizedTestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.repo = InMemoryIncidentRepository()
+        self.client_id = cast(str, self.faker.uuid4())
+
+    def add_random_incidents(self, n: int, reported_by: str | None = None, assigned_to: str | None = None) -> list[Incident]:
+        incidents = [
+            create_random_incident(self.faker, client_id=self.client_id, reported_by=reported_by, assigned_to=assigned_to)
+            for _ in range(n)
+        ]
+        for incident in incidents:
+            self.repo.put(incident)
+        return incidents
+
+    def add_random_history_entries(self, incident: Incident, n: int) -> list[HistoryEntry]:
+        entries = [
+            create_random_history_entry(self.faker, seq=i, client_id=incident.client_id, incident_id=incident.id)
+            for i in range(n)
+        ]
+        # Entries may arrive out of order
+        for entry in reversed(entries):
+            self.repo.add_history_entry(entry)
+        return entries
+
+    def test_get(self) -> None:
+        incident = self.add_random_incidents(1)[0]
+
+        self.assertEqual(self.repo.get(self.client_id, incident.id), incident)
+        self.assertIsNone(self.repo.get(cast(str, self.faker.uuid4()), incident.id))
+
+    @parametrize(
+        ('offset', 'limit'),
+        [
+            (None, None),
+            (None, 3),
+            (2, None),
+            (2, 2),
+            (9, 2),
+        ],
+    )
+    def test_get_all_by_assignee(self, offset: int | None, limit: int | None) -> None:
+        assignee_id = cast(str, self.faker.uuid4())
+        self.add_random_incidents(3)
+        incidents = self.add_random_incidents(6, assigned_to=assignee_id)
+        incidents.sort(key=lambda x: (x.last_modified, x.id), reverse=True)
+
+        result = list(self.repo.get_all_by_assignee(self.client_id, assignee_id, offset=offset, limit=limit))
+
+        start = offset or 0
+        self.assertEqual(result, incidents[start : None if limit is None else start + limit])
+        self.assertEqual(self.repo.count_by_assignee(self.client_id, assignee_id), len(incidents))
+
+    def test_get_all_by_reporter_start_after(self) -> None:
+        reporter_id = cast(str, self.faker.uuid4())
+        incidents = self.add_random_incidents(5, reported_by=reporter_id)
+        incidents.sort(key=lambda x: (x.last_modified, x.id), reverse=True)
+
+        start_after = (incidents[1].last_modified, incidents[1].id)
+        result = list(self.repo.get_all_by_reporter(self.client_id, reporter_id, limit=2, start_after=start_after))
+
+        self.assertEqual(result, incidents[2:4])
+
+    def test_select_all_by_reporter(self) -> None:
+        reporter_id = cast(str, self.faker.uuid4())
+        incidents = self.add_random_incidents(3, reported_by=reporter_id)
+        incidents.sort(key=lambda x: (x.last_modified, x.id), reverse=True)
+
+        result = list(self.repo.select_all_by_reporter(self.client_id, reporter_id, fields=['name', 'risk']))
+
+        self.assertEqual(
+            result,
+            [
+                PartialIncident(id=x.id, client_id=self.client_id, last_modified=x.last_modified, name=x.name, risk=x.risk)
+                for x in incidents
+            ],
+        )
+
+    def test_select_all_by_assignee_filtered_sorted(self) -> None:
+        assignee_id = cast(str, self.faker.uuid4())
+        incidents = self.add_random_incidents(20, assigned_to=assignee_id)
+        filters = IncidentFilter(risk=Risk.HIGH, channel=Channel.WEB)
+
+        expected = sorted(
+            (x for x in incidents if x.risk == Risk.HIGH and x.channel == Channel.WEB), key=lambda x: (x.name, x.id)
+        )
+
+        result = list(
+            self.repo.select_all_by_assignee(
+                self.client_id, assignee_id, fields=['name'], filters=filters, sort=IncidentSort.NAME
+            )
+        )
+
+        self.assertEqual([x.id for x in result], [x.id for x in expected])
+        self.assertEqual(self.repo.count_by_assignee(self.client_id, assignee_id, filters), len(expected))
+
+    def test_cursor_with_sort_by_name(self) -> None:
+        incident = self.add_random_incidents(1)[0]
+
+        with self.assertRaises(ValueError):
+            list(
+                self.repo.get_all_by_assignee(
+                    self.client_id,
+                    incident.assigned_to,
+                    start_after=(incident.last_modified, incident.id),
+                    sort=IncidentSort.NAME,
+                )
+            )
+
+    def test_put_reindexes(self) -> None:
+        incident = self.add_random_incidents(1)[0]
+        assignee_id = cast(str, self.faker.uuid4())
+
+        self.repo.put(replace(incident, assigned_to=assignee_id))
+
+        self.assertEqual(self.repo.count_by_assignee(self.client_id, incident.assigned_to), 0)
+        self.assertEqual(self.repo.count_by_assignee(self.client_id, assignee_id), 1)
+
+    def test_delete(self) -> None:
+        incident = self.add_random_incidents(1)[0]
+        self.add_random_history_entries(incident, 2)
+
+        self.repo.delete(self.client_id, incident.id)
+
+        self.assertIsNone(self.repo.get(self.client_id, incident.id))
+        self.assertEqual(list(self.repo.get_all_by_client(self.client_id)), [])
+        self.assertEqual(list(self.repo.get_history(self.client_id, incident.id)), [])
+
+    def test_history(self) -> None:
+        incidents = self.add_random_incidents(2)
+        history = self.add_random_history_entries(incidents[0], 3)
+
+        self.assertEqual(list(self.repo.get_history(self.client_id, incidents[0].id)), history)
+        self.assertEqual(
+            self.repo.get_histories(self.client_id, [x.id for x in incidents]),
+            {incidents[0].id: history, incidents[1].id: []},
+        )
+        self.assertEqual(self.repo.get_last_seqs(self.client_id, [x.id for x in incidents]), {incidents[0].id: 2})
+        self.assertIsNone(self.repo.get_last_seq(self.client_id, incidents[1].id))
+
+    def test_summary_ignores_ai_responses(self) -> None:
+        incident = self.add_random_incidents(1)[0]
+        history = self.add_random_history_entries(incident, 2)
+        self.repo.add_history_entry(replace(history[-1], seq=2, action=Action.AI_RESPONSE))
+
+        summaries = self.repo.get_summaries(self.client_id, [incident.id])
+
+        self.assertEqual(summaries[incident.id].filing_date, history[0].date)
+        self.assertEqual(summaries[incident.id].status, history[1].action)
+
+    def test_get_all_by_client(self) -> None:
+        incidents = self.add_random_incidents(4)
+        self.repo.put(create_random_incident(self.faker))
+        incidents.sort(key=lambda x: (x.last_modified, x.id), reverse=True)
+
+        self.assertEqual(list(self.repo.get_all_by_client(self.client_id)), incidents)
+        self.assertEqual(list(self.repo.get_all_by_client(self.client_id, limit=2)), incidents[:2])
+
+    def test_watch(self) -> None:
+        incident = self.add_random_incidents(1)[0]
+        on_change = Mock()
+
+        unsubscribe = self.repo.watch(self.client_id, incident.id, on_change)
+        updated = replace(incident, name=self.faker.sentence(3))
+        self.repo.put(updated)
+        self.repo.delete(self.client_id, incident.id)
+        unsubscribe()
+        self.repo.put(incident)
+
+        self.assertEqual([x.args[0] for x in on_change.call_args_list], [incident, updated, None])
+
+    def test_dump_load(self) -> None:
+        incidents = self.add_random_incidents(3)
+        history = self.add_random_history_entries(incidents[0], 2)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            data_file = os.path.join(tmp, 'incidents.json')  # noqa: PTH118
+            self.repo.dump(data_file)
+
+            with patch.dict(os.environ, {'INCIDENT_BACKEND': 'memory', 'INCIDENT_DATA_FILE': data_file}):
+                repo = create_app().container.incident_repo()
+
+        self.assertIsInstance(repo, InMemoryIncidentRepository)
+        for incident in incidents:
+            self.assertEqual(repo.get(self.client_id, incident.id), incident)
+        self.assertEqual(list(repo.get_history(self.client_id, incidents[0].id)), history)
@@ -0,0 +1,162 @@
+from typing import Any, cast
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import Mock
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from faker import Faker
+
+from models import Client, Employee, InvitationStatus, Role, User
+from repositories.rest import (
+    AsyncRestClientRepository,
+    AsyncRestEmployeeRepository,
+    AsyncRestUserRepository,
+    CircuitOpenError,
+    TokenProvider,
+    Upstream,
+    pooled_client_session,
+)
+
+
+class TestAsyncRestRepositories(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.faker = Faker()
+        # Responses by path, any other path is not found
+        self.responses: dict[str, tuple[int, dict[str, Any] | None]] = {}
+        self.calls: list[tuple[str, str | None]] = []
+
+        app = web.Application()
+        app.router.add_get('/{path:.*}', self.handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+
+        self.base_url = str(self.server.make_url('')).rstrip('/')
+        self.session = pooled_client_session()
+
+    async def asyncTearDown(self) -> None:
+        await self.session.close()
+        await self.server.close()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.calls.append((request.path, request.headers.get('Authorization')))
+        status, body = self.responses.get(request.path, (404, None))
+        return web.json_response(body, status=status)
+
+    def random_user(self, client_id: str) -> User:
+        return User(id=cast(str, self.faker.uuid4()), client_id=client_id, name=self.faker.name(), email=self.faker.email())
+
+    def add_user(self, user: User) -> None:
+        self.responses[f'/api/v1/users/{user.client_id}/{user.id}'] = (
+            200,
+            {'id': user.id, 'clientId': user.client_id, 'name': user.name, 'email': user.email},
+        )
+
+    async def test_get_user(self) -> None:
+        user = self.random_user(cast(str, self.faker.uuid4()))
+        self.add_user(user)
+
+        repo = AsyncRestUserRepository(self.base_url, None, self.session)
+
+        self.assertEqual(await repo.get(user.id, user.client_id), user)
+        self.assertEqual(self.calls, [(f'/api/v1/users/{user.client_id}/{user.id}', None)])
+
+    async def test_get_user_with_token_provider(self) -> None:
+        user = self.random_user(cast(str, self.faker.uuid4()))
+        self.add_user(user)
+
+        token = self.faker.pystr()
+        token_provider = Mock(TokenProvider)
+        cast(Mock, token_provider.get_token).return_value = token
+
+        repo = AsyncRestUserRepository(self.base_url, token_provider, self.session)
+        await repo.get(user.id, user.client_id)
+
+        self.assertEqual(self.calls[0][1], f'Bearer {token}')
+
+    async def test_get_user_not_found(self) -> None:
+        repo = AsyncRestUserRepository(self.base_url, None, self.session)
+
+        self.assertIsNone(await repo.get(cast(str, self.faker.uuid4()), cast(str, self.faker.uuid4())))
+
+    async def test_get_user_error(self) -> None:
+        repo = AsyncRestUserRepository(self.base_url, None, self.session)
+
+        for status in [500, 201]:
+            user_id = cast(str, self.faker.uuid4())
+            client_id = cast(str, self.faker.uuid4())
+            self.responses[f'/api/v1/users/{client_id}/{user_id}'] = (status, {})
+
+            with self.subTest(status=status), self.assertRaises(aiohttp.ClientResponseError):
+                await repo.get(user_id, client_id)
+
+    async def test_get_many_users(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        users = [self.random_user(client_id) for _ in range(3)]
+        for user in users:
+            self.add_user(user)
+        missing_id = cast(str, self.faker.uuid4())
+
+        repo = AsyncRestUserRepository(self.base_url, None, self.session, max_concurrency=2)
+        result = await repo.get_many([users[0].id, users[1].id, missing_id, users[2].id, users[0].id], client_id)
+
+        self.assertEqual(result, {user.id: user for user in users})
+        # Duplicated ids are only fetched once
+        self.assertEqual(len(self.calls), 4)
+
+    async def test_get_employee(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        employee = Employee(
+            id=cast(str, self.faker.uuid4()),
+            client_id=client_id,
+            name=self.faker.name(),
+            email=self.faker.email(),
+            role=Role.AGENT,
+            invitation_status=InvitationStatus.ACCEPTED,
+            invitation_date=self.faker.past_datetime(),
+        )
+        self.responses[f'/api/v1/employees/{client_id}/{employee.id}'] = (
+            200,
+            {
+                'id': employee.id,
+                'clientId': client_id,
+                'name': employee.name,
+                'email': employee.email,
+                'role': employee.role.value,
+                'invitationStatus': employee.invitation_status.value,
+                'invitationDate': employee.invitation_date.isoformat(),
+            },
+        )
+
+        repo = AsyncRestEmployeeRepository(self.base_url, None, self.session)
+
+        self.assertEqual(await repo.get(employee.id, client_id), employee)
+        self.assertEqual(await repo.get_many([employee.id], client_id), {employee.id: employee})
+
+    async def test_get_client(self) -> None:
+        client = Client(id=cast(str, self.faker.uuid4()), name=self.faker.company(), email_incidents=self.faker.email())
+        self.responses[f'/api/v1/clients/{client.id}'] = (
+            200,
+            {'id': client.id, 'name': client.name, 'emailIncidents': client.email_incidents},
+        )
+
+        repo = AsyncRestClientRepository(self.base_url, None, self.session)
+
+        self.assertEqual(await repo.get(client.id), client)
+        self.assertIsNone(await repo.get(cast(str, self.faker.uuid4())))
+
+    async def test_circuit_breaker(self) -> None:
+        user = self.random_user(cast(str, self.faker.uuid4()))
+        self.responses[f'/api/v1/users/{user.client_id}/{user.id}'] = (503, None)
+
+        repo = AsyncRestUserRepository(
+            self.base_url, None, self.session, upstream=Upstream(cast(str, self.faker.uuid4()), failure_threshold=2)
+        )
+
+        for _ in range(2):
+            with self.assertRaises(aiohttp.ClientResponseError):
+                await repo.get(user.id, user.client_id)
+        with self.assertRaises(CircuitOpenError):
+            await repo.get(user.id, user.client_id)
+
+        self.assertEqual(len(self.calls), 2)
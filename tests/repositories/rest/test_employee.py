@@ -94,3 +94,42 @@ class TestEmployee(ParametrizedTestCase):
 
             with self.assertRaises(HTTPError):
                 self.repo.get(employee_id, client_id)
+
+    def test_get_many(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        employees = [
+            Employee(
+                id=cast(str, self.faker.uuid4()),
+                client_id=client_id,
+                name=self.faker.name(),
+                email=self.faker.email(),
+                role=self.faker.random_element([Role.ADMIN, Role.AGENT, Role.ANALYST]),
+                invitation_status=cast(InvitationStatus, self.faker.random_element(list(InvitationStatus))),
+                invitation_date=self.faker.past_datetime(),
+            )
+            for _ in range(2)
+        ]
+        missing_id = cast(str, self.faker.uuid4())
+
+        with responses.RequestsMock() as rsps:
+            for employee in employees:
+                rsps.get(
+                    f'{self.base_url}/api/v1/employees/{client_id}/{employee.id}',
+                    json={
+                        'id': employee.id,
+                        'clientId': client_id,
+                        'name': employee.name,
+                        'email': employee.email,
+                        'role': employee.role.value,
+                        'invitationStatus': employee.invitation_status.value,
+                        'invitationDate': employee.invitation_date.isoformat(),
+                    },
+                )
+            rsps.get(f'{self.base_url}/api/v1/employees/{client_id}/{missing_id}', status=404)
+
+            result = self.repo.get_many([employees[0].id, missing_id, employees[1].id, employees[1].id], client_id)
+
+            # Duplicated ids are only fetched once
+            self.assertEqual(len(rsps.calls), 3)
+
+        self.assertEqual(result, {employee.id: employee for employee in employees})
@@ -0,0 +1,310 @@
+import asyncio
+import threading
+import time
+from typing import cast
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+import responses
+from faker import Faker
+from requests import HTTPError, Timeout
+
+from concurrency import FanOutExecutor
+from metrics import UPSTREAM_CIRCUIT_STATE, UPSTREAM_HEDGES, UPSTREAM_REJECTED
+from repositories.rest import CircuitBreaker, CircuitOpenError, CircuitState, RestUserRepository, Upstream
+
+
+def hedges(name: str, event: str) -> float:
+    return UPSTREAM_HEDGES.values().get((name, event), 0)
+
+
+class TestCircuitBreaker(TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.name = cast(str, Faker().uuid4())
+        self.breaker = CircuitBreaker(self.name, failure_threshold=3, reset_timeout=10, clock=lambda: self.now)
+
+    def open_breaker(self) -> None:
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self) -> None:
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+
+        self.open_breaker()
+
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(UPSTREAM_CIRCUIT_STATE.values()[(self.name,)], CircuitState.OPEN)
+
+    def test_half_open_probe_success(self) -> None:
+        self.open_breaker()
+        self.now = 10
+
+        # A single probe is let through
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitState.HALF_OPEN)
+
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, CircuitState.CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_half_open_probe_failure(self) -> None:
+        self.open_breaker()
+        self.now = 10
+
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitState.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.now = 20
+        self.assertTrue(self.breaker.allow())
+
+
+class TestUpstream(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.name = cast(str, self.faker.uuid4())
+
+    def test_hedge_delay(self) -> None:
+        upstream = Upstream(self.name, hedge_percentile=90, min_hedge_delay=0.01, max_hedge_delay=1.0, min_samples=10)
+        self.assertEqual(upstream.hedge_delay(), 1.0)
+
+        for i in range(100):
+            upstream.call(lambda: i, lambda _: False)  # noqa: B023
+
+        # Every response was faster than the shortest delay
+        self.assertEqual(upstream.hedge_delay(), 0.01)
+        self.assertIsNone(Upstream(self.name).hedge_delay())
+
+    def test_hedge_answers_slow_request(self) -> None:
+        upstream = Upstream(self.name, hedge_percentile=50, max_hedge_delay=0.05)
+        threads: list[str] = []
+
+        def fn() -> str:
+            threads.append(threading.current_thread().name)
+            if len(threads) == 1:
+                time.sleep(1)
+                return 'primary'
+            time.sleep(0.01)
+            return 'hedge'
+
+        start = time.perf_counter()
+        self.assertEqual(upstream.call(fn, lambda _: False), 'hedge')
+
+        # The call took the hedge delay plus the latency of the hedge, without waiting for the slow request
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(len(threads), 2)
+        self.assertTrue(all(x.startswith(f'upstream-{self.name}') for x in threads))
+        self.assertEqual((hedges(self.name, 'fired'), hedges(self.name, 'won')), (1, 1))
+
+    def test_hedge_answers_failed_request(self) -> None:
+        # A single failure would open the circuit, the call is recorded as the success of the hedge
+        upstream = Upstream(self.name, failure_threshold=1, hedge_percentile=50, max_hedge_delay=0.05)
+        calls: list[int] = []
+
+        def fn() -> str:
+            calls.append(len(calls))
+            if len(calls) == 1:
+                time.sleep(0.1)
+                raise ConnectionError
+            time.sleep(0.2)
+            return 'hedge'
+
+        self.assertEqual(upstream.call(fn, lambda _: False), 'hedge')
+        self.assertEqual((hedges(self.name, 'fired'), hedges(self.name, 'won')), (1, 1))
+        self.assertEqual(upstream.breaker.state, CircuitState.CLOSED)
+
+    def test_first_answer_used(self) -> None:
+        upstream = Upstream(self.name, hedge_percentile=50, max_hedge_delay=0.05)
+        calls: list[int] = []
+
+        def fn() -> str:
+            calls.append(len(calls))
+            if len(calls) == 1:
+                time.sleep(0.1)
+                return 'primary'
+            time.sleep(0.3)
+            return 'hedge'
+
+        self.assertEqual(upstream.call(fn, lambda _: False), 'primary')
+        self.assertEqual((hedges(self.name, 'fired'), hedges(self.name, 'won')), (1, 0))
+
+    def test_busy_pool_sends_from_caller(self) -> None:
+        upstream = Upstream(self.name, hedge_percentile=50, max_hedge_delay=0.01, hedge_workers=1)
+        started = threading.Event()
+
+        def slow() -> str:
+            started.set()
+            time.sleep(0.2)
+            return 'slow'
+
+        # The only thread of the upstream is busy, so the other call is neither sent from it nor hedged
+        thread = threading.Thread(target=lambda: upstream.call(slow, lambda _: False))
+        thread.start()
+        started.wait(5)
+        self.assertEqual(upstream.call(lambda: threading.current_thread().name, lambda _: False), 'MainThread')
+        thread.join(5)
+
+        self.assertEqual(hedges(self.name, 'fired'), 0)
+
+    def test_timeout(self) -> None:
+        upstream = Upstream(self.name, failure_threshold=1, hedge_percentile=50, max_hedge_delay=0.02, timeout=0.1)
+
+        def fn() -> int:
+            time.sleep(0.5)
+            return 200
+
+        with self.assertRaises(Timeout):
+            upstream.call(fn, lambda x: x >= 500)  # noqa: PLR2004
+        self.assertEqual(upstream.breaker.state, CircuitState.OPEN)
+
+    def test_hedge_not_fired_for_fast_requests(self) -> None:
+        upstream = Upstream(self.name, hedge_percentile=50, max_hedge_delay=0.5)
+
+        self.assertEqual(upstream.call(lambda: 'primary', lambda _: False), 'primary')
+        self.assertEqual(hedges(self.name, 'fired'), 0)
+
+    def test_failed_hedge_ignored(self) -> None:
+        upstream = Upstream(self.name, hedge_percentile=50, max_hedge_delay=0.05)
+        calls: list[int] = []
+
+        def fn() -> int:
+            calls.append(len(calls))
+            if len(calls) == 1:
+                time.sleep(0.2)
+                return 200
+            return 503
+
+        self.assertEqual(upstream.call(fn, lambda x: x >= 500), 200)  # noqa: PLR2004
+        self.assertEqual((hedges(self.name, 'fired'), hedges(self.name, 'won')), (1, 0))
+
+    def test_failed_call_recorded_once(self) -> None:
+        upstream = Upstream(self.name, failure_threshold=2, hedge_percentile=50, max_hedge_delay=0.05)
+
+        def fn() -> int:
+            time.sleep(0.1)
+            return 503
+
+        # Both requests failed, which is a single failure of the call
+        self.assertEqual(upstream.call(fn, lambda x: x >= 500), 503)  # noqa: PLR2004
+        self.assertEqual(hedges(self.name, 'fired'), 1)
+        self.assertEqual(upstream.breaker.state, CircuitState.CLOSED)
+
+        upstream.call(fn, lambda x: x >= 500)  # noqa: PLR2004
+        self.assertEqual(upstream.breaker.state, CircuitState.OPEN)
+
+    def test_probe_not_hedged(self) -> None:
+        now = 0.0
+        upstream = Upstream(
+            self.name, failure_threshold=1, reset_timeout=10, hedge_percentile=50, max_hedge_delay=0.02, clock=lambda: now
+        )
+        upstream.call(lambda: 503, lambda x: x >= 500)  # noqa: PLR2004
+        self.assertEqual(upstream.breaker.state, CircuitState.OPEN)
+
+        now = 10
+
+        def fn() -> int:
+            time.sleep(0.1)
+            return 200
+
+        # The probe closes the circuit, deciding whether to hedge it did not use up its slot
+        self.assertEqual(upstream.call(fn, lambda x: x >= 500), 200)  # noqa: PLR2004
+        self.assertEqual(hedges(self.name, 'fired'), 0)
+        self.assertEqual(upstream.breaker.state, CircuitState.CLOSED)
+
+    def test_hedged_from_saturated_executor(self) -> None:
+        upstream = Upstream(self.name, hedge_percentile=95, max_hedge_delay=0.01)
+        executor = FanOutExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+
+        def lookup(i: int) -> int:
+            time.sleep(0.05)
+            return i
+
+        results: list[int] = []
+        # Every pool thread makes calls, none of them is left to run work the calls would wait for
+        thread = threading.Thread(
+            target=lambda: results.extend(executor.map(lambda i: upstream.call(lambda: lookup(i), lambda _: False), range(4)))
+        )
+        thread.start()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [0, 1, 2, 3])
+        self.assertGreaterEqual(hedges(self.name, 'fired'), 1)
+
+    def test_repository_circuit_breaker(self) -> None:
+        base_url = self.faker.url().rstrip('/')
+        repo = RestUserRepository(base_url, None, upstream=Upstream(self.name, failure_threshold=2))
+        url = f'{base_url}/api/v1/users/client/user'
+
+        with responses.RequestsMock() as rsps:
+            rsps.get(url, status=503)
+
+            for _ in range(2):
+                with self.assertRaises(HTTPError):
+                    repo.get('user', 'client')
+            with self.assertRaises(CircuitOpenError):
+                repo.get('user', 'client')
+
+            self.assertEqual(len(rsps.calls), 2)
+
+        self.assertEqual(UPSTREAM_REJECTED.values()[(self.name,)], 1)
+
+    def test_not_found_is_not_a_failure(self) -> None:
+        base_url = self.faker.url().rstrip('/')
+        repo = RestUserRepository(base_url, None, upstream=Upstream(self.name, failure_threshold=1))
+
+        with responses.RequestsMock() as rsps:
+            rsps.get(f'{base_url}/api/v1/users/client/user', status=404)
+
+            self.assertIsNone(repo.get('user', 'client'))
+            self.assertIsNone(repo.get('user', 'client'))
+
+        self.assertEqual(cast(Upstream, repo.upstream).breaker.state, CircuitState.CLOSED)
+
+
+class TestUpstreamAsync(IsolatedAsyncioTestCase):
+    async def test_hedge_wins_and_cancels_primary(self) -> None:
+        name = cast(str, Faker().uuid4())
+        upstream = Upstream(name, hedge_percentile=50, max_hedge_delay=0.05)
+        cancelled: list[bool] = []
+        calls = 0
+
+        async def fn() -> str:
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+                return 'primary'
+            return 'hedge'
+
+        self.assertEqual(await upstream.call_async(fn, lambda _: False), 'hedge')
+        await asyncio.sleep(0)
+
+        self.assertEqual(cancelled, [True])
+        self.assertEqual((hedges(name, 'fired'), hedges(name, 'won')), (1, 1))
+        self.assertEqual(upstream.breaker.state, CircuitState.CLOSED)
+
+    async def test_failed_call_recorded_once(self) -> None:
+        name = cast(str, Faker().uuid4())
+        upstream = Upstream(name, failure_threshold=2, hedge_percentile=50, max_hedge_delay=0.02)
+
+        async def fn() -> int:
+            await asyncio.sleep(0.05)
+            return 503
+
+        self.assertEqual(await upstream.call_async(fn, lambda x: x >= 500), 503)  # noqa: PLR2004
+        self.assertEqual(hedges(name, 'fired'), 1)
+        self.assertEqual(upstream.breaker.state, CircuitState.CLOSED)
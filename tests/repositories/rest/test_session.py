@@ -0,0 +1,61 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from unittest.mock import patch
+
+from app import create_container
+from repositories.rest import PooledSession, RestUserRepository
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:  # noqa: N802
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+class TestPooledSession(TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_stats_empty(self) -> None:
+        session = PooledSession()
+
+        self.assertEqual(session.stats(), {'requests': 0, 'connections': 0, 'reused': 0})
+
+    def test_connection_reused(self) -> None:
+        session = PooledSession(pool_size=2)
+        repo = RestUserRepository(self.base_url, None, session)
+
+        for _ in range(3):
+            self.assertIsNone(repo.get('user', 'client'))
+
+        self.assertEqual(session.stats(), {'requests': 3, 'connections': 1, 'reused': 2})
+
+    def test_shared_between_repositories(self) -> None:
+        session = PooledSession()
+        repo1 = RestUserRepository(self.base_url, None, session)
+        repo2 = RestUserRepository(self.base_url, None, session)
+
+        repo1.get('user', 'client')
+        repo2.get('user', 'client')
+
+        self.assertEqual(session.stats()['connections'], 1)
+
+    def test_sized_from_executor(self) -> None:
+        with patch.dict(os.environ, {'EXECUTOR_MAX_WORKERS': '12', 'REQUEST_THREADS': '4', 'HEDGE_WORKERS': '2'}):
+            container = create_container()
+
+        self.assertEqual(container.http_pool_size(), 18)
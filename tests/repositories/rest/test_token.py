@@ -0,0 +1,87 @@
+import base64
+import json
+import threading
+from typing import cast
+from unittest import TestCase
+from unittest.mock import Mock
+
+from faker import Faker
+
+from repositories.rest import CachingTokenProvider, TokenProvider
+from repositories.rest.token import token_expiry
+
+
+def gen_jwt(exp: float) -> str:
+    def encode(data: dict[str, object]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip('=')
+
+    return f'{encode({"alg": "RS256"})}.{encode({"exp": exp})}.signature'
+
+
+class TestCachingTokenProvider(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.now = 1000.0
+        self.token_provider = Mock(TokenProvider)
+        self.provider = CachingTokenProvider(self.token_provider, refresh_margin=300, clock=lambda: self.now)
+
+    def test_token_expiry(self) -> None:
+        self.assertEqual(token_expiry(gen_jwt(1234)), 1234)
+        self.assertIsNone(token_expiry(self.faker.pystr()))
+        self.assertIsNone(token_expiry('a.!!!.c'))
+
+    def test_cached_until_refresh_margin(self) -> None:
+        token = gen_jwt(self.now + 3600)
+        cast(Mock, self.token_provider.get_token).return_value = token
+
+        self.assertEqual(self.provider.get_token(), token)
+        self.now += 3000
+        self.assertEqual(self.provider.get_token(), token)
+
+        cast(Mock, self.token_provider.get_token).assert_called_once()
+
+    def test_refreshed_in_background(self) -> None:
+        old_token = gen_jwt(self.now + 3600)
+        new_token = gen_jwt(self.now + 7200)
+        refreshed = threading.Event()
+
+        def get_token() -> str:
+            if cast(Mock, self.token_provider.get_token).call_count == 1:
+                return old_token
+            refreshed.set()
+            return new_token
+
+        cast(Mock, self.token_provider.get_token).side_effect = get_token
+
+        self.provider.get_token()
+        self.now += 3400
+
+        # The cached token is returned while the new one is fetched
+        self.assertEqual(self.provider.get_token(), old_token)
+        self.assertTrue(refreshed.wait(5))
+        # Wait for the background thread to release the lock
+        with self.provider._lock:  # noqa: SLF001
+            pass
+
+        self.assertEqual(self.provider.get_token(), new_token)
+        self.assertEqual(cast(Mock, self.token_provider.get_token).call_count, 2)
+
+    def test_refreshed_synchronously_when_expired(self) -> None:
+        old_token = gen_jwt(self.now + 3600)
+        new_token = gen_jwt(self.now + 7200)
+        cast(Mock, self.token_provider.get_token).side_effect = [old_token, new_token]
+
+        self.provider.get_token()
+        self.now += 3600
+
+        self.assertEqual(self.provider.get_token(), new_token)
+
+    def test_token_without_expiry(self) -> None:
+        token = self.faker.pystr()
+        cast(Mock, self.token_provider.get_token).return_value = token
+
+        self.assertEqual(self.provider.get_token(), token)
+        self.now += 10
+        self.assertEqual(self.provider.get_token(), token)
+
+        cast(Mock, self.token_provider.get_token).assert_called_once()
@@ -86,3 +86,39 @@ class TestUser(ParametrizedTestCase):
 
             with self.assertRaises(HTTPError):
                 self.repo.get(user_id, client_id)
+
+    def test_get_many(self) -> None:
+        client_id = cast(str, self.faker.uuid4())
+        users = [
+            User(
+                id=cast(str, self.faker.uuid4()),
+                client_id=client_id,
+                name=self.faker.name(),
+                email=self.faker.email(),
+            )
+            for _ in range(3)
+        ]
+        missing_id = cast(str, self.faker.uuid4())
+
+        with responses.RequestsMock() as rsps:
+            for user in users:
+                rsps.get(
+                    f'{self.base_url}/api/v1/users/{client_id}/{user.id}',
+                    json={
+                        'id': user.id,
+                        'clientId': user.client_id,
+                        'name': user.name,
+                        'email': user.email,
+                    },
+                )
+            rsps.get(f'{self.base_url}/api/v1/users/{client_id}/{missing_id}', status=404)
+
+            result = self.repo.get_many([users[0].id, users[1].id, missing_id, users[2].id, users[0].id], client_id)
+
+            # Duplicated ids are only fetched once
+            self.assertEqual(len(rsps.calls), 4)
+
+        self.assertEqual(result, {user.id: user for user in users})
+
+    def test_get_many_empty(self) -> None:
+        self.assertEqual(self.repo.get_many([], cast(str, self.faker.uuid4())), {})
@@ -0,0 +1,86 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import cast
+from unittest import TestCase
+from unittest.mock import Mock
+
+import responses
+from faker import Faker
+
+from app import create_container
+from repositories.rest import RestUserRepository, TokenProvider
+from warmup import warm_up, warm_up_rest
+
+
+class SlowHeadHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self) -> None:  # noqa: N802
+        # Slow enough for the requests sent at the same time to overlap, so each one needs its own connection
+        time.sleep(0.05)
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+def start_server() -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHeadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+class TestWarmUp(TestCase):
+    def setUp(self) -> None:
+        self.faker = Faker()
+        self.user_url = self.faker.url().rstrip('/')
+        self.client_url = self.faker.url().rstrip('/')
+
+    def test_warm_up_rest(self) -> None:
+        token = self.faker.pystr()
+        token_provider = Mock(TokenProvider)
+        cast(Mock, token_provider.get_token).return_value = token
+        repo = RestUserRepository(self.user_url, token_provider)
+
+        with responses.RequestsMock() as rsps:
+            rsps.head(self.user_url, status=404)
+            warm_up_rest(repo, connections=3)
+
+            self.assertEqual(len(rsps.calls), 3)
+            self.assertEqual(rsps.calls[0].request.headers['Authorization'], f'Bearer {token}')
+        cast(Mock, token_provider.get_token).assert_called_once()
+
+    def test_warm_up_container(self) -> None:
+        # The services are on different ports, so they do not share the connections of their pools
+        user_server, user_url = start_server()
+        client_server, client_url = start_server()
+        self.addCleanup(user_server.server_close)
+        self.addCleanup(user_server.shutdown)
+        self.addCleanup(client_server.server_close)
+        self.addCleanup(client_server.shutdown)
+
+        container = create_container()
+        container.config.incidents.backend.from_value('memory')
+        container.config.svc.user.url.from_value(user_url)
+        container.config.svc.client.url.from_value(client_url)
+
+        with self.assertLogs('warmup') as logs:
+            warm_up(container, connections=4)
+
+        self.assertEqual(len(logs.records), 2)
+        # Every connection asked for is opened and left in the pool, even though the steps run in the same group
+        self.assertEqual(container.http_session().stats(), {'requests': 8, 'connections': 8, 'reused': 0})
+
+    def test_failed_step_logged(self) -> None:
+        container = create_container()
+        container.config.incidents.backend.from_value('memory')
+        container.config.svc.user.url.from_value(self.user_url)
+
+        # The request fails, as no response is registered for it
+        with responses.RequestsMock(assert_all_requests_are_fired=False), self.assertLogs('warmup', 'ERROR') as logs:
+            warm_up(container, connections=1)
+
+        self.assertIn('user-svc', logs.output[0])
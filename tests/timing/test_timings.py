@@ -0,0 +1,102 @@
+import time
+from collections.abc import AsyncGenerator, Generator
+from typing import cast
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from concurrency import FanOutExecutor
+from timing import RequestTimings, current_timings, finish_request_timings, start_request_timings, timed, timed_methods
+
+
+@timed_methods('db')
+class Repository:
+    def __init__(self, executor: FanOutExecutor) -> None:
+        self.executor = executor
+
+    def get(self, delay: float) -> float:
+        time.sleep(delay)
+        return delay
+
+    def get_many(self, delays: list[float]) -> list[float]:
+        return self.executor.map(self.get, delays)
+
+    def stream(self, n: int) -> Generator[int, None, None]:
+        for i in range(n):
+            time.sleep(0.01)
+            yield i
+
+    def _helper(self) -> None:
+        pass
+
+
+class TestTimings(TestCase):
+    def setUp(self) -> None:
+        self.executor = FanOutExecutor(max_workers=4)
+        self.repo = Repository(self.executor)
+        self.token = start_request_timings()
+
+    def tearDown(self) -> None:
+        finish_request_timings(self.token)
+        self.executor.shutdown()
+
+    def timings(self) -> RequestTimings:
+        return cast(RequestTimings, current_timings())
+
+    def test_calls_added_up(self) -> None:
+        self.repo.get(0.01)
+        self.repo.get(0.02)
+
+        self.assertEqual(self.timings().calls, {'db': 2})
+        self.assertGreaterEqual(self.timings().durations['db'], 0.03)
+
+    def test_nested_calls_counted_once(self) -> None:
+        # The lookups run on the executor as part of the batch, they are not added on top of it
+        self.repo.get_many([0.02, 0.02, 0.02])
+
+        self.assertEqual(self.timings().calls, {'db': 1})
+        self.assertLess(self.timings().durations['db'], 0.06)
+
+    def test_generator_time_excludes_caller(self) -> None:
+        for _ in self.repo.stream(3):
+            time.sleep(0.02)
+
+        self.assertEqual(self.timings().calls, {'db': 1})
+        self.assertGreaterEqual(self.timings().durations['db'], 0.03)
+        self.assertLess(self.timings().durations['db'], 0.06)
+
+    def test_private_methods_not_wrapped(self) -> None:
+        self.assertFalse(hasattr(Repository._helper, '__wrapped__'))  # noqa: SLF001
+        self.assertTrue(hasattr(Repository.get, '__wrapped__'))
+
+    def test_server_timing(self) -> None:
+        self.repo.get(0)
+        timed('encode')(str)(1)
+
+        header = self.timings().server_timing()
+
+        self.assertRegex(header, r'^db;dur=\d+\.\d;desc="1 calls", encode;dur=\d+\.\d;desc="1 calls", total;dur=\d+\.\d$')
+
+
+class TestTimingsOutsideRequest(TestCase):
+    def test_not_timed(self) -> None:
+        self.assertEqual(list(timed('db')(range)(3)), [0, 1, 2])
+        self.assertIsNone(current_timings())
+
+
+class TestAsyncTimings(IsolatedAsyncioTestCase):
+    async def test_coroutines_and_async_generators(self) -> None:
+        @timed('svc')
+        async def get() -> int:
+            return 1
+
+        @timed('svc')
+        async def stream() -> AsyncGenerator[int, None]:
+            yield await get()
+
+        token = start_request_timings()
+        try:
+            await get()
+            self.assertEqual([x async for x in stream()], [1])
+        finally:
+            timings = finish_request_timings(token)
+
+        self.assertEqual(cast(RequestTimings, timings).calls, {'svc': 2})
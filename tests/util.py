@@ -1,9 +1,12 @@
+from collections.abc import Callable, Iterable
 from datetime import UTC
-from typing import cast
+from typing import TypeVar, cast
 
 from faker import Faker
 
-from models import Action, Channel, HistoryEntry, Incident, Risk
+from models import Action, Channel, HistoryEntry, HistorySummary, Incident, Risk
+
+T = TypeVar('T')
 
 
 def create_random_incident(
@@ -23,6 +26,7 @@ def create_random_incident(
         created_by=created_by or cast(str, faker.uuid4()),
         assigned_to=assigned_to or cast(str, faker.uuid4()),
         risk=cast(Risk, faker.random_element(list(Risk))),
+        last_modified=faker.past_datetime(tzinfo=UTC),
     )
 
 
@@ -37,3 +41,22 @@ def create_random_history_entry(
         description=faker.text(),
         seq=seq,
     )
+
+
+def create_random_history_summary(
+    faker: Faker, *, client_id: str | None = None, incident_id: str | None = None
+) -> HistorySummary:
+    return HistorySummary(
+        incident_id=incident_id or cast(str, faker.uuid4()),
+        client_id=client_id or cast(str, faker.uuid4()),
+        filing_date=faker.past_datetime(tzinfo=UTC),
+        status=faker.random_element([Action.CREATED, Action.ESCALATED, Action.CLOSED]),
+    )
+
+
+def found_many(get: Callable[[str], T | None]) -> Callable[[Iterable[str], str], dict[str, T]]:
+    # Side effect of a mocked get_many, which leaves out the ids that are not found
+    def get_many(ids: Iterable[str], client_id: str) -> dict[str, T]:  # noqa: ARG001
+        return {k: v for k, v in ((x, get(x)) for x in ids) if v is not None}
+
+    return get_many
@@ -0,0 +1,19 @@
+from .timings import (
+    RequestTimings,
+    current_timings,
+    finish_request_timings,
+    start_request_timings,
+    timed,
+    timed_methods,
+    timer,
+)
+
+__all__ = [
+    'RequestTimings',
+    'current_timings',
+    'finish_request_timings',
+    'start_request_timings',
+    'timed',
+    'timed_methods',
+    'timer',
+]
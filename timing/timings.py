@@ -0,0 +1,144 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from collections.abc import AsyncGenerator, Callable, Generator, Iterator
+from contextlib import contextmanager
+from types import AsyncGeneratorType, GeneratorType
+from typing import Any, ParamSpec, TypeVar, cast
+
+P = ParamSpec('P')
+R = TypeVar('R')
+C = TypeVar('C', bound=type)
+
+
+class RequestTimings:
+    # Time spent by a request on each dependency, added up from every thread and task working for the request
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.durations: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, duration: float, calls: int = 1) -> None:
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + duration
+            self.calls[name] = self.calls.get(name, 0) + calls
+
+    def as_dict(self) -> dict[str, dict[str, float | int]]:
+        with self._lock:
+            timings: dict[str, dict[str, float | int]] = {
+                name: {'ms': round(duration * 1000, 3), 'calls': self.calls[name]} for name, duration in self.durations.items()
+            }
+
+        timings['total'] = {'ms': round((time.perf_counter() - self.start) * 1000, 3), 'calls': 1}
+        return timings
+
+    def server_timing(self) -> str:
+        # Value of the Server-Timing header, durations are in milliseconds
+        return ', '.join(
+            f'{name};dur={x["ms"]:.1f}' + (f';desc="{x["calls"]} calls"' if name != 'total' else '')
+            for name, x in self.as_dict().items()
+        )
+
+
+_current: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar('request_timings', default=None)
+# Dependencies being timed in the current context. Nested calls to the same dependency, like the lookups of a batch
+# running on the executor, are part of the outermost call and are not added again.
+_active: contextvars.ContextVar[frozenset[str]] = contextvars.ContextVar('active_timings', default=frozenset())
+
+
+def start_request_timings() -> contextvars.Token[RequestTimings | None]:
+    return _current.set(RequestTimings())
+
+
+def current_timings() -> RequestTimings | None:
+    return _current.get()
+
+
+def finish_request_timings(token: contextvars.Token[RequestTimings | None]) -> RequestTimings | None:
+    timings = _current.get()
+    _current.reset(token)
+    return timings
+
+
+@contextmanager
+def timer(name: str, calls: int = 1) -> Iterator[None]:
+    timings = _current.get()
+    active = _active.get()
+
+    if timings is None or name in active:
+        yield
+        return
+
+    token = _active.set(active | {name})
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start, calls)
+        _active.reset(token)
+
+
+def _timed_generator(name: str, gen: Generator[Any, Any, Any]) -> Generator[Any, Any, Any]:
+    # Only the time spent producing each item is added, not the time the caller spends between items
+    while True:
+        with timer(name, calls=0):
+            try:
+                item = next(gen)
+            except StopIteration as e:
+                return e.value
+        yield item
+
+
+async def _timed_async_generator(name: str, gen: AsyncGenerator[Any, None]) -> AsyncGenerator[Any, None]:
+    while True:
+        with timer(name, calls=0):
+            try:
+                item = await anext(gen)
+            except StopAsyncIteration:
+                return
+        yield item
+
+
+def timed(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    # Adds the time of each call to the timings of the current request, including the time to iterate the
+    # generators it returns. Calls made outside of a request are not timed.
+    def decorator(fn: Callable[P, R]) -> Callable[P, R]:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: P.args, **kwargs: P.kwargs) -> Any:  # noqa: ANN401
+                with timer(name):
+                    return await fn(*args, **kwargs)
+
+            return cast(Callable[P, R], async_wrapper)
+
+        @functools.wraps(fn)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with timer(name):
+                result = fn(*args, **kwargs)
+
+            if _current.get() is not None:
+                if isinstance(result, GeneratorType):
+                    return cast(R, _timed_generator(name, result))
+                if isinstance(result, AsyncGeneratorType):
+                    return cast(R, _timed_async_generator(name, result))
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def timed_methods(name: str) -> Callable[[C], C]:
+    # Times every public method defined by the class, as calls to the given dependency
+    def decorator(cls: C) -> C:
+        for attr, value in list(vars(cls).items()):
+            if not attr.startswith('_') and inspect.isfunction(value):
+                setattr(cls, attr, timed(name)(value))
+        return cls
+
+    return decorator
@@ -0,0 +1,111 @@
+# Work the first request of a new instance would otherwise pay for: opening the Firestore gRPC channel along with its
+# credentials, fetching the tokens of the upstream services and opening connections to them
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import cast
+
+from containers import Container
+from repositories.firestore import FirestoreAsyncIncidentRepository, FirestoreIncidentRepository
+from repositories.rest.base import AsyncRestBaseRepository, RestBaseRepository
+
+logger = logging.getLogger('warmup')
+
+# Any document will do, reading it opens the channel. It does not have to exist.
+WARMUP_DOCUMENT = ('clients', '_warmup')
+# Seconds to wait for Firestore, without retrying, so an unreachable database does not hold the startup for long
+FIRESTORE_TIMEOUT = 5.0
+
+
+def warm_up_firestore(repo: FirestoreIncidentRepository) -> None:
+    repo.db.collection(WARMUP_DOCUMENT[0]).document(WARMUP_DOCUMENT[1]).get(retry=None, timeout=FIRESTORE_TIMEOUT)
+
+
+async def warm_up_firestore_async(repo: FirestoreAsyncIncidentRepository) -> None:
+    doc = repo.db.collection(WARMUP_DOCUMENT[0]).document(WARMUP_DOCUMENT[1])
+    await asyncio.wait_for(doc.get(), FIRESTORE_TIMEOUT)
+
+
+def warm_up_rest(repo: RestBaseRepository, connections: int) -> None:
+    # Whatever the response is, the connection it used is left open in the pool. Requests made at the same time use
+    # different connections, so up to that many connections are opened.
+    headers = None if repo.token_provider is None else {'Authorization': f'Bearer {repo.token_provider.get_token()}'}
+
+    def connect(_: int) -> None:
+        repo.session.head(repo.base_url, timeout=2, headers=headers).close()
+
+    repo.executor.map(connect, range(connections), max_concurrency=connections)
+
+
+async def warm_up_rest_async(repo: AsyncRestBaseRepository, connections: int) -> None:
+    headers = None
+    if repo.token_provider is not None:
+        headers = {'Authorization': f'Bearer {await asyncio.to_thread(repo.token_provider.get_token)}'}
+
+    async def connect() -> None:
+        async with repo.session.head(repo.base_url, headers=headers):
+            pass
+
+    async with asyncio.TaskGroup() as group:
+        for _ in range(connections):
+            group.create_task(connect())
+
+
+def _run_step(name: str, step: Callable[[], None]) -> None:
+    # A failed step is only logged, the requests will retry what it could not do
+    start = time.perf_counter()
+    try:
+        step()
+    except Exception:
+        logger.exception('Warm-up step %s failed', name)
+    else:
+        logger.info('Warm-up step %s done in %.1f ms', name, (time.perf_counter() - start) * 1000)
+
+
+async def _run_async_step(name: str, step: Awaitable[None]) -> None:
+    start = time.perf_counter()
+    try:
+        await step
+    except Exception:
+        logger.exception('Warm-up step %s failed', name)
+    else:
+        logger.info('Warm-up step %s done in %.1f ms', name, (time.perf_counter() - start) * 1000)
+
+
+def warm_up(container: Container, connections: int) -> None:
+    # The steps run concurrently, the client repository shares the host and the token of the employee repository
+    steps: dict[str, Callable[[], None]] = {}
+    rest_steps = 0
+
+    if container.config.incidents.backend() == 'firestore':
+        steps['firestore'] = lambda: warm_up_firestore(container.firestore_incident_repo())
+    if container.config.svc.user.url() is not None:
+        steps['user-svc'] = lambda: warm_up_rest(container.rest_user_repo(), connections)
+        rest_steps += 1
+    if container.config.svc.client.url() is not None:
+        steps['client-svc'] = lambda: warm_up_rest(container.rest_employee_repo(), connections)
+        rest_steps += 1
+
+    # The connections of a REST step are opened by a group nested in this one, which shares its slots. Without room
+    # for them they would be opened one after the other, all reusing the same connection.
+    executor = container.executor()
+    with executor.group(max_concurrency=max(len(steps) + rest_steps * connections, 1)) as group:
+        for name, step in steps.items():
+            group.submit(_run_step, name, step)
+
+
+async def warm_up_async(container: Container, connections: int) -> None:
+    # The asyncio serving mode always reads the incidents from Firestore
+    steps: dict[str, Awaitable[None]] = {
+        'firestore': warm_up_firestore_async(container.async_incident_repo()),
+    }
+
+    if container.config.svc.user.url() is not None:
+        steps['user-svc'] = warm_up_rest_async(cast(AsyncRestBaseRepository, container.async_user_repo()), connections)
+    if container.config.svc.client.url() is not None:
+        steps['client-svc'] = warm_up_rest_async(cast(AsyncRestBaseRepository, container.async_employee_repo()), connections)
+
+    async with asyncio.TaskGroup() as group:
+        for name, step in steps.items():
+            group.create_task(_run_async_step(name, step))